@@ -0,0 +1,50 @@
+## Scaling of batch parsing (run.run_batch) with number of worker processes
+## on generated corpus; speedup should be close to number of workers
+## up to number of CPUs. Run from repository root:
+## python -m benchmarks.batch_bench [files] [lines per file]
+import os
+import sys
+import tempfile
+import time
+from benchmarks.srx_config_generator import generate_srx_config_lines
+from run import run_batch
+
+
+def worker_counts():
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def main(files=64, lines=20_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus = []
+        for i in range(files):
+            path = os.path.join(tmp_dir, f'srx-{i}.txt')
+            with open(path, 'w') as file:
+                for line in generate_srx_config_lines(lines, logical_systems=i % 3, seed=i):
+                    file.write(line + '\n')
+            corpus.append(path)
+        size = sum(os.path.getsize(path) for path in corpus) / 1024**2
+        print(f'{files} files, {size:.1f} MB, {os.cpu_count()} CPUs')
+
+        single = None
+        for workers in worker_counts():
+            output = os.path.join(tmp_dir, f'out-{workers}')
+            start = time.perf_counter()
+            results = list(run_batch(corpus, 'srx_set', output, 'json_compact', workers=workers))
+            elapsed = time.perf_counter() - start
+            assert all(result.error is None for result in results)
+            single = single or elapsed
+            print(
+                f'{workers:>3} workers {elapsed:>7.2f} s {files / elapsed:>7.1f} files/s '
+                f'{size / elapsed:>6.1f} MB/s  speedup {single / elapsed:>4.2f}x'
+            )
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,77 @@
+## Fleet analytics read path: JSON files vs Parquet / Arrow tables.
+## Query - number of permit rules and distinct source addresses per device.
+## Run from repository root: python -m benchmarks.columnar_writer_bench [devices] [rules]
+import json
+import os
+import sys
+import tempfile
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+from benchmarks.records_memory_bench import generate_config
+from data_processing.config_data import ConfigDataList
+from data_processing.data_writers import read_columnar, writers_factory
+from data_processing.parsers import ParserSrxSets
+
+
+def query_json(paths):
+    result = {}
+    for path in paths:
+        with open(path) as file:
+            fw_data = json.load(file)
+        permits, sources = 0, set()
+        for logsys_data in fw_data.values():
+            for rule in logsys_data['fw rules'].values():
+                permits += 'permit' in rule['term_action']
+                sources.update(rule['src_IP'])
+        result[os.path.basename(path)[:-len('.json')]] = (permits, len(sources))
+    return result
+
+
+def query_columnar(paths):
+    result = {}
+    for path in paths:
+        rules = read_columnar(path, columns=['hostname', 'term_action', 'src_IP'])['fw_rules']
+        actions = pc.list_flatten(rules.column('term_action'))
+        permits = pc.sum(pc.equal(actions, 'permit')).as_py() or 0
+        sources = pc.count_distinct(pc.list_flatten(rules.column('src_IP'))).as_py()
+        result[rules.column('hostname')[0].as_py()] = (permits, sources)
+    return result
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(devices=20, rules=5_000):
+    parser = ParserSrxSets(ConfigDataList(generate_config(rules)))
+    parser.run()
+    _, fw_data = parser.get_data()
+    print(f'devices: {devices}, rules per device: {rules}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {}
+        for data_type in ('json_compact', 'parquet', 'arrow'):
+            paths = []
+            start = time.perf_counter()
+            for i in range(devices):
+                hostname = f'FW-{i}'
+                if data_type == 'json_compact':
+                    path = os.path.join(tmp_dir, f'{hostname}.json')
+                    writers_factory(data_type).write(path, fw_data)
+                else:
+                    path = os.path.join(tmp_dir, data_type, hostname)
+                    writers_factory(data_type, hostname=hostname).write(path, fw_data)
+                paths.append(path)
+            write_time = time.perf_counter() - start
+
+            query = query_json if data_type == 'json_compact' else query_columnar
+            read_time, results[data_type] = timed(query, paths)
+            print(f'{data_type:<14} write {write_time:>7.2f} s   read + query {read_time:>7.3f} s')
+        assert results['json_compact'] == results['parquet'] == results['arrow']
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
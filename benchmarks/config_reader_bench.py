@@ -0,0 +1,63 @@
+## Throughput of ConfigDataTXT line types against plain open() iteration.
+## Run from repository root: python -m benchmarks.config_reader_bench [lines]
+import gzip
+import lzma
+import os
+import sys
+import tempfile
+import time
+from data_processing.config_data import ConfigDataTXT
+
+
+## Previous reader - plain iteration over text file
+def read_previous(conf_file):
+    with open(conf_file) as file:
+        for line in file:
+            yield line
+
+
+def write_config(path, lines):
+    with open(path, 'w') as file:
+        for i in range(lines):
+            file.write(
+                'set security policies from-zone trust to-zone untrust '
+                f'policy P{i} match source-address ADDR-{i % 5000}\n'
+            )
+
+
+## Best of few runs, single run on busy machine is noisy
+def bench(name, get_lines, size, repeat=3):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = 0
+        for _ in get_lines():
+            count += 1
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f'{name:<24} {count / elapsed:>14,.0f} lines/sec {size / elapsed / 1024**2:>10,.1f} MB/s')
+
+
+def main(lines=1_000_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain = os.path.join(tmp_dir, 'srx.txt')
+        write_config(plain, lines)
+        with open(plain, 'rb') as file:
+            data = file.read()
+        size = len(data)
+        with open(plain + '.gz', 'wb') as file:
+            file.write(gzip.compress(data, compresslevel=6))
+        with open(plain + '.xz', 'wb') as file:
+            file.write(lzma.compress(data, preset=1))
+        del data
+
+        print(f'lines: {lines}, size: {size / 1024**2:.1f} MB (uncompressed)')
+        bench('previous (open)', lambda: read_previous(plain), size)
+        for path in (plain, plain + '.gz', plain + '.xz'):
+            kind = os.path.splitext(path)[1] or '.txt'
+            for line_type in ConfigDataTXT.LINE_TYPES:
+                reader = ConfigDataTXT(path, line_type=line_type)
+                bench(f'{kind} {line_type}', reader.get, size)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
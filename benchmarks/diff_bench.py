@@ -0,0 +1,96 @@
+## Structural diff of two parsed snapshots of one device with 100k rules,
+## second one with 0.1% of rules changed (modified, removed and added).
+## Compares diff of fingerprints with naive walk comparing every entry:
+## diff of fingerprints should take small fraction of naive walk, but
+## making fingerprint of snapshot is linear - diff() of two fw_data makes
+## both, keep fingerprint of snapshot to pay for it once.
+## Run from repository root: python -m benchmarks.diff_bench [rules] [changed share]
+import random
+import re
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config
+from data_processing.config_data import ConfigDataList
+from data_processing.diff import Fingerprint, diff, summarize
+from data_processing.parsers import ParserSrxSets
+
+POLICY_NAME = re.compile(r' policy P(\d+)(?= |$)')
+
+
+def bench(func, repeat=3):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed, result
+
+
+## Lines of changed config: 40% of changed policies get new destination,
+## 30% are removed and 30% copied as new policies
+def change_policies(lines, policies, changed, seed=0):
+    chosen = random.Random(seed).sample(range(policies), changed)
+    modified = set(chosen[:changed * 4 // 10])
+    removed = set(chosen[len(modified):len(modified) + changed * 3 // 10])
+    copied = set(chosen[len(modified) + len(removed):])
+    new_lines = []
+    added = []
+    for line in lines:
+        match = POLICY_NAME.search(line)
+        policy = int(match[1]) if match else None
+        if policy in removed:
+            continue
+        new_lines.append(line)
+        if policy in modified and line.endswith((' then permit', ' then deny')):
+            new_lines.append(f'{line.rsplit(" then ", 1)[0]} match destination-address any')
+        if policy in copied:
+            added.append(POLICY_NAME.sub(f' policy P{policy}-NEW', line))
+    return new_lines + added
+
+
+def parse(lines):
+    parser = ParserSrxSets(ConfigDataList(lines), compact=True)
+    parser.run()
+    return parser.get_data()[1]
+
+
+## Diff without hashes, every entry of both snapshots is compared
+def naive_diff(old, new):
+    changed = 0
+    for logsys in old.keys() | new.keys():
+        old_sections, new_sections = old.get(logsys, {}), new.get(logsys, {})
+        for section in old_sections.keys() | new_sections.keys():
+            old_entries, new_entries = old_sections.get(section, {}), new_sections.get(section, {})
+            if not isinstance(old_entries, dict):
+                changed += old_entries != new_entries
+                continue
+            for name in old_entries.keys() | new_entries.keys():
+                changed += old_entries.get(name) != new_entries.get(name)
+    return changed
+
+
+def main(policies=100_000, share=0.001):
+    lines = list(generate_srx_config(policies=policies, addresses=policies // 10, routes=policies // 50))
+    changed = max(1, round(policies * share))
+    start = time.perf_counter()
+    old = parse(lines)
+    new = parse(change_policies(lines, policies, changed))
+    print(f'{len(lines):,} lines, {policies:,} rules, {changed} changed; parsed in {time.perf_counter() - start:.1f} s')
+
+    fingerprint_time, old_fingerprint = bench(lambda: Fingerprint(old))
+    new_fingerprint = Fingerprint(new)
+    diff_time, changes = bench(lambda: diff(old_fingerprint, new_fingerprint), repeat=20)
+    naive_time, _ = bench(lambda: naive_diff(old, new))
+    full_time, _ = bench(lambda: diff(old_fingerprint, new))
+    print(f'  fingerprint of snapshot      {fingerprint_time * 1000:>9.2f} ms')
+    print(f'  diff of fingerprints         {diff_time * 1000:>9.2f} ms')
+    print(f'  fingerprint + diff           {full_time * 1000:>9.2f} ms  (yesterday\'s fingerprint kept)')
+    print(f'  naive diff of every entry    {naive_time * 1000:>9.2f} ms')
+    print(f'  diff of fingerprints is {naive_time / diff_time:,.0f}x faster than naive diff')
+    for logsys, sections in summarize(changes).items():
+        for section, counts in sections.items():
+            print(f'  {logsys} {section}: ' + ', '.join(f'{n} {kind}' for kind, n in counts.items()))
+
+
+if __name__ == '__main__':
+    main(*(float(arg) if '.' in arg else int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,42 @@
+## Rows/sec and peak RSS of DataWriterExcel for one big device.
+## Run from repository root: python -m benchmarks.excel_writer_bench [rules]
+import os
+import resource
+import sys
+import tempfile
+import time
+from benchmarks.records_memory_bench import generate_config
+from data_processing.config_data import ConfigDataList
+from data_processing.data_writers import writers_factory
+from data_processing.flatten import iter_tables
+from data_processing.parsers import ParserSrxSets
+
+
+def peak_rss_mb():
+    ## ru_maxrss is in kB on Linux, bytes on macOS
+    scale = 1024**2 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def main(rules=100_000):
+    parser = ParserSrxSets(ConfigDataList(generate_config(rules)), compact=True)
+    parser.run()
+    _, fw_data = parser.get_data()
+    rows = sum(1 for *_, table_rows in iter_tables(fw_data) for _ in table_rows)
+    rss_before = peak_rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'out.xlsx')
+        start = time.perf_counter()
+        writers_factory('excel').write(path, fw_data)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+    rss_after = peak_rss_mb()
+    print(f'rules: {rules}, rows: {rows}')
+    print(f'write:    {elapsed:.2f} s, {rows / elapsed:,.0f} rows/sec, file {size / 1024**2:.1f} MB')
+    print(f'peak RSS: {rss_before:.1f} MB after parse, {rss_after:.1f} MB after write')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
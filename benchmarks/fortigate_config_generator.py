@@ -0,0 +1,293 @@
+## Deterministic generator of FortiGate "show full-configuration" output for benchmarks.
+## Same counts and seed always give the same lines.
+## Like real full-configuration, objects have many attributes with default values
+## and there are sections which parser skips.
+## Run from repository root to write file:
+## python -m benchmarks.fortigate_config_generator <path> [lines] [vdoms]
+import random
+import sys
+
+PREDEFINED_SERVICES = ('HTTP', 'HTTPS', 'SSH', 'DNS', 'NTP', 'ALL')
+PREFIX_TO_MASK = {
+    16: '255.255.0.0', 24: '255.255.255.0',
+    28: '255.255.255.240', 32: '255.255.255.255',
+}
+## Default attributes shown by full-configuration, not used by parser:
+POLICY_DEFAULTS = (
+    'set uuid 5c3f4a8e-6b1d-51ee-3f2a-9d1c0e7b4a21',
+    'set internet-service disable',
+    'set schedule "always"',
+    'set utm-status disable',
+    'set inspection-mode flow',
+    'set logtraffic utm',
+    'set logtraffic-start disable',
+    'set auto-asic-offload enable',
+)
+INTERFACE_DEFAULTS = (
+    'set mode static',
+    'set allowaccess ping https ssh',
+    'set status up',
+    'set type physical',
+    'set mtu-override disable',
+)
+
+## Lines generated per object of each kind, used to size config by line count
+LINES_PER_OBJECT = {
+    'policies': 18,
+    'addresses': 5.3,
+    'address_groups': 4,
+    'services': 6.6,
+    'routes': 8,
+    'interfaces': 13,
+    'vips': 6.5,
+}
+## Share of lines given to each kind
+LINE_SHARES = {
+    'policies': 0.55,
+    'addresses': 0.2,
+    'address_groups': 0.06,
+    'services': 0.05,
+    'routes': 0.05,
+    'interfaces': 0.05,
+    'vips': 0.04,
+}
+
+
+def _ip(rng, first_octet=10):
+    return f'{first_octet}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+
+
+def _names(names):
+    return ' '.join(f'"{name}"' for name in names)
+
+
+## Counts are per VDOM; without vdoms config is in single VDOM mode,
+## with vdoms there are vdoms VDOMs: root, VDOM1, VDOM2...
+def generate_fortigate_config(
+    vdoms=0, policies=100, addresses=100, address_groups=10,
+    services=10, routes=20, interfaces=5, vips=5, seed=0,
+):
+    rng = random.Random(seed)
+    vdom_names = ['root'] + [f'VDOM{i}' for i in range(1, vdoms)]
+    yield f'#config-version=FGT600E-7.2.5-FW-build1517-230606:opmode=0:vdom={int(bool(vdoms))}:user=admin'
+    yield '#conf_file_ver=84213124789034'
+    yield '#buildno=1517'
+    if vdoms:
+        yield 'config vdom'
+        for vdom in vdom_names:
+            yield f'edit {vdom}'
+            yield 'next'
+        yield 'end'
+        yield 'config global'
+    indent = '    ' if vdoms else ''
+
+    yield from _indented(indent, _generate_system(rng))
+    vdom_interfaces = {}
+    yield f'{indent}config system interface'
+    for vdom in vdom_names:
+        vdom_interfaces[vdom] = []
+        for i in range(interfaces):
+            name = f'port{len(vdom_interfaces) * 100 + i}'
+            vdom_interfaces[vdom].append(name)
+            yield from _indented(indent + '    ', _generate_interface(rng, name, vdom, i))
+    yield f'{indent}end'
+    if vdoms:
+        yield 'end'
+
+    for vdom in vdom_names:
+        vdom_lines = _generate_vdom(
+            rng, vdom_interfaces[vdom], policies, addresses, address_groups,
+            services, routes, vips,
+        )
+        if vdoms:
+            yield 'config vdom'
+            yield f'edit {vdom}'
+            yield from _indented('    ', vdom_lines)
+            yield 'next'
+            yield 'end'
+        else:
+            yield from vdom_lines
+
+
+def _indented(indent, lines):
+    for line in lines:
+        yield indent + line
+
+
+def _generate_system(rng):
+    yield 'config system global'
+    yield '    set admintimeout 30'
+    yield '    set alias "FGT-BENCH"'
+    yield '    set hostname "FGT-BENCH"'
+    yield '    set timezone 28'
+    yield 'end'
+    yield 'config system accprofile'
+    yield '    edit "prof_admin"'
+    yield '        set secfabgrp read-write'
+    yield '        set ftviewgrp read-write'
+    yield '    next'
+    yield 'end'
+    ## Multi-line quoted value:
+    yield 'config vpn certificate local'
+    yield '    edit "Fortinet_Factory"'
+    yield '        set password ENC Zm9ydGluZXQ='
+    yield '        set comments "This is the default server certificate.'
+    yield 'next"'
+    yield '        set certificate "-----BEGIN CERTIFICATE-----'
+    for _ in range(8):
+        yield ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/') for _ in range(64))
+    yield '-----END CERTIFICATE-----"'
+    yield '    next'
+    yield 'end'
+
+
+def _generate_interface(rng, name, vdom, i):
+    yield f'edit "{name}"'
+    yield f'    set vdom "{vdom}"'
+    if i % 5 == 4:
+        yield '    set ip 0.0.0.0 0.0.0.0'
+    else:
+        yield f'    set ip {_ip(rng, 172)} 255.255.255.0'
+    yield from (f'    {line}' for line in INTERFACE_DEFAULTS)
+    yield f'    set description "link {i}"'
+    ## Nested section, not parsed:
+    yield '    config ipv6'
+    yield '        set ip6-mode static'
+    yield '    end'
+    yield 'next'
+
+
+def _generate_vdom(rng, interfaces, policies, addresses, address_groups, services, routes, vips):
+    address_names = ['all']
+    yield 'config firewall address'
+    yield '    edit "all"'
+    yield '        set uuid 2a3b4c5d-0000-51ee-0000-000000000001'
+    yield '    next'
+    for i in range(addresses):
+        name = f'ADDR-{i}'
+        address_names.append(name)
+        yield f'    edit "{name}"'
+        yield f'        set uuid 2a3b4c5d-{i:04x}-51ee-0000-000000000000'
+        kind = rng.random()
+        if kind < 0.8:
+            prefix = rng.choice(tuple(PREFIX_TO_MASK))
+            yield f'        set subnet {_ip(rng)} {PREFIX_TO_MASK[prefix]}'
+        elif kind < 0.9:
+            start = _ip(rng)
+            yield '        set type iprange'
+            yield f'        set start-ip {start}'
+            yield f'        set end-ip {start.rsplit(".", 1)[0]}.255'
+        else:
+            yield '        set type fqdn'
+            yield f'        set fqdn "host{i}.example.com"'
+        yield f'        set comment "address {i}"'
+        yield '    next'
+    yield 'end'
+
+    group_names = []
+    yield 'config firewall addrgrp'
+    for i in range(address_groups):
+        name = f'ADDR-GRP-{i}'
+        group_names.append(name)
+        yield f'    edit "{name}"'
+        yield f'        set uuid 3b4c5d6e-{i:04x}-51ee-0000-000000000000'
+        yield f'        set member {_names(rng.sample(address_names[1:], min(3, addresses)))}'
+        yield '    next'
+    yield 'end'
+
+    service_names = list(PREDEFINED_SERVICES)
+    yield 'config firewall service custom'
+    for i in range(services):
+        name = f'SVC-{i}'
+        service_names.append(name)
+        yield f'    edit "{name}"'
+        yield '        set category "General"'
+        if i % 10 == 9:
+            yield '        set protocol ICMP'
+            yield '        set icmptype 8'
+        else:
+            yield '        set protocol TCP/UDP/SCTP'
+            proto = rng.choice(('tcp', 'udp'))
+            yield f'        set {proto}-portrange {rng.randrange(1024, 65536)} {rng.randrange(1024, 65536)}'
+        yield '        set session-ttl 0'
+        yield '    next'
+    yield 'end'
+    yield 'config firewall service group'
+    for i in range(0, services, 5):
+        yield f'    edit "SVC-GRP-{i // 5}"'
+        yield f'        set member {_names(service_names[len(PREDEFINED_SERVICES) + i:][:5])}'
+        yield '    next'
+    yield 'end'
+
+    yield 'config firewall vip'
+    for i in range(vips):
+        yield f'    edit "VIP-{i}"'
+        yield f'        set extip {_ip(rng, 203)}'
+        yield f'        set mappedip "{_ip(rng)}"'
+        yield f'        set extintf "{rng.choice(interfaces)}"'
+        if i % 2:
+            yield '        set portforward enable'
+            yield f'        set extport {rng.randrange(1024, 65536)}'
+            yield '        set mappedport 443'
+        yield '    next'
+    yield 'end'
+
+    sources = address_names + group_names
+    yield 'config firewall policy'
+    for i in range(policies):
+        src, dst = rng.sample(interfaces, 2) if len(interfaces) > 1 else (interfaces * 2 or ['any', 'any'])
+        yield f'    edit {i + 1}'
+        yield f'        set name "P{i}"'
+        yield f'        set srcintf "{src}"'
+        yield f'        set dstintf "{dst}"'
+        yield f'        set action {"accept" if rng.random() < 0.8 else "deny"}'
+        yield f'        set srcaddr "{rng.choice(sources)}"'
+        if rng.random() < 0.5:
+            yield f'        set dstaddr {_names(rng.sample(sources, 2))}'
+        else:
+            yield f'        set dstaddr "{rng.choice(sources)}"'
+        yield f'        set service "{rng.choice(service_names)}"'
+        yield from (f'        {line}' for line in POLICY_DEFAULTS)
+        if rng.random() < 0.3:
+            yield '        set nat enable'
+        if rng.random() < 0.5:
+            yield f'        set comments "policy {i}"'
+        if rng.random() < 0.1:
+            yield '        set status disable'
+        yield '    next'
+    yield 'end'
+
+    yield 'config router static'
+    for i in range(routes):
+        yield f'    edit {i + 1}'
+        yield f'        set dst {_ip(rng)} 255.255.255.0'
+        yield f'        set gateway {_ip(rng, 172)}'
+        yield f'        set device "{rng.choice(interfaces)}"'
+        yield '        set distance 10'
+        yield '        set priority 1'
+        yield '        set comment ""'
+        yield '    next'
+    yield 'end'
+
+
+## Counts giving config of about given number of lines
+def counts_for_lines(lines, vdoms=0):
+    per_vdom = lines / max(1, vdoms)
+    return {
+        kind: max(1, int(per_vdom * LINE_SHARES[kind] / LINES_PER_OBJECT[kind]))
+        for kind in LINE_SHARES
+    }
+
+
+def generate_fortigate_config_lines(lines, vdoms=0, seed=0):
+    return generate_fortigate_config(vdoms, **counts_for_lines(lines, vdoms), seed=seed)
+
+
+def main(path, lines=100_000, vdoms=0):
+    with open(path, 'w') as file:
+        for line in generate_fortigate_config_lines(int(lines), int(vdoms)):
+            file.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
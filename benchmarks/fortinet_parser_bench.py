@@ -0,0 +1,58 @@
+## Throughput of FortiGate parser on generated full-configuration files
+## and peak memory besides parsed data: parser keeps only stack of open blocks,
+## so peak of parsing file into compact records grows with fw_data, not file size.
+## Run from repository root: python -m benchmarks.fortinet_parser_bench [lines...]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.fortigate_config_generator import generate_fortigate_config_lines
+from data_processing.config_data import ConfigDataTXT
+from data_processing.parsers import ParserFortinet
+
+
+## Best of few runs, single run on busy machine is noisy
+def bench(path, repeat=3, **kwargs):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        parser = ParserFortinet(ConfigDataTXT(path), **kwargs)
+        start = time.perf_counter()
+        parser.run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+
+## Returns tuple(peak traced bytes while parsing, bytes still held by fw_data)
+def memory(path, **kwargs):
+    tracemalloc.start()
+    parser = ParserFortinet(ConfigDataTXT(path), **kwargs)
+    parser.run()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, held
+
+
+def main(sizes=(100_000, 1_000_000)):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            for vdoms in (0, 10):
+                path = os.path.join(tmp_dir, f'fgt_{size}_{vdoms}.conf')
+                lines = 0
+                with open(path, 'w') as file:
+                    for line in generate_fortigate_config_lines(size, vdoms):
+                        file.write(line + '\n')
+                        lines += 1
+                file_mb = os.path.getsize(path) / 1024**2
+                for compact in (False, True):
+                    elapsed = bench(path, compact=compact)
+                    peak, held = memory(path, compact=compact)
+                    print(
+                        f'{lines:>9,} lines {vdoms:>3} VDOMs {file_mb:>6.1f} MB compact={compact!s:<5} '
+                        f'{elapsed:>7.3f} s {lines / elapsed:>11,.0f} lines/sec  '
+                        f'peak {peak / 1024**2:>7.1f} MB, fw_data {held / 1024**2:>7.1f} MB'
+                    )
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (100_000, 1_000_000))
@@ -0,0 +1,110 @@
+## Expansion of all address-groups of config with 20k address objects,
+## with flat groups and with nested groups (groups of groups, some in cycles):
+## first expansion,
+## invalidation of one group and re-expansion, and naive expansion which
+## walks members of every group again without cache.
+## Run from repository root: python -m benchmarks.groups_bench [objects]
+import random
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config
+from data_processing.config_data import ConfigDataList
+from data_processing.groups import address_resolver
+from data_processing.isip import ipv4_range
+from data_processing.parsers import ParserSrxSets
+
+
+def timed(func, repeat=1):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed, result
+
+
+## Groups in levels: level 0 of objects, next levels of objects and groups
+## of previous levels; first and last group of each level contain each other,
+## which closes cycle
+def nested_groups(objects, groups, levels=5, seed=0):
+    rng = random.Random(seed)
+    per_level = groups // levels
+    lines = []
+    previous = []
+    for level in range(levels):
+        names = [f'GROUP-{level}-{i}' for i in range(per_level)]
+        for i, name in enumerate(names):
+            members = [f'ADDR-{j}' for j in rng.sample(range(objects), 4)]
+            members += rng.sample(previous, min(3, len(previous)))
+            if i in (0, per_level - 1):
+                members.append(names[per_level - 1 - i])
+            lines += [f'set security address-book global address-set {name} address {m}' for m in members]
+        previous = names
+    return lines
+
+
+def naive_intervals(logsys_data, name, visiting=()):
+    groups, addresses = logsys_data['address-groups'], logsys_data['addresses']
+    if name in groups:
+        if name in visiting:
+            return []
+        return [
+            interval for member in groups[name]
+            for interval in naive_intervals(logsys_data, member, visiting + (name,))
+        ]
+    interval = ipv4_range(addresses[name]['address']) if name in addresses else None
+    return [interval] if interval else []
+
+
+def bench_config(logsys_data, title):
+    def expand_all():
+        resolver = address_resolver(logsys_data)
+        resolver.expand_all()
+        return resolver
+
+    groups = logsys_data['address-groups']
+    first_time, resolver = timed(expand_all, repeat=5)
+    intervals = sum(len(resolver.intervals(name)) for name in groups)
+    print(
+        f'{title}: {len(groups):,} groups, {intervals / len(groups):.1f} intervals per group, '
+        f'{len(resolver.cycles)} cycles, {len(resolver.unresolved):,} unresolved objects'
+    )
+    print(f'  expand all groups           {first_time * 1000:>9.1f} ms')
+
+    name = next(iter(groups))
+
+    def change_one():
+        groups[name].append('ADDR-0')
+        resolver.invalidate(name)
+        resolver.expand_all()
+        groups[name].pop()
+        resolver.invalidate(name)
+
+    invalidate_time, _ = timed(change_one, repeat=5)
+    print(f'  change group, expand again  {invalidate_time * 1000:>9.1f} ms  (twice: edit and revert)')
+
+    sample = list(groups)[-100:]
+    naive_time, _ = timed(lambda: [naive_intervals(logsys_data, name) for name in sample])
+    naive_all = naive_time / len(sample) * len(groups)
+    print(f'  naive expansion, no cache   {naive_all * 1000:>9.1f} ms  (estimated from last 100 groups)')
+
+
+def main(objects=20_000):
+    groups = objects // 4
+    lines = list(generate_srx_config(
+        policies=0, addresses=objects, address_sets=groups, applications=0, routes=0, interfaces=0,
+    ))
+
+    def parse(lines):
+        parser = ParserSrxSets(ConfigDataList(lines), compact=True)
+        parser.run()
+        return parser.get_data()[1]['root']
+
+    print(f'{objects:,} address objects')
+    bench_config(parse(lines), 'flat groups of 3 objects')
+    lines = [line for line in lines if 'address-set' not in line]
+    bench_config(parse(lines + nested_groups(objects, groups)), 'groups nested 5 levels deep')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
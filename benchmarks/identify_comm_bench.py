@@ -0,0 +1,75 @@
+## Micro-benchmark of set-style command identification.
+## Run from repository root: python -m benchmarks.identify_comm_bench
+import re
+import time
+from data_processing.parsers import ParserSrxSets
+
+
+## Previous implementation - pattern dict rebuilt and tried one by one per line
+def identify_comm_sequential(comm: str) -> str:
+    comm_type_to_pattern = {
+        'fw rules': '^set (?!groups ).*security policies .* policy .*',
+        'address-groups': '^set (?!groups ).*security .* address-set .*',
+        'addresses': '^set (?!groups ).*security .* address .*',
+        'services': '^set (?!groups ).*applications application .*',
+        'service-groups': '^set (?!groups ).*application-set .* application .*',
+        'static route': '^set (?!groups ).*routing-options static route .*',
+        'interface IPv4': '^set (?!groups ).*interfaces .* unit .* family inet address .*',
+        'intf to Routing Instance': '^set (?!groups ).*routing-instances .* interface .*',
+        'static NAT': '^set (?!groups ).*security nat static rule-set',
+        'hostname': 'set system host-name .*',
+    }
+    result = ''
+    for comm_type in comm_type_to_pattern.keys():
+        pattern = comm_type_to_pattern[comm_type]
+        if re.match(pattern, comm):
+            result = comm_type
+            break
+    return result
+
+
+SAMPLE_LINES = [
+    'set logical-systems LS1 security policies from-zone trust to-zone untrust '
+    'policy allow-http match source-address any',
+    'set security policies from-zone trust to-zone untrust policy allow-http then permit',
+    'set security zones security-zone trust address-book address LAN-HOST1 192.168.1.100/32',
+    'set security address-book global address-set SERVERS address WEB_SERVER',
+    'set applications application MyApp destination-port 12345',
+    'set applications application-set WEB application junos-http',
+    'set routing-options static route 0.0.0.0/0 next-hop 192.168.0.1',
+    'set interfaces ge-0/0/2 unit 0 family inet address 203.0.113.1/24',
+    'set interfaces ge-0/0/2 unit 0 description uplink',
+    'set security nat static rule-set RS-SNATC rule SNATC-HOST1 then static-nat 203.0.113.101',
+    'set groups COMMON security policies from-zone <*> to-zone <*> policy DEFAULT then deny',
+    'set system syslog file messages any any',
+]
+
+
+def bench(func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main(repeat=50_000):
+    lines = SAMPLE_LINES * repeat
+    classifier = ParserSrxSets._classifier
+    new_identify = classifier.comm_type
+
+    assert [identify_comm_sequential(l) for l in SAMPLE_LINES] == \
+        [new_identify(l) for l in SAMPLE_LINES] == \
+        [classifier.classify(l)[0] for l in SAMPLE_LINES]
+
+    before = bench(identify_comm_sequential, lines)
+    after = bench(new_identify, lines)
+    with_key = bench(classifier.classify, lines)
+    print(f'lines:      {len(lines)}')
+    print(f'before:     {before:,.0f} lines/sec')
+    print(f'after:      {after:,.0f} lines/sec')
+    print(f'with key:   {with_key:,.0f} lines/sec (type and key token position)')
+    print(f'speedup:    {after / before:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+## Import time of command-line paths, measured with python -X importtime
+## in new interpreter: total import time and which heavy optional modules
+## were loaded. Exit code is 1 if text-only path loads netmiko.
+## Run from repository root: python -m benchmarks.import_time_bench [repeat]
+import os
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ('netmiko', 'paramiko', 'openpyxl', 'pyarrow', 'numpy')
+
+SCENARIOS = {
+    'import run': 'import run',
+    'txt -> srx_set -> json': (
+        'from run import Generate\n'
+        'generate = Generate()\n'
+        'hostname, fw_data = generate("txt", "srx_set", {{"conf_file": {conf_file!r}}})\n'
+        'generate.write_data_to_file(fw_data, {output!r}, "json")\n'
+    ),
+    'ssh reader': (
+        'from data_processing.registry import config_data_factory\n'
+        'from data_processing.config_data import _connect_handler\n'
+        'config_data_factory("ssh", "192.0.2.1", "user", "passwd", "juniper_junos", connect=False)\n'
+        '_connect_handler()\n'
+    ),
+}
+
+
+## Returns tuple(total import time in seconds, top-level modules imported)
+def import_time(code: str) -> tuple[float, set[str]]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True,
+    )
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        modules.add(name.strip().split('.')[0])
+    return total / 1e6, modules
+
+
+def main(repeat=5):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conf_file = os.path.join(tmp_dir, 'srx.txt')
+        with open(conf_file, 'w') as file:
+            file.write('set system host-name SRX-1\n')
+        output = os.path.join(tmp_dir, 'out.json')
+
+        text_loads_netmiko = False
+        for name, code in SCENARIOS.items():
+            code = code.format(conf_file=conf_file, output=output)
+            ## Best of few runs, first one also warms up file cache:
+            runs = [import_time(code) for _ in range(repeat)]
+            seconds = min(total for total, _ in runs)
+            heavy = [module for module in HEAVY_MODULES if module in runs[0][1]]
+            print(f'{name:<24} {seconds * 1000:>7.1f} ms  heavy modules: {", ".join(heavy) or "-"}')
+            if name != 'ssh reader' and 'netmiko' in heavy:
+                text_loads_netmiko = True
+    if text_loads_netmiko:
+        print('text-only path imports netmiko')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,64 @@
+## Incremental re-parse (ParserSrxSetsIncremental.update) of edited config
+## vs full parse by ParserSrxSets. Edits replace, insert and delete
+## lines at random places; update time should grow with number of
+## edited lines, not with config size.
+## Run from repository root: python -m benchmarks.incremental_bench [lines] [edits...]
+import random
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config_lines
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets, ParserSrxSetsIncremental
+
+
+## Every edit changes last word of one line, inserts copy of line or deletes line.
+## Static NAT lines are not edited, rule without "from zone" line before it
+## is error in parser.
+def edit(lines, edits, seed=0):
+    rng = random.Random(seed)
+    lines = list(lines)
+    for _ in range(edits):
+        i = rng.randrange(len(lines))
+        while 'nat static' in lines[i]:
+            i = rng.randrange(len(lines))
+        kind = rng.random()
+        if kind < 0.5:
+            words = lines[i].split()
+            words[-1] = f'{words[-1]}-{seed}'
+            lines[i] = ' '.join(words)
+        elif kind < 0.75:
+            lines.insert(rng.randrange(len(lines)), lines[i])
+        else:
+            del lines[i]
+    return lines
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(size=1_000_000, edits=(1, 10, 100, 1000)):
+    lines = list(generate_srx_config_lines(size, logical_systems=3))
+    full_time, _ = timed(lambda: ParserSrxSets(ConfigDataList(lines), compact=True).run())
+    parser = ParserSrxSetsIncremental(ConfigDataList(lines), compact=True)
+    first_time, _ = timed(parser.run)
+    print(f'{len(lines):,} lines: full parse {full_time:.2f} s, first incremental run {first_time:.2f} s')
+
+    for count in edits:
+        new_lines = edit(lines, count, seed=count)
+        elapsed, reparsed = timed(lambda: parser.update(ConfigDataList(new_lines)))
+        full = ParserSrxSets(ConfigDataList(new_lines), compact=True)
+        full.run()
+        assert parser.get_data() == full.get_data()
+        lines = new_lines
+        print(
+            f'  {count:>5} edits: update {elapsed * 1000:>8.1f} ms, {reparsed:>6,} lines parsed again, '
+            f'{full_time / elapsed:>6.1f}x faster than full parse'
+        )
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args[:1], *([tuple(args[1:])] if len(args) > 1 else []))
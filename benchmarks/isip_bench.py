@@ -0,0 +1,101 @@
+## Throughput of IPv4 parsing: previous split-based validators,
+## integer parsing without and with warm cache, and NumPy batch.
+## Run from repository root: python -m benchmarks.isip_bench [count]
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config_lines
+from data_processing.isip import (
+    clear_caches, ipv4_range, ipv4_ranges_batch, is_ipv4_with_mask, is_ipv4_without_mask,
+)
+
+
+## Previous validators - split and list of ints for every call
+def previous_is_ipv4_without_mask(ip: str) -> bool:
+    ip = ip.split('.')
+    try:
+        ip = [int(i) for i in ip]
+    except (ValueError, TypeError):
+        return False
+    else:
+        if len(ip) != 4:
+            return False
+        for octet in ip:
+            if not (0 <= octet <= 255):
+                return False
+        return True
+
+
+## Checks if address is IPv4 with mask in /x or y.y.y.y format
+def previous_is_ipv4_with_mask(address: str) -> bool:
+    if '/' in address:
+        ip = address.split('/')[0]
+        mask = address.split('/')[-1]
+        try:
+            mask = int(mask)
+        except (ValueError, TypeError):
+            return False
+        else:
+            if mask > 32:
+                return False
+    elif ' ' in address:
+        ip = address.split()[0]
+        mask = address.split()[-1]
+        mask = mask.split('.')
+        if len(mask) != 4:
+            return False
+        else:
+            try:
+                mask = [int(m) for m in mask]
+            except (ValueError, TypeError):
+                return False
+            else:
+                for i in range(3):
+                    if (
+                        mask[i] < mask[i+1]
+                        or not (0 <= mask[i] <= 255)
+                        or not (0 <= mask[i+1] <= 255)
+                    ):
+                        return False
+    else:
+        return False
+    return previous_is_ipv4_without_mask(ip)
+
+
+## Last words of generated config lines - addresses, networks,
+## ranges and other values, as parser sees them
+def sample(count):
+    return [line.rsplit(' ', 1)[-1] for line in generate_srx_config_lines(count)]
+
+
+## Best of few runs, single run on busy machine is noisy
+def bench(name, func, words, count, repeat=3, before=None):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func(words)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f'{name:<34} {count / elapsed:>14,.0f} per sec')
+
+
+def main(count=1_000_000):
+    words = sample(count)
+    ## Real configs repeat next-hops, NAT and interface addresses:
+    addresses = [word for word in words if word[:1].isdigit()]
+    repeated = [addresses[i % 5_000] for i in range(len(words))]
+    for name, values in (('config words', words), ('5k repeated addresses', repeated)):
+        count = len(values)
+        print(f'\n{name} - values: {count}, distinct: {len(set(values))}')
+        bench('previous is_ipv4_with_mask', lambda w: [previous_is_ipv4_with_mask(x) for x in w], values, count)
+        bench('previous is_ipv4_without_mask', lambda w: [previous_is_ipv4_without_mask(x) for x in w], values, count)
+        bench('is_ipv4_with_mask, cold cache', lambda w: [is_ipv4_with_mask(x) for x in w], values, count, before=clear_caches)
+        bench('is_ipv4_with_mask, warm cache', lambda w: [is_ipv4_with_mask(x) for x in w], values, count)
+        bench('is_ipv4_without_mask, cold cache', lambda w: [is_ipv4_without_mask(x) for x in w], values, count, before=clear_caches)
+        bench('is_ipv4_without_mask, warm cache', lambda w: [is_ipv4_without_mask(x) for x in w], values, count)
+        bench('ipv4_range, cold cache', lambda w: [ipv4_range(x) for x in w], values, count, before=clear_caches)
+        bench('ipv4_range, warm cache', lambda w: [ipv4_range(x) for x in w], values, count)
+        bench('ipv4_ranges_batch', ipv4_ranges_batch, values, count)
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,60 @@
+## Write time and peak memory of JSON writers for one big device.
+## Run from repository root: python -m benchmarks.json_writer_bench [rules]
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.records_memory_bench import generate_config
+from data_processing.config_data import ConfigDataList
+from data_processing.data_writers import writers_factory
+from data_processing.parsers import ParserSrxSets
+from data_processing.records import record_to_dict
+
+
+## Previous writer - json.dump of whole fw_data
+class PreviousWriter():
+    def write(self, path, data):
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=4, default=record_to_dict)
+
+
+def measure(writer, path, fw_data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    writer.write(path, fw_data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+## Time measured without tracemalloc, it slows down pure Python code a lot
+def bench(name, writer, path, fw_data):
+    start = time.perf_counter()
+    writer.write(path, fw_data)
+    elapsed = time.perf_counter() - start
+    _, peak = measure(writer, path, fw_data)
+    size = os.path.getsize(path)
+    print(
+        f'{name:<20} {elapsed:>7.2f} s  peak {peak / 1024**2:>8.1f} MB'
+        f'  file {size / 1024**2:>7.1f} MB'
+    )
+
+
+def main(rules=100_000):
+    parser = ParserSrxSets(ConfigDataList(generate_config(rules)))
+    parser.run()
+    _, fw_data = parser.get_data()
+    print(f'rules: {rules}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'out.json')
+        bench('previous json.dump', PreviousWriter(), path, fw_data)
+        for data_type in ('json', 'json_compact', 'ndjson'):
+            bench(data_type, writers_factory(data_type), path, fw_data)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,44 @@
+## Cost of parse statistics: parser without stats, with stats and with allocations.
+## Run from repository root: python -m benchmarks.parse_stats_bench [lines]
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config_lines
+from data_processing.config_data import ConfigDataList
+from data_processing.parse_stats import ParseStats
+from data_processing.parsers import ParserSrxSets
+
+
+## Best of few runs, single run on busy machine is noisy
+def bench(lines, make_stats, repeat=5):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        parser = ParserSrxSets(ConfigDataList(lines), stats=make_stats())
+        start = time.perf_counter()
+        parser.run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed, parser.get_stats()
+
+
+def main(lines=200_000):
+    config = list(generate_srx_config_lines(lines, logical_systems=3))
+    print(f'lines: {len(config)}')
+    disabled, _ = bench(config, lambda: None)
+    for name, make_stats in (
+        ('disabled', lambda: None),
+        ('stats', ParseStats),
+        ('stats + allocations', lambda: ParseStats(track_allocations=True)),
+    ):
+        elapsed, stats = bench(config, make_stats, repeat=5 if name != 'stats + allocations' else 1)
+        print(f'{name:<22} {elapsed:>7.3f} s  {elapsed / disabled:>5.2f}x')
+
+    print('\nslowest command types:')
+    slowest = sorted(stats.by_comm_type.items(), key=lambda item: item[1].time_ns, reverse=True)
+    for comm_type, counter in slowest[:5]:
+        print(
+            f'{comm_type:<26} {counter.lines:>8} lines {counter.time_ns / 1e9:>7.3f} s '
+            f'{counter.allocated_bytes / 1024**2:>8.1f} MB'
+        )
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
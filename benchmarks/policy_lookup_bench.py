@@ -0,0 +1,130 @@
+## First matching policy for 1M flows against 50k rules (plus global policies),
+## spread over 20 zone pairs and all in one zone pair.
+## Compiled per-zone-pair index (PolicyLookup) single and batched lookups
+## vs linear walk of rules in policy order on sample of flows; memory of index
+## measured with tracemalloc.
+## Run from repository root: python -m benchmarks.policy_lookup_bench [rules] [flows]
+import random
+import re
+import sys
+import time
+import tracemalloc
+from benchmarks.srx_config_generator import generate_srx_config
+from data_processing.config_data import ConfigDataList
+from data_processing.isip import ipv4_range
+from data_processing.parsers import ParserSrxSets
+from data_processing.policy_lookup import PolicyLookup
+
+ZONES = ('trust', 'untrust', 'dmz', 'mgmt', 'vpn')
+ZONE_PAIR = re.compile(r'from-zone \S+ to-zone \S+')
+PORTS = (22, 53, 80, 123, 443)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def parse(policies, one_pair=False):
+    lines = list(generate_srx_config(
+        policies=policies, addresses=policies // 10, address_sets=policies // 100, applications=policies // 100,
+    ))
+    lines += [
+        f'set security policies global policy G{i} {statement}'
+        for i in range(policies // 1000)
+        for statement in (
+            'match source-address any', f'match destination-address ADDR-{i}', 'match application any', 'then deny',
+        )
+    ]
+    if one_pair:
+        lines = [ZONE_PAIR.sub('from-zone trust to-zone untrust', line) for line in lines]
+    parser = ParserSrxSets(ConfigDataList(lines), compact=True)
+    parser.run()
+    return parser.get_data()[1]['root']
+
+
+## Flows to and from addresses of address book, so many of them match some rule
+def flows(logsys_data, count, one_pair=False, seed=0):
+    rng = random.Random(seed)
+    networks = [ipv4_range(address['address']) for address in logsys_data['addresses'].values()]
+    networks = [network for network in networks if network]
+    ports = list(PORTS) + [int(service['destination-port']) for service in logsys_data['services'].values()]
+    result = []
+    for _ in range(count):
+        src_zone, dst_zone = ('trust', 'untrust') if one_pair else rng.sample(ZONES, 2)
+        result.append((
+            src_zone, dst_zone, rng.randint(*rng.choice(networks)), rng.randint(*rng.choice(networks)),
+            rng.choice(('tcp', 'udp')), rng.choice(ports),
+        ))
+    return result
+
+
+## Rules walked one at a time in policy order, intervals checked for every
+## rule; dimension with unresolved names may match any value.
+## Returns tuple(name of rule sure to match or None, names of rules which may) per flow.
+def linear_lookup(lookup, flows):
+    rules = lookup.rules()
+    results = []
+    for src_zone, dst_zone, src_ip, dst_ip, protocol, port in flows:
+        values = (src_ip, dst_ip, (6 if protocol == 'tcp' else 17) << 16 | port)
+        result = None
+        unresolved = []
+        for rule in rules:
+            if not (
+                (src_zone in rule['src_zones'] or 'any' in rule['src_zones'])
+                and (dst_zone in rule['dst_zones'] or 'any' in rule['dst_zones'])
+            ):
+                continue
+            sure = [
+                any(start <= value <= end for start, end in rule[key])
+                for key, value in zip(PolicyLookup.DIMENSIONS, values)
+            ]
+            if all(sure):
+                result = rule['name']
+                break
+            if all(matched or key in rule['unresolved'] for key, matched in zip(PolicyLookup.DIMENSIONS, sure)):
+                unresolved.append(rule['name'])
+        results.append((result, tuple(unresolved)))
+    return results
+
+
+def bench(policies, count, one_pair):
+    parse_time, logsys_data = timed(lambda: parse(policies, one_pair))
+    tracemalloc.start()
+    build_time, lookup = timed(lambda: PolicyLookup(logsys_data))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    ## Built again without tracemalloc, which slows it down:
+    build_time, lookup = timed(lambda: PolicyLookup(logsys_data))
+    print(
+        f'{lookup.rule_count():,} rules in {"one zone pair" if one_pair else "20 zone pairs"}, '
+        f'parsed in {parse_time:.1f} s, compiled in {build_time:.2f} s '
+        f'({memory / 2**20:,.0f} MiB), {len(lookup.unresolved)} names unresolved'
+    )
+    sample = flows(logsys_data, count, one_pair)
+
+    single_time, single = timed(lambda: [lookup.lookup(*flow) for flow in sample])
+    batch_time, batch = timed(lambda: lookup.lookup_batch(sample))
+    assert single == batch
+    matched = sum(result is not None and result.name is not None for result in single)
+    uncertain = sum(result is not None and bool(result.unresolved) for result in single)
+    print(f'  {count:,} flows, {matched:,} matched a rule, {uncertain:,} may match rules with unresolved names')
+    print(f'  single lookups  {single_time:>9.2f} s  {single_time / count * 1e6:>9.2f} us/flow')
+    print(f'  batch lookup    {batch_time:>9.2f} s  {batch_time / count * 1e6:>9.2f} us/flow')
+
+    linear_count = min(count, 200)
+    linear_time, linear = timed(lambda: linear_lookup(lookup, sample[:linear_count]))
+    assert linear == [(result.name, result.unresolved) if result else (None, ()) for result in single[:linear_count]]
+    linear_per_flow = linear_time / linear_count
+    print(f'  linear walk     {linear_per_flow * count:>9.2f} s  {linear_per_flow * 1e6:>9.2f} us/flow (estimated)')
+    print(f'  batch lookup is {linear_per_flow * count / batch_time:,.0f}x faster than linear walk')
+
+
+def main(policies=50_000, count=1_000_000):
+    bench(policies, count, one_pair=False)
+    bench(policies, count, one_pair=True)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
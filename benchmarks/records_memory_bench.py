@@ -0,0 +1,55 @@
+## Memory of parsed data: dicts vs compact records, measured with tracemalloc.
+## Run from repository root: python -m benchmarks.records_memory_bench [rules]
+import gc
+import sys
+import time
+import tracemalloc
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets
+
+
+def generate_config(rules):
+    zones = ['trust', 'untrust', 'dmz', 'mgmt']
+    for i in range(rules):
+        src, dst = zones[i % 4], zones[(i + 1) % 4]
+        prefix = f'set security policies from-zone {src} to-zone {dst} policy P{i}'
+        yield f'{prefix} match source-address ADDR-{i % 2000}'
+        yield f'{prefix} match destination-address ADDR-{(i * 7) % 2000}'
+        yield f'{prefix} match application junos-https'
+        yield f'{prefix} then permit'
+        yield f'{prefix} then log session-close'
+    for i in range(2000):
+        yield f'set security address-book global address ADDR-{i} 10.{i // 256}.{i % 256}.0/24'
+    for i in range(1000):
+        yield f'set routing-options static route 172.{i // 256}.{i % 256}.0/24 next-hop 192.168.0.1'
+
+
+def measure(rules, compact):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    parser = ParserSrxSets(ConfigDataList(generate_config(rules)), compact=compact)
+    parser.run()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parser
+    return current, peak, elapsed
+
+
+def main(rules=100_000):
+    print(f'rules: {rules}')
+    results = {}
+    for compact in (False, True):
+        current, peak, elapsed = measure(rules, compact)
+        results[compact] = current
+        name = 'compact records' if compact else 'dicts'
+        print(
+            f'{name:<16} retained {current / 1024**2:>8.1f} MB'
+            f'  peak {peak / 1024**2:>8.1f} MB  parse {elapsed:.2f} s'
+        )
+    print(f'retained memory reduced {results[False] / results[True]:.2f}x')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,85 @@
+## Reverse-reference index of generated set-style config: parse time with
+## and without index, unused objects and blast radius of one address from
+## index, against scan of all rules and groups of fw_data for the same answer.
+## Run from repository root: python -m benchmarks.references_bench [lines]
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config_lines
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets
+from data_processing.references import ReferenceIndex
+
+
+def timed(func, repeat=1):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed, result
+
+
+def parse(lines, references=None):
+    parser = ParserSrxSets(ConfigDataList(lines), compact=True, references=references)
+    parser.run()
+    return parser.get_data()[1], parser.get_references()
+
+
+## Names referenced by rules and groups of logical system
+def scan_unused(logsys_data):
+    used = set()
+    for rule in logsys_data['fw rules'].values():
+        for key in ('src_IP', 'dst_IP', 'services'):
+            used.update(rule[key])
+    for section in ('address-groups', 'service-groups'):
+        for members in logsys_data[section].values():
+            used.update(members)
+    return [
+        name for section in ('addresses', 'address-groups', 'services', 'service-groups')
+        for name in logsys_data[section] if name not in used
+    ]
+
+
+## Rules using address directly or through groups
+def scan_blast_radius(logsys_data, name):
+    names = {name}
+    changed = True
+    while changed:
+        changed = False
+        for group, members in logsys_data['address-groups'].items():
+            if group not in names and names.intersection(members):
+                names.add(group)
+                changed = True
+    return [
+        rule_name for rule_name, rule in logsys_data['fw rules'].items()
+        if names.intersection(rule['src_IP']) or names.intersection(rule['dst_IP'])
+    ]
+
+
+def main(lines=200_000):
+    lines = list(generate_srx_config_lines(lines))
+    ## Only hostname kept of plain parse, so both parse with the same memory in use:
+    plain_time, _ = timed(lambda: parse(lines)[0], repeat=3)
+    indexed_time, (fw_data, references) = timed(lambda: parse(lines, ReferenceIndex()), repeat=3)
+    logsys_data = fw_data['root']
+    print(f'{len(lines):,} lines, {len(logsys_data["fw rules"]):,} rules')
+    print(f'  parse                           {plain_time:>9.3f} s')
+    print(f'  parse with reference index      {indexed_time:>9.3f} s')
+
+    index_time, unused = timed(lambda: references.unused('root'), repeat=5)
+    scan_time, scanned = timed(lambda: scan_unused(logsys_data), repeat=5)
+    assert len(unused) == len(scanned)
+    print(f'  unused objects ({len(unused):,}), index     {index_time * 1000:>9.3f} ms')
+    print(f'  unused objects, scan of fw_data {scan_time * 1000:>9.3f} ms')
+
+    ## Address used by the most groups:
+    name = max(logsys_data['addresses'], key=lambda name: len(references.referrers('root', 'address', name)))
+    index_time, radius = timed(lambda: references.blast_radius('root', 'address', name), repeat=5)
+    scan_time, scanned = timed(lambda: scan_blast_radius(logsys_data, name))
+    assert {ref.name for ref in radius if ref.section == 'fw rules'} == set(scanned)
+    print(f'  blast radius of {name} ({len(radius)} entries), index {index_time * 1000:>9.3f} ms')
+    print(f'  blast radius, scan of fw_data   {scan_time * 1000:>9.3f} ms')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,80 @@
+## Longest prefix match for 1M addresses in routing table of 100k static
+## routes (plus connected routes of interfaces): build of table,
+## single lookups in radix trie, batch lookup with NumPy and linear
+## scan of all routes on sample of addresses.
+## Run from repository root: python -m benchmarks.routing_bench [routes] [addresses]
+import random
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config
+from data_processing.config_data import ConfigDataList
+from data_processing.isip import ipv4_network
+from data_processing.parsers import ParserSrxSets
+from data_processing.routing import routing_tables
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def parse(routes):
+    lines = generate_srx_config(policies=0, addresses=0, applications=0, routes=routes, interfaces=routes // 1000)
+    parser = ParserSrxSets(ConfigDataList(list(lines)), compact=True)
+    parser.run()
+    return parser.get_data()[1]
+
+
+## Routes checked one by one, longest matching prefix wins
+def linear_lookup(prefixes, ips):
+    results = []
+    for ip in ips:
+        best = -1
+        for network, mask, length in prefixes:
+            if ip & mask == network and length > best:
+                best = length
+        results.append(best)
+    return results
+
+
+def prefix_length(table, entry):
+    return int(table.entry(entry)[0].destination.partition('/')[2]) if entry >= 0 else -1
+
+
+def main(routes=100_000, count=1_000_000):
+    parse_time, fw_data = timed(lambda: parse(routes))
+    build_time, tables = timed(lambda: routing_tables(fw_data))
+    table = tables[('root', 'master')]
+    print(
+        f'{len(table.routes()):,} routes in {len(table):,} prefixes parsed in {parse_time:.1f} s, '
+        f'tables built in {build_time:.2f} s'
+    )
+
+    rng = random.Random(0)
+    ## Half of addresses in 10/8, where generated routes are:
+    ips = [rng.getrandbits(32) if rng.random() < 0.5 else 0x0A000000 | rng.getrandbits(24) for _ in range(count)]
+    single_time, single = timed(lambda: [table.lookup_entry(ip) for ip in ips])
+    ## First batch lookup flattens trie to ranges:
+    flatten_time, _ = timed(lambda: table.lookup_batch(ips[:1]))
+    batch_time, batch = timed(lambda: table.lookup_batch(ips))
+    assert batch.tolist() == single
+    matched = sum(entry >= 0 for entry in single)
+    print(f'  {count:,} addresses, {matched:,} have route; trie flattened in {flatten_time * 1000:.0f} ms')
+    print(f'  single lookups  {single_time:>9.2f} s  {single_time / count * 1e9:>9.0f} ns/address')
+    print(f'  batch lookup    {batch_time:>9.2f} s  {batch_time / count * 1e9:>9.0f} ns/address')
+
+    prefixes = []
+    for route in table.routes():
+        network, mask = ipv4_network(route.destination)
+        prefixes.append((network, mask, mask.bit_count()))
+    linear_count = min(count, 100)
+    linear_time, linear = timed(lambda: linear_lookup(prefixes, ips[:linear_count]))
+    assert linear == [prefix_length(table, entry) for entry in single[:linear_count]]
+    linear_per_address = linear_time / linear_count
+    print(f'  linear scan     {linear_per_address * count:>9.2f} s  {linear_per_address * 1e9:>9.0f} ns/address (estimated)')
+    print(f'  batch lookup is {linear_per_address * count / batch_time:,.0f}x faster than linear scan')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,86 @@
+## Shadowing, redundancy and correlation analysis of 10k and 50k rules
+## in one zone pair. 2% of policies are copied right after the original
+## (redundant), 1% with opposite action (shadowed). Compares vectorized
+## analysis with pairwise check in pure Python, estimated on sample of rules.
+## Run from repository root: python -m benchmarks.shadowing_bench [rules...]
+import random
+import re
+import sys
+import time
+from benchmarks.srx_config_generator import generate_srx_config
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets
+from data_processing.policy_lookup import compile_rules
+from data_processing.shadowing import DIMENSIONS, analyze, summarize
+
+ZONES = re.compile(r'from-zone \S+ to-zone \S+')
+POLICY = re.compile(r' policy P(\d+) ')
+ACTION = re.compile(r' then (permit|deny)$')
+OPPOSITE = {'permit': 'deny', 'deny': 'permit'}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def parse(policies, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    copies = {}
+    for line in generate_srx_config(
+        policies=policies, addresses=policies // 5, address_sets=policies // 50,
+        applications=policies // 100, seed=seed,
+    ):
+        line = ZONES.sub('from-zone trust to-zone untrust', line)
+        lines.append(line)
+        match = POLICY.search(line)
+        if match:
+            number = int(match[1])
+            if number not in copies:
+                kind = rng.random()
+                copies[number] = 'same' if kind < 0.02 else 'opposite' if kind < 0.03 else None
+            if copies[number] == 'same':
+                lines.append(line.replace(f' policy P{number} ', f' policy C{number} '))
+            elif copies[number] == 'opposite':
+                line = line.replace(f' policy P{number} ', f' policy C{number} ')
+                lines.append(ACTION.sub(lambda m: ' then ' + OPPOSITE[m[1]], line))
+    parser = ParserSrxSets(ConfigDataList(lines), compact=True)
+    parser.run()
+    return parser.get_data()[1]['root']
+
+
+## Every rule against every earlier rule
+def naive_analysis(rules, later_rules):
+    findings = 0
+    for j in later_rules:
+        for i in range(j):
+            earlier, later = rules[i], rules[j]
+            if all(earlier[d].covers(later[d]) for d in DIMENSIONS):
+                findings += 1
+                break
+            if earlier['action'] != later['action'] and all(earlier[d].intersects(later[d]) for d in DIMENSIONS):
+                findings += 1
+    return findings
+
+
+def main(*sizes):
+    for size in sizes or (10_000, 50_000):
+        logsys_data = parse(size)
+        compile_time, rules = timed(lambda: compile_rules(logsys_data))
+        analyze_time, findings = timed(lambda: analyze(logsys_data))
+        counts = summarize(findings).get(('trust', 'untrust'), {})
+        print(f'{len(rules):,} rules in one zone pair: ' + ', '.join(f'{n:,} {kind}' for kind, n in counts.items()))
+        print(f'  compile rules (groups to intervals)  {compile_time:>8.2f} s')
+        print(f'  vectorized analysis (with compile)   {analyze_time:>8.2f} s')
+        sample = random.Random(0).sample(range(len(rules)), 20)
+        naive_time, _ = timed(lambda: naive_analysis(rules, sample))
+        ## Rule j is compared with j earlier rules, j / (n / 2) of average:
+        naive_all = naive_time / sum(sample) * len(rules) * (len(rules) - 1) / 2
+        print(f'  pairwise pure Python                 {naive_all:>8.2f} s  (estimated from 20 rules)')
+        print(f'  vectorized analysis is {naive_all / analyze_time:,.0f}x faster')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,73 @@
+## Ingest of many devices into SQLite store and common lookups.
+## Run from repository root: python -m benchmarks.sqlite_writer_bench [devices] [rules]
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from benchmarks.records_memory_bench import generate_config
+from data_processing.config_data import ConfigDataList
+from data_processing.data_writers import writers_factory
+from data_processing.isip import ipv4_range
+from data_processing.parsers import ParserSrxSets
+
+## Fleet-wide lookups join from devices, see DataWriterSqlite
+LOOKUPS = {
+    'rules in zone pair': (
+        'SELECT COUNT(*) FROM devices d JOIN rules r '
+        'ON r.device_id = d.id AND r.src_zone = ? AND r.dst_zone = ?',
+        ('trust', 'untrust'),
+    ),
+    'rules using address': (
+        'SELECT COUNT(DISTINCT m.rule_id) FROM devices d JOIN rule_members m '
+        "ON m.device_id = d.id AND m.field IN ('src_IP', 'dst_IP') AND m.value = ?",
+        ('ADDR-42',),
+    ),
+    'addresses containing IP': (
+        'SELECT COUNT(*) FROM devices d JOIN addresses a '
+        'ON a.device_id = d.id AND a.ip_start <= ? AND a.ip_end >= ?',
+        (ipv4_range('10.3.7.1')[0], ipv4_range('10.3.7.1')[0]),
+    ),
+    ## "which devices permit https to anything in 10.1.0.0/16":
+    'devices permitting to net': (
+        'SELECT COUNT(DISTINCT d.id) FROM devices d '
+        'JOIN addresses a ON a.device_id = d.id AND a.ip_start <= ? AND a.ip_end >= ? '
+        'JOIN rule_members dst ON dst.device_id = d.id '
+        "  AND dst.field = 'dst_IP' AND dst.value = a.name "
+        "JOIN rules r ON r.id = dst.rule_id AND r.term_action = 'permit' "
+        'JOIN rule_members app ON app.rule_id = r.id '
+        "  AND app.field = 'services' AND app.value = 'junos-https'",
+        (ipv4_range('10.1.0.0/16')[1], ipv4_range('10.1.0.0/16')[0]),
+    ),
+}
+
+
+def main(devices=1_000, rules=100):
+    parser = ParserSrxSets(ConfigDataList(generate_config(rules)))
+    parser.run()
+    _, fw_data = parser.get_data()
+    print(f'devices: {devices}, rules per device: {rules}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'fleet.db')
+        start = time.perf_counter()
+        for i in range(devices):
+            writers_factory('sqlite', hostname=f'FW-{i}').write(path, fw_data)
+        elapsed = time.perf_counter() - start
+        print(f'ingest:          {elapsed:>8.2f} s, {devices / elapsed:,.0f} devices/sec')
+
+        start = time.perf_counter()
+        writers_factory('sqlite', hostname=f'FW-{devices // 2}').write(path, fw_data)
+        print(f're-ingest one:   {time.perf_counter() - start:>8.3f} s')
+
+        connection = sqlite3.connect(path)
+        for name, (query, params) in LOOKUPS.items():
+            start = time.perf_counter()
+            result, = connection.execute(query, params).fetchone()
+            elapsed = time.perf_counter() - start
+            print(f'{name:<26} {elapsed * 1000:>8.2f} ms  result {result}')
+        connection.close()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
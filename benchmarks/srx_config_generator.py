@@ -0,0 +1,246 @@
+## Deterministic generator of set-style SRX configs for benchmarks.
+## Same counts and seed always give the same lines.
+## to_hierarchical() renders set commands as hierarchical config ("show configuration").
+## Run from repository root to write file:
+## python -m benchmarks.srx_config_generator <path> [lines] [set|hierarchical]
+import random
+import sys
+
+ZONES = ('trust', 'untrust', 'dmz', 'mgmt', 'vpn')
+PREDEFINED_APPLICATIONS = ('junos-http', 'junos-https', 'junos-ssh', 'junos-dns-udp', 'junos-ntp', 'any')
+INTERFACE_TYPES = ('ge-0/0/', 'xe-1/0/', 'reth')
+
+## Lines generated per object of each kind, used to size config by line count
+LINES_PER_OBJECT = {
+    'policies': 6.1,
+    'addresses': 1,
+    'address_sets': 3,
+    'applications': 3,
+    'routes': 1,
+    'interfaces': 2.5,
+    'static_nats': 2,
+}
+## Share of lines given to each kind
+LINE_SHARES = {
+    'policies': 0.55,
+    'addresses': 0.2,
+    'address_sets': 0.08,
+    'applications': 0.04,
+    'routes': 0.06,
+    'interfaces': 0.04,
+    'static_nats': 0.03,
+}
+
+
+def _ip(rng, first_octet=10):
+    return f'{first_octet}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+
+
+def _prefix(ls):
+    return f'set logical-systems {ls} ' if ls else 'set '
+
+
+## Counts are per logical system, root is always generated,
+## logical_systems is number of additional ones
+def generate_srx_config(
+    logical_systems=0, policies=100, addresses=100, address_sets=10,
+    applications=10, routes=20, interfaces=5, static_nats=5, seed=0,
+):
+    rng = random.Random(seed)
+    yield 'set version 21.4R3.15'
+    yield 'set system host-name SRX-BENCH'
+    yield 'set system syslog file messages any any'
+    for ls in [''] + [f'LS{i}' for i in range(1, logical_systems + 1)]:
+        yield from _generate_logical_system(
+            rng, _prefix(ls), policies, addresses, address_sets,
+            applications, routes, interfaces, static_nats,
+        )
+
+
+def _generate_logical_system(
+    rng, prefix, policies, addresses, address_sets,
+    applications, routes, interfaces, static_nats,
+):
+    address_names = []
+    for i in range(addresses):
+        name = f'ADDR-{i}'
+        address_names.append(name)
+        kind = rng.random()
+        if kind < 0.6:
+            book = f'security zones security-zone {rng.choice(ZONES)} address-book'
+            address = f'{_ip(rng)}/{rng.choice((24, 28, 32))}'
+        elif kind < 0.8:
+            book = 'security address-book global'
+            address = f'{_ip(rng)}/{rng.choice((16, 24))}'
+        elif kind < 0.9:
+            book = 'security address-book global'
+            start = _ip(rng)
+            address = f'{start}-{start.rsplit(".", 1)[0]}.255'
+        else:
+            book = 'security address-book global'
+            address = f'host{i}.example.com'
+        yield f'{prefix}{book} address {name} {address}'
+
+    set_names = []
+    for i in range(address_sets):
+        name = f'ADDR-SET-{i}'
+        for member in rng.sample(address_names, min(3, len(address_names))):
+            yield f'{prefix}security address-book global address-set {name} address {member}'
+        set_names.append(name)
+
+    application_names = list(PREDEFINED_APPLICATIONS)
+    for i in range(applications):
+        name = f'APP-{i}'
+        yield f'{prefix}applications application {name} protocol {rng.choice(("tcp", "udp"))}'
+        yield f'{prefix}applications application {name} destination-port {rng.randrange(1024, 65536)}'
+        yield f'{prefix}applications application-set APP-SET-{i // 5} application {name}'
+        application_names.append(name)
+
+    for i in range(interfaces):
+        name = f'{INTERFACE_TYPES[i % len(INTERFACE_TYPES)]}{i}'
+        yield f'{prefix}interfaces {name} unit 0 family inet address {_ip(rng, 172)}/24'
+        yield f'{prefix}interfaces {name} unit 0 description "link {i}"'
+        if i % 2:
+            yield f'{prefix}routing-instances RI-{i % 3} interface {name}.0'
+
+    for i in range(routes):
+        if i % 4:
+            yield f'{prefix}routing-options static route {_ip(rng)}/24 next-hop {_ip(rng, 172)}'
+        else:
+            yield f'{prefix}routing-options static route {_ip(rng)}/24 next-hop st0.{i % 8}'
+
+    sources = address_names + set_names + ['any']
+    for i in range(policies):
+        src, dst = rng.sample(ZONES, 2)
+        policy = f'{prefix}security policies from-zone {src} to-zone {dst} policy P{i}'
+        yield f'{policy} match source-address {rng.choice(sources)}'
+        destinations = rng.sample(sources, 2 if rng.random() < 0.5 else 1)
+        for destination in destinations:
+            yield f'{policy} match destination-address {destination}'
+        yield f'{policy} match application {rng.choice(application_names)}'
+        yield f'{policy} then {"permit" if rng.random() < 0.8 else "deny"}'
+        yield f'{policy} then log session-close'
+        if rng.random() < 0.5:
+            yield f'{policy} description "policy {i}"'
+        if rng.random() < 0.1:
+            yield f'deactivate {policy[len("set "):]}'
+
+    yield f'{prefix}security zones security-zone untrust host-inbound-traffic system-services ping'
+    if static_nats:
+        yield f'{prefix}security nat static rule-set RS-1 from zone untrust'
+    for i in range(static_nats):
+        rule = f'{prefix}security nat static rule-set RS-1 rule R{i}'
+        yield f'{rule} match source-address {_ip(rng)}/32'
+        yield f'{rule} then static-nat {_ip(rng, 203)}'
+
+
+## Counts giving config of about given number of lines
+def counts_for_lines(lines, logical_systems=0):
+    per_ls = lines / (logical_systems + 1)
+    return {
+        kind: max(1, int(per_ls * LINE_SHARES[kind] / LINES_PER_OBJECT[kind]))
+        for kind in LINE_SHARES
+    }
+
+
+def generate_srx_config_lines(lines, logical_systems=0, seed=0):
+    return generate_srx_config(logical_systems, **counts_for_lines(lines, logical_systems), seed=seed)
+
+
+## Keywords taking name, together one element of hierarchy (policy P1 { ... }):
+NAMED_KEYWORDS = frozenset((
+    'security-zone', 'policy', 'application-set', 'address-set',
+    'rule-set', 'rule', 'unit', 'file',
+))
+## Keywords starting statement with all remaining words (address X 10.0.0.0/24;):
+LEAF_KEYWORDS = frozenset((
+    'version', 'host-name', 'source-address', 'destination-address', 'description',
+    'protocol', 'destination-port', 'source-port', 'route', 'address', 'interface',
+    'from', 'static-nat', 'any',
+))
+## Leaves rendered as list when repeated (source-address [ a b ];):
+LIST_KEYWORDS = frozenset(('source-address', 'destination-address', 'application'))
+
+
+## Words of set command (without set) split to elements of hierarchy, last is statement;
+## words of deactivate command end with block, not statement
+def _elements(words, block=False):
+    elements = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        rest = len(words) - i
+        if rest == 1 or word in LEAF_KEYWORDS or (
+            word == 'application' and (not elements or elements[-1] != 'applications')
+        ):
+            elements.append(' '.join(words[i:]))
+            break
+        if word == 'from-zone' and rest > 4:
+            elements.append(' '.join(words[i:i + 4]))
+            i += 4
+        elif (word in NAMED_KEYWORDS or word == 'application') and (rest > 2 or block and rest == 2):
+            elements.append(' '.join(words[i:i + 2]))
+            i += 2
+        else:
+            elements.append(word)
+            i += 1
+    return elements
+
+
+## Set and deactivate commands rendered as hierarchical config, 4 spaces indent.
+## Whole config is kept in memory as tree.
+def to_hierarchical(commands):
+    tree = {}
+    inactive = set()
+    for command in commands:
+        keyword, _, rest = command.partition(' ')
+        elements = _elements(rest.split(), keyword == 'deactivate')
+        if keyword == 'deactivate':
+            inactive.add(tuple(elements))
+            continue
+        node = tree
+        for element in elements[:-1]:
+            node = node.setdefault(element, {})
+        node.setdefault(elements[-1], None)
+    yield '## Last commit: 2026-01-01 00:00:00 UTC by admin'
+    yield from _render(tree, (), inactive, '')
+
+
+def _render(tree, path, inactive, indent):
+    lists = {}
+    for element, children in tree.items():
+        keyword, _, value = element.partition(' ')
+        if children is None and keyword in LIST_KEYWORDS and ' ' not in value:
+            lists.setdefault(keyword, []).append(value)
+    rendered_lists = set()
+    for element, children in tree.items():
+        element_path = (*path, element)
+        flag = 'inactive: ' if element_path in inactive else ''
+        keyword = element.partition(' ')[0]
+        if children is None:
+            values = lists.get(keyword, ())
+            if len(values) > 1:
+                if keyword not in rendered_lists:
+                    rendered_lists.add(keyword)
+                    yield f'{indent}{keyword} [ {" ".join(values)} ];'
+            else:
+                yield f'{indent}{flag}{element};'
+        else:
+            yield f'{indent}{flag}{element} {{'
+            yield from _render(children, element_path, inactive, indent + '    ')
+            yield f'{indent}}}'
+
+
+def generate_srx_config_hierarchical_lines(lines, logical_systems=0, seed=0):
+    return to_hierarchical(generate_srx_config_lines(lines, logical_systems, seed))
+
+
+def main(path, lines=100_000, style='set'):
+    generate = generate_srx_config_lines if style == 'set' else generate_srx_config_hierarchical_lines
+    with open(path, 'w') as file:
+        for line in generate(int(lines)):
+            file.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
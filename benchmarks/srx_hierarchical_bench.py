@@ -0,0 +1,76 @@
+## Set-style vs hierarchical SRX input of the same generated config:
+## file size, parse time, and peak memory besides parsed data - hierarchical
+## parser keeps only prefixes of open blocks, so it should not grow with file size.
+## Run from repository root: python -m benchmarks.srx_hierarchical_bench [lines...]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.srx_config_generator import generate_srx_config_lines, to_hierarchical
+from data_processing.config_data import ConfigDataTXT
+from data_processing.parsers import ParserSrxHierarchical, ParserSrxSets, SrxHierarchyTokenizer
+
+
+## Best of few runs, single run on busy machine is noisy
+def bench(func, repeat=3):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+
+def parse(parser_class, path):
+    parser_class(ConfigDataTXT(path), compact=True).run()
+
+
+def tokenize(path):
+    for _ in SrxHierarchyTokenizer().set_commands(ConfigDataTXT(path).get()):
+        pass
+
+
+## Returns peak traced bytes while parsing minus bytes held by parsed data
+def working_memory(parser_class, path):
+    tracemalloc.start()
+    parser = parser_class(ConfigDataTXT(path), compact=True)
+    parser.run()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - held
+
+
+def write(path, lines):
+    count = 0
+    with open(path, 'w') as file:
+        for line in lines:
+            file.write(line + '\n')
+            count += 1
+    return count
+
+
+def main(sizes=(100_000, 1_000_000)):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            set_path = os.path.join(tmp_dir, f'srx_{size}.set')
+            hierarchical_path = os.path.join(tmp_dir, f'srx_{size}.conf')
+            commands = write(set_path, generate_srx_config_lines(size, logical_systems=3))
+            write(hierarchical_path, to_hierarchical(generate_srx_config_lines(size, logical_systems=3)))
+            print(f'{commands:,} set commands')
+            for name, parser_class, path in (
+                ('set-style', ParserSrxSets, set_path),
+                ('hierarchical', ParserSrxHierarchical, hierarchical_path),
+            ):
+                elapsed = bench(lambda: parse(parser_class, path))
+                memory = working_memory(parser_class, path)
+                print(
+                    f'  {name:<13} {os.path.getsize(path) / 1024**2:>7.1f} MB {elapsed:>7.3f} s '
+                    f'{commands / elapsed:>11,.0f} commands/sec  working memory {memory / 1024**2:>5.1f} MB'
+                )
+            elapsed = bench(lambda: tokenize(hierarchical_path))
+            print(f'  {"tokenizer":<13} {"":>10} {elapsed:>7.3f} s {commands / elapsed:>11,.0f} commands/sec')
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (100_000, 1_000_000))
@@ -0,0 +1,97 @@
+## Buffered vs streamed SSH config on simulated slow channel:
+## time to first line given to parser and total time of download + parse.
+## Run from repository root: python -m benchmarks.ssh_stream_bench [lines] [MB/s]
+import sys
+import time
+from unittest.mock import patch
+from data_processing.config_data import ConfigDataSSH
+from data_processing.parsers import ParserSrxSets
+
+COMM = 'show configuration | display set'
+PROMPT = 'user@srx>'
+CHUNK_SIZE = 32 * 1024
+
+
+def generate_config(lines):
+    config = ['set system host-name SRX-BENCH']
+    for i in range(lines - 1):
+        config.append(
+            'set security policies from-zone trust to-zone untrust '
+            f'policy P{i // 4} match source-address ADDR-{i % 3000}'
+        )
+    return '\n'.join(config) + '\n'
+
+
+## Channel receiving data with given speed, like netmiko connection:
+## data arrives in background (SSH transport thread), read_channel
+## returns what arrived so far
+class SlowChannel():
+    def __init__(self, config, bytes_per_sec):
+        self.__data = f'{COMM}\n{config}\n{PROMPT} '
+        self.__bytes_per_sec = bytes_per_sec
+        self.__pos = 0
+        self.__sent = None
+
+    def find_prompt(self):
+        return PROMPT
+
+    def write_channel(self, data):
+        if self.__sent is None:
+            self.__sent = time.perf_counter()
+
+    def read_channel(self):
+        arrived = int((time.perf_counter() - self.__sent) * self.__bytes_per_sec)
+        ## Whole chunks only, as received from transport:
+        arrived = min(len(self.__data), arrived - arrived % CHUNK_SIZE)
+        chunk = self.__data[self.__pos:arrived]
+        self.__pos = max(self.__pos, arrived)
+        return chunk
+
+    def send_command(self, comm, **kwargs):
+        time.sleep(len(self.__data) / self.__bytes_per_sec)
+        return self.__data[len(COMM) + 1:-len(PROMPT) - 1]
+
+    def disconnect(self):
+        pass
+
+
+## Wraps config reader, to note when parser gets first line
+class FirstLineTimer():
+    def __init__(self, conf_data, start):
+        self.conf_data = conf_data
+        self.start = start
+        self.first_line = None
+
+    def get(self):
+        for line in self.conf_data.get():
+            if self.first_line is None:
+                self.first_line = time.perf_counter() - self.start
+            yield line
+
+
+def run(config, bytes_per_sec, stream):
+    channel = SlowChannel(config, bytes_per_sec)
+    with patch('data_processing.config_data.ConnectHandler', return_value=channel):
+        start = time.perf_counter()
+        conf_data = ConfigDataSSH('1.2.3.4', 'user', 'pass', 'juniper_junos', stream=stream)
+        timer = FirstLineTimer(conf_data, start)
+        parser = ParserSrxSets(timer)
+        parser.run()
+        total = time.perf_counter() - start
+    return timer.first_line, total, parser.get_data()
+
+
+def main(lines=200_000, mb_per_sec=5):
+    config = generate_config(lines)
+    bytes_per_sec = mb_per_sec * 1024**2
+    print(f'lines: {lines}, size: {len(config) / 1024**2:.1f} MB, channel: {mb_per_sec} MB/s')
+    results = {}
+    for stream in (False, True):
+        first_line, total, results[stream] = run(config, bytes_per_sec, stream)
+        name = 'streamed' if stream else 'buffered'
+        print(f'{name:<10} first line after {first_line:>7.3f} s   total {total:>7.3f} s')
+    assert results[False] == results[True]
+
+
+if __name__ == '__main__':
+    main(*(float(arg) if i else int(arg) for i, arg in enumerate(sys.argv[1:])))
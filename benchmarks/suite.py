@@ -0,0 +1,245 @@
+## Benchmark suite of parsing pipeline on generated configs of 10k, 100k and 1M lines.
+## Results are saved as JSON and compared with stored baseline - exit code is 1
+## when any case is slower than in baseline by more than threshold.
+## Baseline in benchmarks/baseline.json is committed, update it with
+## --update-baseline on the machine which checks regressions.
+## Run from repository root:
+## python -m benchmarks.suite [--sizes 10000 100000] [--output benchmarks/results.json]
+##     [--baseline benchmarks/baseline.json] [--threshold 0.2] [--update-baseline]
+## Compare saved results with baseline, without running the suite:
+## python -m benchmarks.suite --compare benchmarks/results.json [--threshold 0.2]
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from benchmarks.fortigate_config_generator import generate_fortigate_config_lines
+from benchmarks.srx_config_generator import generate_srx_config_lines, to_hierarchical
+from data_processing.config_data import ConfigDataList, ConfigDataTXT
+from data_processing.data_writers import writers_factory
+from data_processing.isip import (
+    clear_caches, ipv4_range, ipv4_ranges_batch, is_ipv4_with_mask, is_ipv4_without_mask,
+)
+from data_processing.parsers import ParserFortinet, ParserSrxHierarchical, ParserSrxSets
+
+SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+## Results of last run, ignored by git:
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'results.json')
+DEFAULT_THRESHOLD = 0.2
+
+
+## Data shared by cases of one size, prepared outside of timed part
+class Workload():
+    def __init__(self, tmp_dir, lines):
+        self.lines = list(generate_srx_config_lines(lines))
+        self.path = os.path.join(tmp_dir, f'srx_{lines}.txt')
+        with open(self.path, 'w') as file:
+            for line in self.lines:
+                file.write(line + '\n')
+        ## Last word of every line - addresses mixed with other values,
+        ## as validators see them in parser
+        self.words = [line.rsplit(' ', 1)[-1] for line in self.lines]
+        self.json_path = os.path.join(tmp_dir, f'srx_{lines}.json')
+        self.__tmp_dir = tmp_dir
+        self.__size = lines
+        self.__fw_data = None
+        self.__fortigate_path = None
+        self.__hierarchical_path = None
+
+    @property
+    def fw_data(self):
+        if self.__fw_data is None:
+            parser = ParserSrxSets(ConfigDataList(self.lines))
+            parser.run()
+            self.__fw_data = parser.get_data()[1]
+        return self.__fw_data
+
+    ## The same config in hierarchical form
+    @property
+    def hierarchical_path(self):
+        if self.__hierarchical_path is None:
+            self.__hierarchical_path = os.path.join(self.__tmp_dir, f'srx_{self.__size}.conf')
+            with open(self.__hierarchical_path, 'w') as file:
+                for line in to_hierarchical(self.lines):
+                    file.write(line + '\n')
+        return self.__hierarchical_path
+
+    ## FortiGate full-configuration of the same size
+    @property
+    def fortigate_path(self):
+        if self.__fortigate_path is None:
+            self.__fortigate_path = os.path.join(self.__tmp_dir, f'fortigate_{self.__size}.conf')
+            with open(self.__fortigate_path, 'w') as file:
+                for line in generate_fortigate_config_lines(self.__size):
+                    file.write(line + '\n')
+        return self.__fortigate_path
+
+
+def bench_config_txt_get(workload):
+    for _ in ConfigDataTXT(workload.path).get():
+        pass
+
+
+def bench_identify_comm(workload):
+    identify_comm = ParserSrxSets(ConfigDataList([]))._ParserSrxSets__identify_comm
+    for line in workload.lines:
+        identify_comm(line)
+
+
+def bench_parser_run(workload):
+    ParserSrxSets(ConfigDataTXT(workload.path)).run()
+
+
+def bench_hierarchical_parser_run(workload):
+    ParserSrxHierarchical(ConfigDataTXT(workload.hierarchical_path)).run()
+
+
+def bench_fortinet_parser_run(workload):
+    ParserFortinet(ConfigDataTXT(workload.fortigate_path)).run()
+
+
+## Validators and parsers below start with empty cache
+def bench_is_ipv4_with_mask(workload):
+    clear_caches()
+    for word in workload.words:
+        is_ipv4_with_mask(word)
+
+
+def bench_is_ipv4_without_mask(workload):
+    clear_caches()
+    for word in workload.words:
+        is_ipv4_without_mask(word)
+
+
+def bench_ipv4_range(workload):
+    clear_caches()
+    for word in workload.words:
+        ipv4_range(word)
+
+
+def bench_ipv4_ranges_batch(workload):
+    ipv4_ranges_batch(workload.words)
+
+
+def bench_json_write(workload):
+    writers_factory('json').write(workload.json_path, workload.fw_data)
+
+
+CASES = {
+    'ConfigDataTXT.get': bench_config_txt_get,
+    'ParserSrxSets.__identify_comm': bench_identify_comm,
+    'ParserSrxSets.run': bench_parser_run,
+    'ParserSrxHierarchical.run': bench_hierarchical_parser_run,
+    'ParserFortinet.run': bench_fortinet_parser_run,
+    'is_ipv4_with_mask': bench_is_ipv4_with_mask,
+    'is_ipv4_without_mask': bench_is_ipv4_without_mask,
+    'ipv4_range': bench_ipv4_range,
+    'ipv4_ranges_batch': bench_ipv4_ranges_batch,
+    'DataWriterJson.write': bench_json_write,
+}
+
+
+## Best of few runs, single run on busy machine is noisy
+def timed(func, workload, repeat):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(workload)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+
+def run_suite(sizes=SIZES, cases=None, repeat=3):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            workload = Workload(tmp_dir, size)
+            ## Prepared outside of timed part:
+            workload.fw_data
+            workload.hierarchical_path
+            workload.fortigate_path
+            for name, func in CASES.items():
+                if cases and name not in cases:
+                    continue
+                elapsed = timed(func, workload, repeat)
+                results[f'{name}/{size}'] = {
+                    'seconds': elapsed,
+                    'lines_per_sec': len(workload.lines) / elapsed,
+                }
+                print(f'{name:<32} {size:>9,} lines {elapsed:>9.4f} s {len(workload.lines) / elapsed:>14,.0f} lines/sec')
+            del workload
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+## Cases slower than baseline by more than threshold (0.2 - 20%),
+## as list of (case, baseline seconds, current seconds);
+## cases missing in either report are skipped
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    regressions = []
+    for case, result in report['results'].items():
+        if case not in baseline['results']:
+            continue
+        before = baseline['results'][case]['seconds']
+        if result['seconds'] > before * (1 + threshold):
+            regressions.append((case, before, result['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Benchmark suite of parsing pipeline')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    arg_parser.add_argument('--cases', nargs='+', choices=CASES, default=None)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    arg_parser.add_argument('--update-baseline', action='store_true')
+    arg_parser.add_argument('--compare', metavar='RESULTS', default=None, help='saved results compared with baseline')
+    args = arg_parser.parse_args(argv)
+
+    if args.compare is not None:
+        if not os.path.exists(args.baseline):
+            print(f'no baseline in {args.baseline}')
+            return 1
+        with open(args.compare) as file:
+            report = json.load(file)
+        return compare_with_baseline(report, args.baseline, args.threshold)
+
+    report = run_suite(args.sizes, args.cases, args.repeat)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=4)
+    print(f'results saved to {args.output}')
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=4)
+        print(f'baseline saved to {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'no baseline in {args.baseline}, run with --update-baseline to create it')
+        return 0
+    return compare_with_baseline(report, args.baseline, args.threshold)
+
+
+## Prints regressions of report, returns exit code: 1 if there are any
+def compare_with_baseline(report, baseline_path, threshold=DEFAULT_THRESHOLD) -> int:
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    regressions = compare(report, baseline, threshold)
+    for case, before, after in regressions:
+        print(f'REGRESSION {case}: {before:.4f} s -> {after:.4f} s ({after / before - 1:+.0%})')
+    if regressions:
+        return 1
+    print(f'no regressions above {threshold:.0%}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
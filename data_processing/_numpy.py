@@ -0,0 +1,28 @@
+## numpy is optional: isip, routing, policy_lookup and shadowing have numpy
+## paths (batch lookups, vectorized analysis) and import it on first use,
+## never with the package - importing numpy takes longer than parsing of
+## small config.
+##   from data_processing._numpy import np, numpy_available
+##   if not numpy_available(): ... fallback or ImportError
+##   np.searchsorted(...)
+
+
+## Stands for numpy module, imports it on first attribute
+class _LazyNumpy():
+    def __getattr__(self, name):
+        import numpy
+        value = getattr(numpy, name)
+        ## Next access finds it in instance dict, __getattr__ is not called:
+        setattr(self, name, value)
+        return value
+
+
+np = _LazyNumpy()
+
+
+def numpy_available() -> bool:
+    try:
+        import numpy
+    except ImportError:
+        return False
+    return True
@@ -1,13 +1,29 @@
 from abc import ABC, abstractmethod
+import gzip
+import io
+import lzma
+import mmap
+import re
+import time
 import traceback
-from netmiko import ConnectHandler
+from data_processing.registry import config_data_factory
+
+## netmiko is imported on first SSH connection, not with this module:
+## it takes longer to import than parsing of small config
+ConnectHandler = None
+
+
+def _connect_handler():
+    global ConnectHandler
+    if ConnectHandler is None:
+        from netmiko import ConnectHandler
+    return ConnectHandler
 
 ## *args, **kwargs in Classes for the sake of poimorifsm,
 ## not used beside that
 
 
 class ConfigData(ABC):
-    @abstractmethod
     def __init__(self):
         pass
 
@@ -16,21 +32,131 @@ class ConfigData(ABC):
         pass
 
 
+## line_type - type of yielded lines:
+##   'str' - decoded text lines,
+##   'bytes' - raw lines, no decoding,
+##   'memoryview' - slices of memory-mapped file (or of decompressed chunk),
+##      no copy per line; valid as long as they are referenced.
+## Gzip and xz compressed files are detected by magic bytes and
+## decompressed while reading, never to disk.
+## raise_errors - raise OSError of reading the file; by default it is only
+##   printed and parse goes on with lines read so far.
 class ConfigDataTXT(ConfigData):
-    def __init__(self, conf_file, *args, **kwargs):
+    LINE_TYPES = ('str', 'bytes', 'memoryview')
+    COMPRESSED_OPENERS = {
+        b'\x1f\x8b': gzip.open,
+        b'\xfd7zXZ\x00': lzma.open,
+    }
+
+    def __init__(self, conf_file, line_type='str', chunk_size=1024**2, raise_errors=False, *args, **kwargs):
+        if line_type not in self.LINE_TYPES:
+            raise ValueError(f'line_type must be one of {self.LINE_TYPES}, got {line_type!r}')
         self.__conf_file = conf_file
+        self.__line_type = line_type
+        self.__chunk_size = chunk_size
+        self.__raise_errors = raise_errors
 
     def get(self):
         try:
-            with open(self.__conf_file) as file:
-                for line in file:
-                    yield line
+            opener = self.__get_compressed_opener()
+            if opener is None:
+                if self.__line_type == 'memoryview':
+                    yield from self.__get_mmap_views()
+                else:
+                    mode = 'r' if self.__line_type == 'str' else 'rb'
+                    with open(self.__conf_file, mode, buffering=self.__chunk_size) as file:
+                        yield from file
+                return
+
+            ## Decompressor read through big buffer, instead of line by line:
+            with io.BufferedReader(opener(self.__conf_file, 'rb'), self.__chunk_size) as file:
+                match self.__line_type:
+                    case 'str':
+                        yield from io.TextIOWrapper(file)
+                    case 'bytes':
+                        yield from file
+                    case 'memoryview':
+                        yield from self.__get_chunk_views(file)
         except OSError as e:
+            if self.__raise_errors:
+                raise
             traceback.print_exc()
 
+    def __get_compressed_opener(self):
+        with open(self.__conf_file, 'rb') as file:
+            magic = file.read(6)
+        for prefix, opener in self.COMPRESSED_OPENERS.items():
+            if magic.startswith(prefix):
+                return opener
+        return None
+
+    def __get_mmap_views(self):
+        with open(self.__conf_file, 'rb') as file:
+            ## Empty file cannot be mapped:
+            if not file.seek(0, 2):
+                return
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        size = len(mapped)
+        find = mapped.find
+        pos = 0
+        while pos < size:
+            end = find(b'\n', pos) + 1 or size
+            yield view[pos:end]
+            pos = end
+        view.release()
+        try:
+            mapped.close()
+        except BufferError:
+            ## Lines still referenced by consumer, closed when garbage collected
+            pass
+
+    ## Reads decompressed data in big chunks,
+    ## lines are views into the chunk, which ends on line boundary
+    def __get_chunk_views(self, file):
+        rest = b''
+        while chunk := file.read(self.__chunk_size):
+            if rest:
+                chunk = rest + chunk
+            chunk_end = chunk.rfind(b'\n') + 1
+            rest = chunk[chunk_end:]
+            view = memoryview(chunk)
+            find = chunk.find
+            pos = 0
+            while pos < chunk_end:
+                end = find(b'\n', pos) + 1
+                yield view[pos:end]
+                pos = end
+        if rest:
+            yield memoryview(rest)
+
+
+## Lines already in memory, e.g. one shard of a bigger config:
+class ConfigDataList(ConfigData):
+    def __init__(self, lines, *args, **kwargs):
+        self.__lines = lines
+
+    def get(self):
+        for line in self.__lines:
+            yield line
+
 
+## timeout - seconds for connecting and for reading command output,
+##   netmiko defaults if None.
+## connect - fetch config in constructor and only print errors (default),
+##   with False call fetch() yourself, it raises on failure.
+## stream - do not buffer config, get() connects and yields lines
+##   as they arrive from channel, so parsing overlaps with transfer.
 class ConfigDataSSH(ConfigData):
-    def __init__(self, ip, user, passwd, vendor, port=22, *args, **kwargs):
+    STREAM_TIMEOUT = 60
+    STREAM_POLL_INTERVAL = 0.05
+    ## Junos "---(more 45%)---", FortiOS "--More--":
+    PAGER_PATTERN = re.compile(r'-+ ?\(?more[^\n]*?\)? ?-+\s*$', re.IGNORECASE)
+
+    def __init__(
+            self, ip, user, passwd, vendor, port=22,
+            timeout=None, connect=True, stream=False, *args, **kwargs
+    ):
         self.__device = {
             'device_type': vendor,
             'host': ip,
@@ -38,27 +164,90 @@ class ConfigDataSSH(ConfigData):
             'password': passwd,
             'port': port,        
         }
+        self.__timeout = timeout
+        if timeout is not None:
+            self.__device['conn_timeout'] = timeout
 
         self.__get_conf_comms = {
-            'fortinet': 'show full-configuration'
+            'fortinet': 'show full-configuration',
+            'juniper_junos': 'show configuration | display set',
         }
+        self.comm = self.__get_conf_comms.get(vendor)
+        self.__output = []
+        self.__stream = stream
+
+        if connect and not stream:
+            try:
+                self.fetch()
+            except Exception as e:
+                traceback.print_exc()
+
+    def fetch(self):
+        if self.comm is None:
+            raise ValueError(f'No command to get config for device type {self.__device["device_type"]}')
+        send_args = {}
+        if self.__timeout is not None:
+            send_args['read_timeout'] = self.__timeout
 
+        net_connect = _connect_handler()(**self.__device)
         try:
-            net_connect = ConnectHandler(**self.__device)
-            self.comm = self.__get_conf_comms[vendor]
-            self.__output = net_connect.send_command(self.comm)
+            self.__output = net_connect.send_command(self.comm, **send_args)
             self.__output = self.__output.splitlines()
+        finally:
             net_connect.disconnect()
-        except Exception as e:
-            traceback.print_exc()
 
     def get(self):
+        if self.__stream:
+            yield from self.__get_streamed()
+            return
         for line in self.__output:
             yield line
 
-def config_data_factory(data_type, *args, **kwargs):
-    match data_type:
-        case 'ssh':
-            return ConfigDataSSH(*args, **kwargs)
-        case 'txt':
-            return ConfigDataTXT(*args, **kwargs)
+    def __get_streamed(self):
+        if self.comm is None:
+            raise ValueError(f'No command to get config for device type {self.__device["device_type"]}')
+        net_connect = _connect_handler()(**self.__device)
+        try:
+            prompt = net_connect.find_prompt().strip()
+            net_connect.write_channel(self.comm + '\n')
+            yield from self.__split_stream(net_connect, prompt)
+        finally:
+            net_connect.disconnect()
+
+    ## Yields complete lines from channel chunks, without command echo.
+    ## Last, not finished line is kept until rest of it arrives;
+    ## it is pager prompt (answered with space) or device prompt (end of output).
+    ## Lone '\r' returns carriage as on terminal: text before it on the line
+    ## is discarded (pagers erase their prompt so); at end of line it changes
+    ## nothing. '\r' at end of chunk waits for next one, it can be half of '\r\n'.
+    def __split_stream(self, net_connect, prompt: str):
+        timeout = self.__timeout or self.STREAM_TIMEOUT
+        partial = ''
+        echo_skipped = False
+        last_data = time.monotonic()
+        while True:
+            chunk = net_connect.read_channel()
+            if not chunk:
+                if time.monotonic() - last_data > timeout:
+                    raise TimeoutError(f'No data from {self.__device["host"]} for {timeout} s')
+                time.sleep(self.STREAM_POLL_INTERVAL)
+                continue
+            last_data = time.monotonic()
+
+            chunk = (partial + chunk).replace('\r\n', '\n').replace('\x08', '')
+            lines = chunk.split('\n')
+            partial = lines.pop()
+            partial = partial[partial.rfind('\r', 0, len(partial.rstrip('\r'))) + 1:]
+            for line in lines:
+                line = line.rstrip('\r')
+                line = line[line.rfind('\r') + 1:]
+                if not echo_skipped and self.comm in line:
+                    echo_skipped = True
+                    continue
+                yield line
+
+            if self.PAGER_PATTERN.search(partial):
+                partial = self.PAGER_PATTERN.sub('', partial)
+                net_connect.write_channel(' ')
+            elif partial.strip() == prompt:
+                return
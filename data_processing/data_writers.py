@@ -1,5 +1,47 @@
 from abc import ABC, abstractmethod
 import json
+import os
+import re
+import sqlite3
+from data_processing.flatten import iter_tables
+from data_processing.isip import ipv4_range
+from data_processing.records import FwRule, record_to_dict
+from data_processing.registry import writers_factory
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+## openpyxl and pyarrow are imported by writers which need them,
+## they take long to import and most runs write JSON
+Workbook = WriteOnlyCell = Font = None
+pa = pq = None
+
+
+def _import_openpyxl() -> bool:
+    global Workbook, WriteOnlyCell, Font
+    if Workbook is None:
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font
+        except ImportError:
+            Workbook = None
+            return False
+    return True
+
+
+def _import_pyarrow() -> bool:
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            pa = pq = None
+            return False
+    return True
 
 
 class DataWriter(ABC):
@@ -11,17 +53,491 @@ class DataWriter(ABC):
         pass
 
 
+## XLSX workbook, one sheet per section of every logical system.
+## Workbook is write-only: rows are streamed to file as they are added,
+## so sheet is never held in memory. Lists are written as lines of one cell.
+## Text starting like formula (names and descriptions come from config) is
+## written as string cell, so Excel shows it and does not evaluate it.
 class DataWriterExcel(DataWriter):
-    pass
+    SHEET_NAME_LENGTH = 31
+    INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+    FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+    def __init__(self):
+        if not _import_openpyxl():
+            raise ImportError('DataWriterExcel requires openpyxl: pip install openpyxl')
+
+    def write(self, path, data):
+        workbook = Workbook(write_only=True)
+        sheet_names = set()
+        for logsys, section, columns, rows in iter_tables(data):
+            first_row = next(rows, None)
+            if first_row is None:
+                continue
+            sheet = workbook.create_sheet(self.__sheet_name(logsys, section, sheet_names))
+            sheet.freeze_panes = 'A2'
+            sheet.append([self.__header_cell(sheet, column) for column in columns])
+            sheet.append(self.__cells(sheet, first_row))
+            for row in rows:
+                sheet.append(self.__cells(sheet, row))
+        workbook.save(path)
+
+    def __cells(self, sheet, row):
+        cells = ['\n'.join(value) if isinstance(value, list) else value for value in row]
+        for i, value in enumerate(cells):
+            if isinstance(value, str) and value.startswith(self.FORMULA_PREFIXES):
+                cells[i] = self.__text_cell(sheet, value)
+        return cells
+
+    ## openpyxl makes formula of str starting with '=', explicit type keeps text
+    def __text_cell(self, sheet, value):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.data_type = 's'
+        return cell
+
+    def __header_cell(self, sheet, column):
+        cell = WriteOnlyCell(sheet, value=column)
+        cell.font = Font(bold=True)
+        return cell
+
+    ## Excel sheet names: max 31 chars, no []:*?/\, unique ignoring case
+    def __sheet_name(self, logsys, section, used):
+        name = self.INVALID_SHEET_CHARS.sub('_', f'{logsys} {section}')[:self.SHEET_NAME_LENGTH]
+        candidate, i = name, 1
+        while candidate.lower() in used:
+            i += 1
+            suffix = f' ({i})'
+            candidate = name[:self.SHEET_NAME_LENGTH - len(suffix)] + suffix
+        used.add(candidate.lower())
+        return candidate
+
+
+## Encodes one value to compact JSON bytes, with orjson if installed
+class _JsonEncoder():
+    def __init__(self):
+        if orjson is not None:
+            self.encode = self.__encode_orjson
+        else:
+            self.__encoder = json.JSONEncoder(
+                separators=(',', ':'), ensure_ascii=False, default=record_to_dict
+            )
+            self.encode = self.__encode_json
+
+    def __encode_orjson(self, value) -> bytes:
+        return orjson.dumps(value, default=record_to_dict)
+
+    def __encode_json(self, value) -> bytes:
+        return self.__encoder.encode(value).encode()
 
 
+## Pretty output (indent) is written by json.dump, which already encodes
+## in chunks. compact=True writes fw_data one logical system and one
+## section at a time, each rule or object encoded separately by fast
+## encoder - whole output is never in memory.
 class DataWriterJson(DataWriter):
+    ## Sections with sub-categories, e.g. NATs -> static -> rules:
+    NESTED_SECTIONS = ('NATs', 'routes')
+
+    def __init__(self, indent=4, compact=False):
+        self.__indent = indent
+        self.__compact = compact
+        self.__encoder = _JsonEncoder()
+
+    def write(self, path, data):
+        if not self.__compact:
+            with open(path, 'w') as file:
+                json.dump(data, file, indent=self.__indent, default=record_to_dict)
+            return
+        with open(path, 'wb', buffering=1024**2) as file:
+            self.__write_dict(file, data, self.__write_logsys)
+
+    def __write_logsys(self, file, logsys_data, *args):
+        self.__write_dict(file, logsys_data, self.__write_section)
+
+    def __write_section(self, file, section_data, section):
+        if section in self.NESTED_SECTIONS and isinstance(section_data, dict):
+            self.__write_dict(file, section_data, self.__write_entries)
+        else:
+            self.__write_entries(file, section_data)
+
+    def __write_entries(self, file, entries, *args):
+        if isinstance(entries, dict):
+            self.__write_dict(file, entries, self.__write_value)
+        elif isinstance(entries, list):
+            file.write(b'[')
+            for i, value in enumerate(entries):
+                if i:
+                    file.write(b',')
+                file.write(self.__encoder.encode(value))
+            file.write(b']')
+        else:
+            self.__write_value(file, entries)
+
+    def __write_value(self, file, value, *args):
+        file.write(self.__encoder.encode(value))
+
+    ## write_item(file, value, key) writes value of each key
+    def __write_dict(self, file, data, write_item):
+        file.write(b'{')
+        for i, (key, value) in enumerate(data.items()):
+            file.write((b',' if i else b'') + self.__encoder.encode(key) + b':')
+            write_item(file, value, key)
+        file.write(b'}')
+
+
+## Newline delimited JSON, one line per rule, object, route or NAT:
+## {"logical_system", "section", "type", "name", "data"}
+## "type" is sub-category of NATs and routes (e.g. "static"), else null,
+## "name" is null for entries kept in lists (routes).
+class DataWriterNdjson(DataWriter):
+    def __init__(self):
+        self.__encoder = _JsonEncoder()
+
     def write(self, path, data):
-        with open(path, 'w') as file:
-            json.dump(data, file, indent=4)
+        with open(path, 'wb', buffering=1024**2) as file:
+            for record in self.records(data):
+                file.write(self.__encoder.encode(record) + b'\n')
+
+    def records(self, data):
+        for logsys, logsys_data in data.items():
+            for section, section_data in logsys_data.items():
+                if section in DataWriterJson.NESTED_SECTIONS:
+                    for sub_type, entries in section_data.items():
+                        yield from self.__entries(logsys, section, sub_type, entries)
+                else:
+                    yield from self.__entries(logsys, section, None, section_data)
+
+    def __entries(self, logsys, section, sub_type, entries):
+        if isinstance(entries, dict):
+            items = entries.items()
+        else:
+            items = ((None, entry) for entry in entries)
+        for name, entry in items:
+            yield {
+                'logical_system': logsys, 'section': section,
+                'type': sub_type, 'name': name, 'data': entry,
+            }
+
+
+## Columnar tables, one file per section in directory given as path,
+## rows of all logical systems together, with 'hostname' and
+## 'logical_system' columns. Rule fields and group members are list<string>
+## columns, other columns are strings.
+## Rows are converted and written in batches of row_group_size rows.
+class DataWriterColumnar(DataWriter, ABC):
+    FILE_SUFFIX = ''
+    LIST_COLUMNS = frozenset(FwRule._keys) | {'members'}
+
+    def __init__(self, hostname: str = '', row_group_size: int = 64 * 1024):
+        if not _import_pyarrow():
+            raise ImportError(f'{type(self).__name__} requires pyarrow: pip install pyarrow')
+        self._hostname = hostname
+        self._row_group_size = row_group_size
+
+    def write(self, path, data):
+        os.makedirs(path, exist_ok=True)
+        schemas = self.__schemas(data)
+        writers = {}
+        try:
+            for logsys, section, columns, rows in iter_tables(data):
+                schema = schemas[section]
+                if section not in writers:
+                    file_path = os.path.join(path, section_file_name(section) + self.FILE_SUFFIX)
+                    writers[section] = self._open(file_path, schema)
+                for batch in self.__batches(schema, logsys, columns, rows):
+                    self._write_batch(writers[section], batch)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    @abstractmethod
+    def _open(self, file_path, schema):
+        pass
+
+    @abstractmethod
+    def _write_batch(self, writer, batch):
+        pass
+
+    ## Same section can have different columns in each logical system
+    ## (e.g. service attributes), schema has all of them
+    def __schemas(self, data):
+        section_columns = {}
+        for _, section, columns, _ in iter_tables(data):
+            known = section_columns.setdefault(section, {})
+            known.update(dict.fromkeys(columns))
+        schemas = {}
+        for section, columns in section_columns.items():
+            fields = [pa.field('hostname', pa.string()), pa.field('logical_system', pa.string())]
+            for column in columns:
+                column_type = pa.list_(pa.string()) if column in self.LIST_COLUMNS else pa.string()
+                fields.append(pa.field(column, column_type))
+            schemas[section] = pa.schema(fields)
+        return schemas
+
+    def __batches(self, schema, logsys, columns, rows):
+        column_index = {column: i for i, column in enumerate(columns)}
+        batch_rows = []
+        for row in rows:
+            batch_rows.append(row)
+            if len(batch_rows) == self._row_group_size:
+                yield self.__to_batch(schema, logsys, column_index, batch_rows)
+                batch_rows = []
+        if batch_rows:
+            yield self.__to_batch(schema, logsys, column_index, batch_rows)
+
+    def __to_batch(self, schema, logsys, column_index, rows):
+        size = len(rows)
+        arrays = [
+            pa.array([self._hostname] * size, pa.string()),
+            pa.array([logsys] * size, pa.string()),
+        ]
+        for field in list(schema)[2:]:
+            i = column_index.get(field.name)
+            if i is None:
+                arrays.append(pa.nulls(size, field.type))
+                continue
+            values = [row[i] for row in rows]
+            if field.type == pa.string():
+                values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+            arrays.append(pa.array(values, field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class DataWriterParquet(DataWriterColumnar):
+    FILE_SUFFIX = '.parquet'
+
+    def _open(self, file_path, schema):
+        return pq.ParquetWriter(file_path, schema)
+
+    def _write_batch(self, writer, batch):
+        writer.write_batch(batch, row_group_size=self._row_group_size)
+
+
+## Arrow IPC file, uncompressed: read back with memory map, no copy
+class DataWriterArrow(DataWriterColumnar):
+    FILE_SUFFIX = '.arrow'
+
+    def _open(self, file_path, schema):
+        return pa.ipc.new_file(file_path, schema)
+
+    def _write_batch(self, writer, batch):
+        writer.write_batch(batch)
+
+
+## SQLite database shared by many devices, path is database file.
+## Every write() replaces data of one device (hostname) in one transaction,
+## other devices are untouched. Addresses, routes and interfaces have
+## integer IPv4 range columns (ip_start, ip_end) for containment queries;
+## rule_members holds rule addresses, applications and other list fields.
+class DataWriterSqlite(DataWriter):
+    ## All indexes start with device_id - rows of written device go to the end
+    ## of each index, so commit touches few pages however many devices are stored.
+    ## Fleet-wide lookups join from devices table, one index search per device:
+    ## SELECT ... FROM devices d JOIN rules r ON r.device_id = d.id AND r.src_zone = ?
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS devices (
+            id INTEGER PRIMARY KEY, hostname TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS rules (
+            id INTEGER PRIMARY KEY, device_id INTEGER NOT NULL,
+            logical_system TEXT NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL,
+            src_zone TEXT, dst_zone TEXT, term_action TEXT, description TEXT
+        );
+        CREATE INDEX IF NOT EXISTS rules_device ON rules (device_id, logical_system);
+        CREATE INDEX IF NOT EXISTS rules_zones ON rules (device_id, src_zone, dst_zone);
+        CREATE TABLE IF NOT EXISTS rule_members (
+            rule_id INTEGER NOT NULL, device_id INTEGER NOT NULL,
+            field TEXT NOT NULL, value TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS rule_members_value ON rule_members (device_id, field, value);
+        CREATE INDEX IF NOT EXISTS rule_members_rule ON rule_members (rule_id);
+        CREATE TABLE IF NOT EXISTS addresses (
+            device_id INTEGER NOT NULL, logical_system TEXT NOT NULL,
+            name TEXT NOT NULL, type TEXT, address TEXT, ip_start INTEGER, ip_end INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS addresses_name ON addresses (device_id, name);
+        CREATE INDEX IF NOT EXISTS addresses_range ON addresses (device_id, ip_start, ip_end);
+        CREATE TABLE IF NOT EXISTS group_members (
+            device_id INTEGER NOT NULL, logical_system TEXT NOT NULL,
+            kind TEXT NOT NULL, group_name TEXT NOT NULL, member TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS group_members_group ON group_members (device_id, kind, group_name);
+        CREATE INDEX IF NOT EXISTS group_members_member ON group_members (device_id, kind, member);
+        CREATE TABLE IF NOT EXISTS services (
+            device_id INTEGER NOT NULL, logical_system TEXT NOT NULL, name TEXT NOT NULL,
+            protocol TEXT, source_port TEXT, destination_port TEXT, attributes TEXT
+        );
+        CREATE INDEX IF NOT EXISTS services_name ON services (device_id, name);
+        CREATE TABLE IF NOT EXISTS routes (
+            device_id INTEGER NOT NULL, logical_system TEXT NOT NULL, type TEXT NOT NULL,
+            destination TEXT, next_hop_ip TEXT, next_hop_interface TEXT,
+            ip_start INTEGER, ip_end INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS routes_range ON routes (device_id, ip_start, ip_end);
+        CREATE TABLE IF NOT EXISTS interfaces (
+            device_id INTEGER NOT NULL, logical_system TEXT NOT NULL,
+            interface TEXT NOT NULL, unit TEXT NOT NULL, ip TEXT, ip_start INTEGER, ip_end INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS interfaces_range ON interfaces (device_id, ip_start, ip_end);
+        CREATE TABLE IF NOT EXISTS nats (
+            device_id INTEGER NOT NULL, logical_system TEXT NOT NULL, type TEXT NOT NULL,
+            name TEXT NOT NULL, src_zone TEXT, original_ip TEXT, translated_ip TEXT
+        );
+        CREATE INDEX IF NOT EXISTS nats_device ON nats (device_id, logical_system);
+    """
+    DEVICE_TABLES = (
+        'rule_members', 'rules', 'addresses', 'group_members',
+        'services', 'routes', 'interfaces', 'nats',
+    )
+    RULE_MEMBER_FIELDS = ('src_IP', 'dst_IP', 'services', 'src_NAT', 'dst_NAT', 'non_term_action', 'status')
+
+    def __init__(self, hostname: str = ''):
+        self.__hostname = hostname
+
+    def write(self, path, data):
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(self.SCHEMA)
+            with connection:
+                self.__write_device(connection, data)
+            connection.execute('PRAGMA optimize')
+        finally:
+            connection.close()
+
+    def __write_device(self, connection, data):
+        connection.execute(
+            'INSERT INTO devices (hostname) VALUES (?) ON CONFLICT (hostname) DO NOTHING',
+            (self.__hostname,)
+        )
+        device_id, = connection.execute(
+            'SELECT id FROM devices WHERE hostname = ?', (self.__hostname,)
+        ).fetchone()
+        for table in self.DEVICE_TABLES:
+            connection.execute(f'DELETE FROM {table} WHERE device_id = ?', (device_id,))
+
+        ## Rule ids given here, so members can be inserted with executemany too:
+        next_rule_id, = connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM rules').fetchone()
+        rules, members = [], []
+        for logsys, logsys_data in data.items():
+            for position, (name, rule) in enumerate(logsys_data.get('fw rules', {}).items()):
+                rule_id = next_rule_id
+                next_rule_id += 1
+                rules.append((
+                    rule_id, device_id, logsys, position, name,
+                    ' '.join(rule.get('src_zone', ())), ' '.join(rule.get('dst_zone', ())),
+                    ' '.join(rule.get('term_action', ())) or None,
+                    ' '.join(rule.get('description', ())) or None,
+                ))
+                for field in self.RULE_MEMBER_FIELDS:
+                    members.extend((rule_id, device_id, field, value) for value in rule.get(field, ()))
+        connection.executemany('INSERT INTO rules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rules)
+        connection.executemany('INSERT INTO rule_members VALUES (?, ?, ?, ?)', members)
+
+        connection.executemany(
+            'INSERT INTO addresses VALUES (?, ?, ?, ?, ?, ?, ?)', self.__addresses(device_id, data)
+        )
+        connection.executemany(
+            'INSERT INTO group_members VALUES (?, ?, ?, ?, ?)', self.__group_members(device_id, data)
+        )
+        connection.executemany(
+            'INSERT INTO services VALUES (?, ?, ?, ?, ?, ?, ?)', self.__services(device_id, data)
+        )
+        connection.executemany(
+            'INSERT INTO routes VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self.__routes(device_id, data)
+        )
+        connection.executemany(
+            'INSERT INTO interfaces VALUES (?, ?, ?, ?, ?, ?, ?)', self.__interfaces(device_id, data)
+        )
+        connection.executemany(
+            'INSERT INTO nats VALUES (?, ?, ?, ?, ?, ?, ?)', self.__nats(device_id, data)
+        )
+
+    def __addresses(self, device_id, data):
+        for logsys, logsys_data in data.items():
+            for name, address in logsys_data.get('addresses', {}).items():
+                value = address['address']
+                ip_range = ipv4_range(value) or (None, None)
+                if isinstance(value, list):
+                    value = '-'.join(value)
+                yield (device_id, logsys, name, address['type'], value, *ip_range)
+
+    def __group_members(self, device_id, data):
+        for logsys, logsys_data in data.items():
+            for kind in ('address-groups', 'service-groups'):
+                for group_name, group_members in logsys_data.get(kind, {}).items():
+                    for member in group_members:
+                        yield (device_id, logsys, kind, group_name, member)
+
+    def __services(self, device_id, data):
+        for logsys, logsys_data in data.items():
+            for name, service in logsys_data.get('services', {}).items():
+                other = {
+                    key: value for key, value in service.items()
+                    if key not in ('protocol', 'source-port', 'destination-port')
+                }
+                yield (
+                    device_id, logsys, name, service.get('protocol'),
+                    service.get('source-port'), service.get('destination-port'),
+                    json.dumps(other) if other else None,
+                )
+
+    def __routes(self, device_id, data):
+        for logsys, logsys_data in data.items():
+            for route_type, routes in logsys_data.get('routes', {}).items():
+                for route in routes:
+                    destination = route.get('dest IP')
+                    ip_range = ipv4_range(destination) or (None, None)
+                    yield (
+                        device_id, logsys, route_type, destination,
+                        route.get('next hop IP'), route.get('next hop interface'), *ip_range
+                    )
+
+    def __interfaces(self, device_id, data):
+        for logsys, logsys_data in data.items():
+            for interface, units in logsys_data.get('interfaces', {}).items():
+                for unit, unit_data in units.items():
+                    ip = unit_data.get('IP')
+                    ip_range = (ip and ipv4_range(ip)) or (None, None)
+                    yield (device_id, logsys, interface, unit, ip, *ip_range)
+
+    def __nats(self, device_id, data):
+        for logsys, logsys_data in data.items():
+            for nat_type, nats in logsys_data.get('NATs', {}).items():
+                for name, nat in nats.items():
+                    yield (
+                        device_id, logsys, nat_type, name, nat.get('src zone'),
+                        nat.get('orginal IP'), nat.get('NATed IP'),
+                    )
+
+
+def section_file_name(section: str) -> str:
+    return section.replace(' ', '_')
+
+
+## Reads tables written by DataWriterParquet / DataWriterArrow:
+## dict section file name -> pyarrow.Table. Arrow files are memory mapped,
+## so columns are not copied; parquet is memory mapped and decoded.
+def read_columnar(path: str, columns: list[str] | None = None) -> dict:
+    if not _import_pyarrow():
+        raise ImportError('read_columnar requires pyarrow: pip install pyarrow')
+    tables = {}
+    for file_name in sorted(os.listdir(path)):
+        name, suffix = os.path.splitext(file_name)
+        file_path = os.path.join(path, file_name)
+        match suffix:
+            case '.arrow':
+                table = pa.ipc.open_file(pa.memory_map(file_path)).read_all()
+                if columns:
+                    table = table.select(_existing_columns(table.schema, columns))
+                tables[name] = table
+            case '.parquet':
+                selected = columns and _existing_columns(pq.read_schema(file_path), columns)
+                tables[name] = pq.read_table(file_path, columns=selected, memory_map=True)
+    return tables
 
 
-def writers_factory(data_type):
-    match data_type:
-        case 'json':
-            return DataWriterJson()
\ No newline at end of file
+## Not every section has every column, e.g. routes have no 'name'
+def _existing_columns(schema, columns):
+    return [column for column in columns if column in schema.names]
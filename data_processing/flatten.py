@@ -0,0 +1,110 @@
+from collections.abc import Mapping
+from data_processing.records import Record
+
+## Flattens fw_data sections into tables (columns + rows) for tabular writers.
+## Rows are generated lazily, one rule or object at a time.
+## Values are left as parsed: list fields (e.g. src_IP) stay lists,
+## except address ranges, which are joined back to "start-end".
+
+## How entries are kept in each section:
+##   objects - name -> mapping of fields,
+##   groups - name -> list of members,
+##   typed - sub-type -> (name -> mapping) or list of mappings,
+##   units - interface -> unit -> mapping of fields.
+SECTION_LAYOUTS = {
+    'fw rules': 'objects',
+    'NATs': 'typed',
+    'routes': 'typed',
+    'addresses': 'objects',
+    'address-groups': 'groups',
+    'services': 'objects',
+    'service-groups': 'groups',
+    'interfaces': 'units',
+}
+
+
+## Yields tuple(logical system, section, columns, rows iterator)
+def iter_tables(fw_data: dict):
+    for logsys, logsys_data in fw_data.items():
+        for section, section_data in logsys_data.items():
+            columns, rows = flatten_section(section, section_data)
+            yield logsys, section, columns, rows
+
+
+def flatten_section(section: str, section_data) -> tuple[list[str], object]:
+    layout = SECTION_LAYOUTS.get(section)
+    if layout is None:
+        layout = 'groups' if _all_lists(section_data) else 'objects'
+    match layout:
+        case 'objects':
+            return _flatten_objects(section_data)
+        case 'groups':
+            return ['name', 'members'], ((name, list(members)) for name, members in section_data.items())
+        case 'typed':
+            return _flatten_typed(section_data)
+        case 'units':
+            return _flatten_units(section_data)
+
+
+def _all_lists(section_data) -> bool:
+    return all(isinstance(value, list) for value in section_data.values())
+
+
+## Column names of mappings, in order of first appearance
+def _field_names(entries) -> list[str]:
+    fields = {}
+    for entry in entries:
+        for key in entry:
+            fields[key] = None
+    return list(fields)
+
+
+def _field_values(entry: Mapping, fields: list[str]) -> list:
+    ## Record.get() would create empty lists in record:
+    if isinstance(entry, Record):
+        entry = entry.to_dict()
+    values = []
+    for field in fields:
+        value = entry.get(field)
+        if field == 'address' and isinstance(value, list):
+            value = '-'.join(value)
+        values.append(value)
+    return values
+
+
+def _flatten_objects(section_data: dict):
+    fields = _field_names(section_data.values())
+    rows = ((name, *_field_values(entry, fields)) for name, entry in section_data.items())
+    return ['name', *fields], rows
+
+
+def _flatten_typed(section_data: dict):
+    named = any(isinstance(entries, dict) for entries in section_data.values())
+    fields = _field_names(
+        entry
+        for entries in section_data.values()
+        for entry in (entries.values() if isinstance(entries, dict) else entries)
+    )
+
+    def rows():
+        for sub_type, entries in section_data.items():
+            if isinstance(entries, dict):
+                for name, entry in entries.items():
+                    yield (sub_type, name, *_field_values(entry, fields))
+            else:
+                for entry in entries:
+                    prefix = (sub_type, None) if named else (sub_type,)
+                    yield (*prefix, *_field_values(entry, fields))
+
+    columns = ['type', 'name', *fields] if named else ['type', *fields]
+    return columns, rows()
+
+
+def _flatten_units(section_data: dict):
+    fields = _field_names(unit for units in section_data.values() for unit in units.values())
+    rows = (
+        (interface, unit, *_field_values(entry, fields))
+        for interface, units in section_data.items()
+        for unit, entry in units.items()
+    )
+    return ['interface', 'unit', *fields], rows
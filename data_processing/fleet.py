@@ -0,0 +1,76 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, NamedTuple
+from data_processing.config_data import ConfigDataSSH
+from data_processing.parsers import parsers_factory
+
+
+class FleetResult(NamedTuple):
+    device: dict
+    conf_data: ConfigDataSSH | None
+    hostname: str
+    fw_data: dict | None
+    error: Exception | None
+    attempts: int
+
+
+## Collects configs from many devices over SSH in thread pool.
+## Each device is dict of ConfigDataSSH arguments (ip, user, passwd, vendor, port)
+## with optional 'parser' (vendor name for parsers_factory) and 'parser_args'.
+## max_workers - how many devices are connected at once,
+## timeout - per device connect/read timeout in seconds,
+## retries - how many times failed device is tried again,
+##   waiting backoff, 2*backoff, 4*backoff... seconds between attempts.
+class FleetCollector():
+    def __init__(self, max_workers=16, timeout=60, retries=2, backoff=1.0):
+        self.__max_workers = max_workers
+        self.__timeout = timeout
+        self.__retries = retries
+        self.__backoff = backoff
+
+    ## Yields FleetResult for every device as soon as its config arrives,
+    ## config is parsed in calling thread, while other devices are downloaded.
+    ## Failed devices are reported with error, collecting goes on.
+    def collect(self, devices: list[dict]) -> Iterator[FleetResult]:
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            futures = {executor.submit(self.__fetch, device): device for device in devices}
+            for future in as_completed(futures):
+                device = futures[future]
+                conf_data, attempts, error = future.result()
+                if error is not None:
+                    yield FleetResult(device, None, '', None, error, attempts)
+                    continue
+                try:
+                    hostname, fw_data = self.__parse(device, conf_data)
+                except Exception as e:
+                    traceback.print_exc()
+                    yield FleetResult(device, conf_data, '', None, e, attempts)
+                else:
+                    yield FleetResult(device, conf_data, hostname, fw_data, None, attempts)
+
+    ## Runs in worker thread, returns tuple(ConfigDataSSH, attempts, error)
+    def __fetch(self, device: dict):
+        ssh_args = {k: v for k, v in device.items() if k not in ('parser', 'parser_args')}
+        ssh_args.setdefault('timeout', self.__timeout)
+        error = None
+        for attempt in range(self.__retries + 1):
+            if attempt:
+                time.sleep(self.__backoff * 2 ** (attempt - 1))
+            conf_data = ConfigDataSSH(connect=False, **ssh_args)
+            try:
+                conf_data.fetch()
+            except Exception as e:
+                error = e
+            else:
+                return conf_data, attempt + 1, None
+        return None, self.__retries + 1, error
+
+    ## Without parser in device only conf_data is returned
+    def __parse(self, device: dict, conf_data: ConfigDataSSH):
+        vendor = device.get('parser')
+        if vendor is None:
+            return '', None
+        parser = parsers_factory(vendor, conf_data, **device.get('parser_args', {}))
+        parser.run()
+        return parser.get_data()
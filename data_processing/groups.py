@@ -0,0 +1,369 @@
+from array import array
+from bisect import bisect_right
+from typing import NamedTuple
+from data_processing.isip import ipv4_range
+
+## Address-groups and service-groups expanded to objects and integer intervals:
+##   addresses = address_resolver(fw_data['root'])
+##   addresses.intervals('ADDR-SET-1')  -> IntervalSet of IPv4 addresses
+##   addresses.members('ADDR-SET-1')    -> frozenset of object names
+## Groups are expanded once, members before the groups containing them
+## (strongly connected components in topological order), results are cached
+## per group. Groups in a cycle are expanded together, each of them gets
+## members of the whole cycle; cycles are listed in cycles. Members which are
+## not objects nor groups are listed in dangling; objects without
+## intervals (FQDN, unknown application) are listed in unresolved.
+## After change of one group or object, invalidate(name) drops cached results
+## of the name and of groups containing it, other groups are kept.
+## cycles and dangling are complete after expand_all().
+
+ANY_NAMES = frozenset(('any', 'any-ipv4', 'all', 'ALL'))
+ANY_ADDRESS = (0, 0xFFFFFFFF)
+## Service is protocol and destination port as one number, protocol << 16 | port:
+PORTS = 1 << 16
+ANY_SERVICE = (0, 256 * PORTS - 1)
+PROTOCOL_NUMBERS = {'icmp': 1, 'tcp': 6, 'udp': 17, 'gre': 47, 'esp': 50, 'ah': 51, 'sctp': 132}
+PORT_PROTOCOLS = frozenset((6, 17, 132))
+
+## Predefined Junos applications used in policies, as (protocol, destination port)
+JUNOS_APPLICATIONS = {
+    'junos-http': [('tcp', '80')], 'junos-https': [('tcp', '443')],
+    'junos-ssh': [('tcp', '22')], 'junos-telnet': [('tcp', '23')],
+    'junos-ftp': [('tcp', '21')], 'junos-smtp': [('tcp', '25')],
+    'junos-dns-udp': [('udp', '53')], 'junos-dns-tcp': [('tcp', '53')],
+    'junos-ntp': [('udp', '123')], 'junos-syslog': [('udp', '514')],
+    'junos-snmp-agentx': [('tcp', '705')], 'junos-bgp': [('tcp', '179')],
+    'junos-ldap': [('tcp', '389')], 'junos-ping': [('icmp', None)],
+    'junos-icmp-all': [('icmp', None)], 'junos-icmp-ping': [('icmp', None)],
+}
+
+
+## Sorted disjoint integer intervals kept in one array of bounds,
+## [start, end + 1, start, end + 1, ...]; value is inside if odd number
+## of bounds is lower or equal to it. Intervals are inclusive in API.
+class IntervalSet():
+    __slots__ = ('_bounds',)
+
+    def __init__(self, intervals=()):
+        if not isinstance(intervals, (list, tuple)):
+            intervals = list(intervals)
+        if len(intervals) == 1:
+            ((start, end),) = intervals
+            self._bounds = array('Q', (start, end + 1))
+        else:
+            self._bounds = _merge_bounds(sorted((start, end + 1) for start, end in intervals))
+
+    ## Union of many sets, bounds of each are already sorted
+    @classmethod
+    def union_of(cls, sets: list['IntervalSet']) -> 'IntervalSet':
+        if len(sets) == 1:
+            return sets[0]
+        pairs = []
+        for interval_set in sets:
+            bounds = interval_set._bounds
+            pairs += zip(bounds[::2], bounds[1::2])
+        pairs.sort()
+        union = cls.__new__(cls)
+        union._bounds = _merge_bounds(pairs)
+        return union
+
+    def __iter__(self):
+        bounds = self._bounds
+        for i in range(0, len(bounds), 2):
+            yield bounds[i], bounds[i + 1] - 1
+
+    def __len__(self) -> int:
+        return len(self._bounds) // 2
+
+    def __bool__(self) -> bool:
+        return bool(self._bounds)
+
+    def __contains__(self, value: int) -> bool:
+        return bisect_right(self._bounds, value) % 2 == 1
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IntervalSet) and self._bounds == other._bounds
+
+    def __hash__(self) -> int:
+        return hash(self._bounds.tobytes())
+
+    def __or__(self, other: 'IntervalSet') -> 'IntervalSet':
+        return IntervalSet.union_of([self, other])
+
+    def __repr__(self) -> str:
+        return f'IntervalSet({list(self)})'
+
+    ## Lowest and highest value, None for empty set
+    def hull(self) -> tuple[int, int] | None:
+        bounds = self._bounds
+        return (bounds[0], bounds[-1] - 1) if bounds else None
+
+    ## Number of values in all intervals
+    def size(self) -> int:
+        bounds = self._bounds
+        return sum(bounds[i + 1] - bounds[i] for i in range(0, len(bounds), 2))
+
+    ## True if every value of other is in this set
+    def covers(self, other: 'IntervalSet') -> bool:
+        bounds = self._bounds
+        for start, end in other:
+            i = bisect_right(bounds, start)
+            if i % 2 == 0 or end >= bounds[i]:
+                return False
+        return True
+
+    def intersects(self, other: 'IntervalSet') -> bool:
+        bounds = self._bounds
+        for start, end in other:
+            i = bisect_right(bounds, start)
+            if i % 2 == 1 or i < len(bounds) and bounds[i] <= end:
+                return True
+        return False
+
+
+## Sorted (start, end + 1) pairs to flat array of bounds, overlapping
+## and adjacent pairs joined
+def _merge_bounds(pairs) -> array:
+    flat = []
+    last = -1
+    for start, stop in pairs:
+        if start <= last:
+            if stop > last:
+                flat[-1] = last = stop
+        else:
+            flat.append(start)
+            flat.append(stop)
+            last = stop
+    return array('Q', flat)
+
+
+class Expansion(NamedTuple):
+    members: frozenset[str]
+    intervals: IntervalSet
+
+
+class GroupResolver():
+    ## object_intervals(name) -> list of (start, end) or None if object is
+    ## not resolved, is_object(name) -> True if name is defined object
+    def __init__(self, groups: dict, object_intervals, is_object, any_interval: tuple[int, int]):
+        self.__groups = groups
+        self.__object_intervals = object_intervals
+        self.__is_object = is_object
+        self.__any = IntervalSet([any_interval])
+        self.__expanded: dict[str, Expansion] = {}
+        self.__objects: dict[str, IntervalSet] = {}
+        ## Reverse index member -> groups, and members it was built from:
+        self.__parents: dict[str, set[str]] = {}
+        self.__children: dict[str, set[str]] = {}
+        for group in groups:
+            self.__index_members(group)
+        self.cycles: list[list[str]] = []
+        self.dangling: dict[str, list[str]] = {}
+        self.unresolved: set[str] = set()
+
+    def expand_all(self):
+        for group in self.__groups:
+            if group not in self.__expanded:
+                self.__expand(group)
+
+    def expansion(self, name: str) -> Expansion:
+        if name in self.__groups:
+            expansion = self.__expanded.get(name)
+            if expansion is None:
+                self.__expand(name)
+                expansion = self.__expanded[name]
+            return expansion
+        return Expansion(frozenset((name,)), self.__intervals_of_object(name))
+
+    def members(self, name: str) -> frozenset[str]:
+        return self.expansion(name).members
+
+    def intervals(self, name: str) -> IntervalSet:
+        if name in self.__groups:
+            return self.expansion(name).intervals
+        return self.__intervals_of_object(name)
+
+    def union(self, names) -> IntervalSet:
+        return IntervalSet.union_of([self.intervals(name) for name in names])
+
+    ## Drops cached results of name and of every group containing it;
+    ## members of group are read again from groups dict
+    def invalidate(self, name: str):
+        for member in self.__children.pop(name, ()):
+            self.__parents[member].discard(name)
+        if name in self.__groups:
+            self.__index_members(name)
+        self.__objects.pop(name, None)
+        self.unresolved.discard(name)
+        affected = {name}
+        stack = [name]
+        while stack:
+            for parent in self.__parents.get(stack.pop(), ()):
+                if parent not in affected:
+                    affected.add(parent)
+                    stack.append(parent)
+        for group in affected:
+            self.__expanded.pop(group, None)
+            self.dangling.pop(group, None)
+        self.cycles = [cycle for cycle in self.cycles if affected.isdisjoint(cycle)]
+
+    def __index_members(self, group: str):
+        members = set(self.__groups[group])
+        self.__children[group] = members
+        for member in members:
+            self.__parents.setdefault(member, set()).add(group)
+
+    def __intervals_of_object(self, name: str) -> IntervalSet:
+        intervals = self.__objects.get(name)
+        if intervals is None:
+            if name in ANY_NAMES:
+                intervals = self.__any
+            else:
+                values = self.__object_intervals(name)
+                if values is None:
+                    self.unresolved.add(name)
+                intervals = IntervalSet(values or ())
+            self.__objects[name] = intervals
+        return intervals
+
+    ## Iterative Tarjan over groups not expanded yet; components come out
+    ## after all groups they contain, so they are expanded right away
+    def __expand(self, root: str):
+        groups, expanded = self.__groups, self.__expanded
+        ## Group of objects only, no search needed:
+        if all(member not in groups for member in groups[root]):
+            self.__expand_component([root])
+            return
+        index, lowlink = {}, {}
+        stack, on_stack = [], set()
+        work = []
+
+        def visit(group):
+            index[group] = lowlink[group] = len(index)
+            stack.append(group)
+            on_stack.add(group)
+            work.append((group, iter(groups[group])))
+
+        visit(root)
+        while work:
+            group, members = work[-1]
+            for member in members:
+                if member not in groups or member in expanded:
+                    continue
+                if member not in index:
+                    visit(member)
+                    break
+                if member in on_stack:
+                    lowlink[group] = min(lowlink[group], index[member])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[group])
+                if lowlink[group] == index[group]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == group:
+                            break
+                    self.__expand_component(component)
+
+    def __expand_component(self, component: list[str]):
+        groups, expanded = self.__groups, self.__expanded
+        inside = set(component)
+        names = set()
+        intervals = []
+        for group in component:
+            for member in groups[group]:
+                if member in inside:
+                    continue
+                if member in groups:
+                    expansion = expanded[member]
+                    names |= expansion.members
+                    intervals.append(expansion.intervals)
+                    continue
+                names.add(member)
+                if member not in ANY_NAMES and not self.__is_object(member):
+                    self.dangling.setdefault(group, []).append(member)
+                intervals.append(self.__intervals_of_object(member))
+        if len(component) > 1 or component[0] in groups[component[0]]:
+            self.cycles.append(component[::-1])
+        expansion = Expansion(frozenset(names), IntervalSet.union_of(intervals))
+        for group in component:
+            expanded[group] = expansion
+
+
+def address_resolver(logsys_data: dict) -> GroupResolver:
+    addresses = logsys_data.get('addresses', {})
+
+    def object_intervals(name):
+        address = addresses.get(name)
+        value = name if address is None else address.get('address')
+        interval = None if value is None else ipv4_range(value)
+        return None if interval is None else [interval]
+
+    return GroupResolver(
+        logsys_data.get('address-groups', {}), object_intervals,
+        lambda name: name in addresses or ipv4_range(name) is not None, ANY_ADDRESS,
+    )
+
+
+def service_resolver(logsys_data: dict) -> GroupResolver:
+    services = logsys_data.get('services', {})
+
+    def object_intervals(name):
+        service = services.get(name)
+        if service is None:
+            if name not in JUNOS_APPLICATIONS:
+                return None
+            return [service_interval(protocol, port) for protocol, port in JUNOS_APPLICATIONS[name]]
+        return service_intervals(service)
+
+    return GroupResolver(
+        logsys_data.get('service-groups', {}), object_intervals,
+        lambda name: name in services or name.startswith('junos-'), ANY_SERVICE,
+    )
+
+
+## Intervals of service object, None if protocol or port is not known
+def service_intervals(service) -> list[tuple[int, int]] | None:
+    intervals = []
+    for protocol in (service.get('protocol') or '').split():
+        ## FortiGate keeps ports per protocol, "destination[:source]":
+        ports = service.get(f'{protocol}-portrange')
+        if ports is not None:
+            ports = [port.partition(':')[0] for port in ports.split()]
+        else:
+            ports = (service.get('destination-port') or '').split() or [None]
+        for port in ports:
+            interval = service_interval(protocol, port)
+            if interval is None:
+                return None
+            intervals.append(interval)
+    return intervals or None
+
+
+## (protocol, "low[-high]" port) -> interval of protocol << 16 | port,
+## None for unknown protocol or port name
+def service_interval(protocol: str, port: str | None) -> tuple[int, int] | None:
+    if protocol in ('0', 'ip', 'any'):
+        return ANY_SERVICE
+    number = protocol_number(protocol)
+    if number is None:
+        return None
+    if port is None or number not in PORT_PROTOCOLS:
+        return number * PORTS, number * PORTS + PORTS - 1
+    low, _, high = port.partition('-')
+    if not low.isdigit() or high and not high.isdigit():
+        return None
+    return number * PORTS + int(low), number * PORTS + int(high or low)
+
+
+def protocol_number(protocol) -> int | None:
+    if isinstance(protocol, int):
+        return protocol
+    if protocol.isdigit():
+        return int(protocol)
+    return PROTOCOL_NUMBERS.get(protocol.lower())
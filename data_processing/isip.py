@@ -1,49 +1,255 @@
+from functools import lru_cache
+from data_processing._numpy import np, numpy_available
+
+
+## IPv4 literals parsed to integers in one pass:
+## address 10.0.0.1 -> 0x0A000001,
+## network 10.0.0.0/8 or 10.0.0.0 255.0.0.0 -> (network, mask),
+## range 10.0.0.1-10.0.0.9 -> (start, end); None if string is not such literal.
+## Results are memoized, configs repeat the same literals many times.
+
+CACHE_SIZE = 64 * 1024
+ADDRESS, NETWORK, RANGE = 'address', 'network', 'range'
+_PREFIX_TO_MASK = tuple((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF for prefix in range(33))
+_MASKS = frozenset(_PREFIX_TO_MASK)
+
+
+## Returns tuple(kind, first, second): (ADDRESS, ip, ip), (NETWORK, network, mask)
+## or (RANGE, start, end); host bits of network are cleared, netmask must be contiguous
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_ipv4(address: str) -> tuple[str, int, int] | None:
+    if not address.isascii():
+        return None
+    if '/' in address:
+        ip, _, prefix = address.partition('/')
+        if not (prefix.isdigit() and len(prefix) <= 2) or int(prefix) > 32:
+            return None
+        mask = _PREFIX_TO_MASK[int(prefix)]
+    elif ' ' in address:
+        ip, _, mask = address.partition(' ')
+        mask = _parse_ip(mask)
+        if mask not in _MASKS:
+            return None
+    elif '-' in address:
+        start, _, end = address.partition('-')
+        start, end = _parse_ip(start), _parse_ip(end)
+        if start is None or end is None:
+            return None
+        return RANGE, start, end
+    else:
+        ip = _parse_ip(address)
+        return None if ip is None else (ADDRESS, ip, ip)
+    ip = _parse_ip(ip)
+    if ip is None:
+        return None
+    return NETWORK, ip & mask, mask
+
+
+def _parse_ip(ip: str) -> int | None:
+    parts = ip.split('.')
+    if len(parts) != 4:
+        return None
+    a, b, c, d = parts
+    if not (
+        a.isdigit() and b.isdigit() and c.isdigit() and d.isdigit()
+        and len(a) <= 3 and len(b) <= 3 and len(c) <= 3 and len(d) <= 3
+    ):
+        return None
+    a, b, c, d = int(a), int(b), int(c), int(d)
+    if a > 255 or b > 255 or c > 255 or d > 255:
+        return None
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+## Functions below reject most of not-address values with cheap checks
+## before cache, so they do not push addresses out of it
+
+def ipv4_to_int(ip: str) -> int | None:
+    if ip.count('.') != 3:
+        return None
+    parsed = parse_ipv4(ip)
+    if parsed is None or parsed[0] != ADDRESS:
+        return None
+    return parsed[1]
+
+
+## Integer of address given as string or integer, for lookups;
+## ValueError if not IPv4 address
+def ip_to_int(ip) -> int:
+    if isinstance(ip, int):
+        return ip
+    value = ipv4_to_int(ip)
+    if value is None:
+        raise ValueError(f'Not IPv4 address {ip!r}')
+    return value
+
+
+def int_to_ipv4(value: int) -> str:
+    return f'{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}'
+
+
+## Network with /x prefix or y.y.y.y netmask -> (network, mask)
+def ipv4_network(address: str) -> tuple[int, int] | None:
+    if '/' not in address and ' ' not in address:
+        return None
+    parsed = parse_ipv4(address)
+    if parsed is None or parsed[0] != NETWORK:
+        return None
+    return parsed[1], parsed[2]
+
+
+## Integer address range (first, last) of IPv4 address, network,
+## range string start-end or range list [start, end]; None if not IPv4
+def ipv4_range(address) -> tuple[int, int] | None:
+    if isinstance(address, (list, tuple)):
+        if len(address) != 2:
+            return None
+        start, end = ipv4_to_int(address[0]), ipv4_to_int(address[1])
+        if start is None or end is None:
+            return None
+        return start, end
+    if address.count('.') < 3:
+        return None
+    parsed = parse_ipv4(address)
+    if parsed is None:
+        return None
+    kind, first, second = parsed
+    if kind == NETWORK:
+        return first, first | (~second & 0xFFFFFFFF)
+    return first, second
+
+
+def clear_caches():
+    parse_ipv4.cache_clear()
+
+
 def is_ipv4_without_mask(ip: str) -> bool:
-    ip = ip.split('.')
-    try:
-        ip = [int(i) for i in ip]
-    except (ValueError, TypeError):
+    if ip.count('.') != 3:
         return False
-    else:
-        if len(ip) != 4:
-            return False
-        for octet in ip:
-            if not (0 <= octet <= 255):
-                return False
-        return True
-        
+    parsed = parse_ipv4(ip)
+    return parsed is not None and parsed[0] == ADDRESS
+
+
 ## Checks if address is IPv4 with mask in /x or y.y.y.y format
 def is_ipv4_with_mask(address: str) -> bool:
-    if '/' in address:
-        ip = address.split('/')[0]
-        mask = address.split('/')[-1]
-        try:
-            mask = int(mask)
-        except (ValueError, TypeError):
-            return False
-        else:
-            if mask > 32:
-                return False
-    elif ' ' in address:
-        ip = address.split()[0]
-        mask = address.split()[-1]
-        mask = mask.split('.')
-        if len(mask) != 4:
-            return False
-        else:
-            try:
-                mask = [int(m) for m in mask]
-            except (ValueError, TypeError):
-                return False
-            else:
-                for i in range(3):
-                    if (
-                        mask[i] < mask[i+1]
-                        or not (0 <= mask[i] <= 255)
-                        or not (0 <= mask[i+1] <= 255)
-                    ):
-                        return False
-    else:
+    if '/' not in address and ' ' not in address:
         return False
-    return is_ipv4_without_mask(ip)
+    parsed = parse_ipv4(address)
+    return parsed is not None and parsed[0] == NETWORK
+
+
+## Batch version of ipv4_range for many strings, parsed with NumPy
+## for all strings at once; addresses can be list of str or bytes array.
+## Returns tuple(valid, start, end) of arrays: bool, uint32, uint32;
+## invalid strings have start = end = 0
+def ipv4_ranges_batch(addresses) -> tuple:
+    if not numpy_available():
+        raise ImportError('ipv4_ranges_batch requires numpy: pip install numpy')
+    chars = _to_char_matrix(addresses)
+    valid = np.zeros(len(chars), dtype=bool)
+    start = np.zeros(len(chars), dtype=np.uint32)
+    end = np.zeros(len(chars), dtype=np.uint32)
+    ## Chunks keep temporary matrices in CPU cache:
+    for first in range(0, len(chars), BATCH_CHUNK):
+        chunk = slice(first, first + BATCH_CHUNK)
+        valid[chunk], start[chunk], end[chunk] = _parse_char_matrix(chars[chunk])
+    return valid, start, end
+
+
+BATCH_CHUNK = 4 * 1024
+
+
+def _parse_char_matrix(chars) -> tuple:
+    count = len(chars)
+    ## Longest literal "255.255.255.255 255.255.255.255" has 31 characters:
+    valid = (chars[:, _MAX_LENGTH] == 0) & (chars[:, 0] != 0)
+    ## Columns after longest string in chunk are not parsed,
+    ## one zero column is left, so every string ends with zero:
+    used = np.flatnonzero(chars.any(axis=0))
+    width = min(used[-1] + 2 if len(used) else 1, _MAX_LENGTH + 1)
+    chars = chars[:, :width]
+    is_digit = (chars >= 48) & (chars <= 57)
+    is_end = chars == 0
+    is_separator = (chars == 46) | (chars == 47) | (chars == 32) | (chars == 45)
+    valid &= (is_digit | is_separator | is_end).all(axis=1)
+
+    ## Field closes at separator or at first zero, its number is
+    ## made of 1 to 3 digits before it; closing positions are listed
+    ## row by row, so fields of every row come in order
+    previous_end = np.zeros_like(is_end)
+    previous_end[:, 1:] = is_end[:, :-1]
+    closing = is_separator | (is_end & ~previous_end)
+    field_count = closing.sum(axis=1)
+    rows, columns = np.nonzero(closing)
+    value = np.zeros(len(rows), dtype=np.int64)
+    length = np.zeros(len(rows), dtype=np.int64)
+    in_run = np.ones(len(rows), dtype=bool)
+    for back in (1, 2, 3, 4):
+        column = columns - back
+        in_run &= column >= 0
+        in_run[in_run] = is_digit[rows[in_run], column[in_run]]
+        if back == 4:
+            break
+        value += np.where(in_run, chars[rows, column].astype(np.int64) - 48, 0) * 10 ** (back - 1)
+        length += in_run
+    bad = (length == 0) | in_run
+    valid[rows[bad]] = False
+    valid &= field_count <= 8
+
+    first_of_row = np.concatenate([[0], np.cumsum(field_count)[:-1]])
+    position = np.arange(len(rows)) - first_of_row[rows]
+    keep = valid[rows]
+    rows, position = rows[keep], position[keep]
+    fields = np.zeros((count, 8), dtype=np.int64)
+    separators = np.zeros((count, 8), dtype=np.uint8)
+    fields[rows, position] = value[keep]
+    separators[rows, position] = chars[rows, columns[keep]]
+
+    first = _fields_to_int(fields[:, :4])
+    second = _fields_to_int(fields[:, 4:])
+    valid &= (fields[:, :4] <= 255).all(axis=1)
+    second_valid = (fields[:, 4:] <= 255).all(axis=1)
+
+    def shape(*expected):
+        return (field_count == len(expected)) & (separators[:, :len(expected)] == expected).all(axis=1)
+
+    address = shape(46, 46, 46, 0)
+    prefix = shape(46, 46, 46, 47, 0) & (fields[:, 4] <= 32)
+    netmask = shape(46, 46, 46, 32, 46, 46, 46, 0) & second_valid
+    ip_range = shape(46, 46, 46, 45, 46, 46, 46, 0) & second_valid
+
+    prefix_mask = (0xFFFFFFFF << (32 - np.minimum(fields[:, 4], 32))) & 0xFFFFFFFF
+    mask = np.where(prefix, prefix_mask, np.where(netmask, second, 0xFFFFFFFF))
+    inverted = ~mask & 0xFFFFFFFF
+    ## Contiguous mask: inverted is 2^n - 1
+    netmask &= (inverted & (inverted + 1)) == 0
+
+    valid &= address | prefix | netmask | ip_range
+    start = np.where(ip_range, first, first & mask)
+    end = np.where(ip_range, second, start | inverted)
+    start = np.where(valid, start, 0).astype(np.uint32)
+    end = np.where(valid, end, 0).astype(np.uint32)
+    return valid, start, end
+
+
+_MAX_LENGTH = 31
+
+
+## Strings as (count, 32) matrix of ASCII codes padded with zeros,
+## longer strings are cut - they have no zero in last column
+def _to_char_matrix(addresses):
+    width = _MAX_LENGTH + 1
+    if isinstance(addresses, np.ndarray) and addresses.dtype.kind == 'S':
+        array = addresses.astype(f'S{width}')
+    else:
+        try:
+            array = np.array(addresses, dtype=f'S{width}')
+        except UnicodeEncodeError:
+            ## Non-ASCII characters become '?', which no literal contains:
+            array = np.array([text.encode('ascii', 'replace') for text in addresses], dtype=f'S{width}')
+    array = np.ascontiguousarray(array).reshape(-1)
+    return array.view(np.uint8).reshape(len(array), width)
+
 
+def _fields_to_int(octets):
+    return (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
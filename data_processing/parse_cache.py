@@ -0,0 +1,170 @@
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+from data_processing.config_data import ConfigDataTXT
+from data_processing.registry import parsers_factory
+
+
+## On-disk cache of parser results for text config files.
+## Key is hash of file content + vendor + parser version + parser and reader
+## (ConfigDataTXT) arguments which change output (e.g. compact - records or
+## dicts, line_type), so changed file, new parser version or other output
+## format never returns old data. Arguments equal to defaults hash as if left
+## out; workers and chunk_size do not change output. Parse with stats or references is not cached, as cache hit
+## would leave them empty.
+## Entries above max_size (bytes) are evicted, least recently used first.
+## Cache directory can be shared by processes (run.py batch --cache): entry
+## removed by other process meanwhile is skipped, corrupt entry (e.g. left
+## by killed process) is a miss and is removed.
+class ParseCache():
+    HASH_CHUNK_SIZE = 4 * 1024 * 1024
+    ENTRY_SUFFIX = '.pickle'
+    ## Parser and reader arguments left out of key:
+    SPEED_ARGS = ('workers', 'chunk_size')
+    ## Parser arguments filled by parse, not cached:
+    COLLECTOR_ARGS = ('stats', 'references')
+
+    def __init__(self, cache_dir: str, max_size: int = 1024**3):
+        self.__cache_dir = cache_dir
+        self.__max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+    ## Returns tuple(hostname, fw_data), parses file only on cache miss;
+    ## reader_args - ConfigDataTXT arguments other than conf_file
+    def get_or_parse(
+            self, conf_file: str, vendor: str,
+            parser_args: dict | None = None, reader_args: dict | None = None
+    ):
+        parser_args = parser_args or {}
+        reader_args = reader_args or {}
+        parser = parsers_factory(vendor, ConfigDataTXT(conf_file, **reader_args), **parser_args)
+        if any(parser_args.get(name) is not None for name in self.COLLECTOR_ARGS):
+            parser.run()
+            return parser.get_data()
+        key = self.get_key(
+            conf_file, vendor, parser.version, self.args_hash(type(parser), parser_args, reader_args)
+        )
+
+        result = self.get(key)
+        if result is None:
+            parser.run()
+            result = parser.get_data()
+            self.put(key, result)
+        return result
+
+    def get_key(self, conf_file: str, vendor: str, parser_version: int, args_hash: str = '') -> str:
+        return f'{vendor}-v{parser_version}-{args_hash}{self.hash_file(conf_file)}'
+
+    ## Stable hash of arguments which change output, '' when all are defaults
+    def args_hash(self, parser_class, parser_args: dict, reader_args: dict | None = None) -> str:
+        args = (
+            self.__output_args(parser_class, parser_args),
+            self.__output_args(ConfigDataTXT, reader_args or {}),
+        )
+        if not any(args):
+            return ''
+        if not args[1]:
+            ## Keys of parser arguments only, as before reader arguments were hashed:
+            args = args[0]
+        return hashlib.blake2b(repr(args).encode(), digest_size=8).hexdigest() + '-'
+
+    def __output_args(self, target, args: dict) -> list:
+        defaults = {
+            name: parameter.default
+            for name, parameter in inspect.signature(target).parameters.items()
+        }
+        return sorted(
+            (name, value) for name, value in args.items()
+            if name not in self.SPEED_ARGS and not (name in defaults and defaults[name] == value)
+        )
+
+    def hash_file(self, conf_file: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        buffer = bytearray(self.HASH_CHUNK_SIZE)
+        view = memoryview(buffer)
+        with open(conf_file, 'rb', buffering=0) as file:
+            while size := file.readinto(buffer):
+                digest.update(view[:size])
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        path = self.__entry_path(key)
+        try:
+            with open(path, 'rb') as file:
+                result = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError):
+            self.__unlink(path)
+            return None
+        ## Access time for LRU kept as mtime, atime is often disabled:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def put(self, key: str, result: tuple[str, dict]):
+        fd, tmp_path = tempfile.mkstemp(dir=self.__cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.__entry_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    ## Removes cached result of one file, for all parser versions
+    def invalidate(self, conf_file: str, vendor: str | None = None) -> int:
+        file_hash = self.hash_file(conf_file)
+        removed = 0
+        for entry in self.__entries():
+            name = entry.name[:-len(self.ENTRY_SUFFIX)]
+            if name.endswith(file_hash) and (vendor is None or name.startswith(f'{vendor}-v')):
+                removed += self.__unlink(entry.path)
+        return removed
+
+    def clear(self):
+        for entry in self.__entries():
+            self.__unlink(entry.path)
+
+    def size(self) -> int:
+        return sum(stat.st_size for stat, _ in self.__stats())
+
+    def evict(self):
+        entries = self.__stats()
+        total = sum(stat.st_size for stat, _ in entries)
+        entries.sort(key=lambda entry: entry[0].st_mtime_ns)
+        for stat, path in entries:
+            if total <= self.__max_size:
+                break
+            self.__unlink(path)
+            total -= stat.st_size
+
+    def __entry_path(self, key: str) -> str:
+        return os.path.join(self.__cache_dir, key + self.ENTRY_SUFFIX)
+
+    def __entries(self):
+        with os.scandir(self.__cache_dir) as entries:
+            return [e for e in entries if e.name.endswith(self.ENTRY_SUFFIX)]
+
+    ## List of tuple(stat, path) of entries which still exist
+    def __stats(self) -> list:
+        stats = []
+        for entry in self.__entries():
+            try:
+                stats.append((entry.stat(), entry.path))
+            except FileNotFoundError:
+                continue
+        return stats
+
+    ## False when other process removed entry first
+    def __unlink(self, path: str) -> bool:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return False
+        return True
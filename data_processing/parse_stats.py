@@ -0,0 +1,104 @@
+import json
+import time
+import tracemalloc
+
+## Opt-in parsing statistics, passed to parser as stats=ParseStats().
+## Counts lines, time and (with track_allocations) allocated memory
+## per command type and per logical system.
+## Lines filtered out before identification (without 'set' keyword)
+## are counted in skipped_lines, lines of no known command type
+## in by_comm_type['unmatched'].
+
+
+class Counter():
+    __slots__ = ('lines', 'time_ns', 'allocated_bytes')
+
+    def __init__(self):
+        self.lines = 0
+        self.time_ns = 0
+        self.allocated_bytes = 0
+
+    def add(self, other: 'Counter'):
+        self.lines += other.lines
+        self.time_ns += other.time_ns
+        self.allocated_bytes += other.allocated_bytes
+
+    def to_dict(self) -> dict:
+        return {
+            'lines': self.lines,
+            'time_s': self.time_ns / 1e9,
+            'allocated_bytes': self.allocated_bytes,
+        }
+
+
+class ParseStats():
+    UNMATCHED = 'unmatched'
+
+    ## track_allocations - net bytes allocated while parsing each line,
+    ## measured with tracemalloc, which slows parsing down a few times
+    def __init__(self, track_allocations: bool = False):
+        self.track_allocations = track_allocations
+        self.skipped_lines = 0
+        self.by_comm_type: dict[str, Counter] = {}
+        self.by_logical_system: dict[str, Counter] = {}
+        self.__started_tracemalloc = False
+
+    @property
+    def lines(self) -> int:
+        return self.skipped_lines + sum(c.lines for c in self.by_comm_type.values())
+
+    @property
+    def unmatched_lines(self) -> int:
+        counter = self.by_comm_type.get(self.UNMATCHED)
+        return counter.lines if counter else 0
+
+    ## Called by parser around parsing loop:
+    def start(self):
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracemalloc = True
+
+    def stop(self):
+        if self.__started_tracemalloc:
+            tracemalloc.stop()
+            self.__started_tracemalloc = False
+
+    ## Current time and traced memory, pass to add_line() after parsing line
+    def mark(self) -> tuple[int, int]:
+        memory = tracemalloc.get_traced_memory()[0] if self.track_allocations else 0
+        return time.perf_counter_ns(), memory
+
+    def add_line(self, comm_type: str, logsys: str, mark: tuple[int, int]):
+        now, memory = self.mark()
+        comm_type = comm_type or self.UNMATCHED
+        for counters, key in ((self.by_comm_type, comm_type), (self.by_logical_system, logsys)):
+            counter = counters.get(key)
+            if counter is None:
+                counter = counters[key] = Counter()
+            counter.lines += 1
+            counter.time_ns += now - mark[0]
+            counter.allocated_bytes += memory - mark[1]
+
+    def merge(self, other: 'ParseStats'):
+        self.skipped_lines += other.skipped_lines
+        for counters, other_counters in (
+            (self.by_comm_type, other.by_comm_type),
+            (self.by_logical_system, other.by_logical_system),
+        ):
+            for key, other_counter in other_counters.items():
+                counters.setdefault(key, Counter()).add(other_counter)
+
+    def to_dict(self) -> dict:
+        return {
+            'lines': self.lines,
+            'skipped_lines': self.skipped_lines,
+            'unmatched_lines': self.unmatched_lines,
+            'track_allocations': self.track_allocations,
+            'by_comm_type': {k: c.to_dict() for k, c in self.by_comm_type.items()},
+            'by_logical_system': {k: c.to_dict() for k, c in self.by_logical_system.items()},
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=4)
+
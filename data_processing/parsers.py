@@ -1,16 +1,41 @@
 from copy import deepcopy
-from data_processing.isip import is_ipv4_with_mask, is_ipv4_without_mask
+from data_processing.isip import ipv4_network, is_ipv4_with_mask, is_ipv4_without_mask
+from data_processing.records import (
+    Record, FwRule, Address, Service, Route, InterfaceUnit, StaticNat
+)
 import re
-from data_processing.config_data import ConfigData
+import sys
+from data_processing.config_data import ConfigData, ConfigDataList
+from data_processing.parse_stats import ParseStats
+from data_processing.references import ReferenceIndex
+from data_processing.registry import parsers_factory
 from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 
 class Parser(ABC):
-    def __init__(self, conf_data: ConfigData):
+    ## Bump when parsing changes output, invalidates cached results.
+    ## 2: routing instance of routes and interface units
+    version = 2
+
+    ## compact - rules and objects kept as slotted records
+    ## (data_processing.records) instead of dicts, repeated strings interned
+    ## stats - optional ParseStats filled while parsing, see get_stats()
+    def __init__(
+            self, conf_data: ConfigData,
+            compact: bool = False,
+            stats: ParseStats | None = None
+    ):
         self._conf_data = conf_data
         self._hostname = ''
         self._fw_data = {}
         self._conf_type = ''
+        self._compact = compact
+        self._stats = stats
+        ## str() returns the same object, so no cost without compact:
+        self._intern = sys.intern if compact else str
 
     @abstractmethod
     def run(self):
@@ -36,7 +61,9 @@ class Parser(ABC):
         fw_data_template['NATs'] = nat_cats
         return fw_data_template
     
-    def _fw_rule_data_template(self) -> dict[str, list[str]]:
+    def _fw_rule_data_template(self) -> dict[str, list[str]] | FwRule:
+        if self._compact:
+            return FwRule()
         keys = [
             'src_zone', 'dst_zone', 'src_IP', 
             'dst_IP', 'src_NAT', 'dst_NAT',
@@ -45,59 +72,145 @@ class Parser(ABC):
             'status'
         ]
         return {key:[] for key in keys}
+
+    def _new_record(self, record_class: type[Record]) -> dict | Record:
+        return record_class() if self._compact else {}
     
     def get_data(self):
         return self._hostname, self._fw_data
 
+    def get_stats(self) -> ParseStats | None:
+        return self._stats
+
 
 class ParserSrx(Parser, ABC):
-    def __init__(self, conf_data: ConfigData):
-        super().__init__(conf_data)
+    def __init__(
+            self, conf_data: ConfigData,
+            compact: bool = False,
+            stats: ParseStats | None = None
+    ):
+        super().__init__(conf_data, compact, stats)
         self.__vendor = 'SRX'
     
+## Identifies set-style command type with one compiled regex,
+## instead of trying every pattern one after another.
+## Alternatives are tried in order of comm_type_to_pattern,
+## so the first matching type wins - same as sequential re.match calls.
+## Key token of command type: name of entry (or value for hostname) follows
+## its first occurrence, as parsers read it with comm_splited.index().
+class SrxSetCommClassifier():
+    comm_type_to_pattern = {
+        'fw rules': '.*security policies .* policy .*',
+        'address-groups': '.*security .* address-set .*',
+        'addresses': '.*security .* address .*',
+        'services': '.*applications application .*',
+        'service-groups': '.*application-set .* application .*',
+        'static route': '.*routing-options static route .*',
+        'interface IPv4': '.*interfaces .* unit .* family inet address .*',
+        'intf to Routing Instance': '.*routing-instances .* interface .*',
+        'static NAT': '.*security nat static rule-set',
+    }
+    ## Hostname is matched without "set groups" exclusion, like before:
+    hostname_pattern = 'system host-name .*'
+    key_tokens = {
+        'fw rules': 'policy', 'address-groups': 'address-set', 'addresses': 'address',
+        'services': 'application', 'service-groups': 'application-set', 'static route': 'route',
+        'interface IPv4': 'interfaces', 'intf to Routing Instance': 'routing-instances',
+        'static NAT': 'rule-set', 'hostname': 'host-name',
+    }
+
+    def __init__(self):
+        self.__group_to_comm_type = {}
+        alternatives = []
+        for i, (comm_type, pattern) in enumerate(self.comm_type_to_pattern.items()):
+            group = f'c{i}'
+            self.__group_to_comm_type[group] = comm_type
+            alternatives.append(f'(?P<{group}>{pattern})')
+        self.__group_to_comm_type['hostname'] = 'hostname'
+        self.__pattern = re.compile(
+            'set (?:(?!groups )(?:' + '|'.join(alternatives) + ')'
+            f'|(?P<hostname>{self.hostname_pattern}))'
+        )
+        ## Group -> tuple(command type, ' key token '):
+        self.__group_to_key = {
+            group: (comm_type, f' {self.key_tokens[comm_type]} ')
+            for group, comm_type in self.__group_to_comm_type.items()
+        }
+
+    ## Returns tuple(command type, index of key token in comm.split()),
+    ## e.g. of 'policy' for 'fw rules'; ('', -1) if not matched,
+    ## (command type, -1) if key token is not followed by name.
+    ## Key token is found with str.find, regex groups for it would slow every match.
+    def classify(self, comm: str) -> tuple[str, int]:
+        match = self.__pattern.match(comm)
+        if match is None:
+            return '', -1
+        comm_type, key = self.__group_to_key[match.lastgroup]
+        position = comm.find(key)
+        if position < 0:
+            return comm_type, -1
+        ## Tokens before key, any whitespace between them:
+        return comm_type, len(comm[:position].split())
+
+    ## Command type only, '' if not matched; for parsers which split command anyway
+    def comm_type(self, comm: str) -> str:
+        match = self.__pattern.match(comm)
+        if match is None:
+            return ''
+        return self.__group_to_comm_type[match.lastgroup]
+
+
 ## For parsing in Set-style config; commands starting with set keyword:
+## references - optional ReferenceIndex filled while parsing, see get_references()
 class ParserSrxSets(ParserSrx):
-    def __init__(self, conf_data: ConfigData):
-        super().__init__(conf_data)
+    _classifier = SrxSetCommClassifier()
+
+    def __init__(
+            self, conf_data: ConfigData,
+            compact: bool = False,
+            stats: ParseStats | None = None,
+            references: ReferenceIndex | None = None
+    ):
+        super().__init__(conf_data, compact, stats)
         self._conf_type = 'Set-style'
+        self._references = references
 
     def run(self):
         self._fw_data = {'root': self._create_fw_data_template()}
-        self.__parse_data()
+        if self._stats is None:
+            self.__parse_data()
+        else:
+            self._stats.start()
+            try:
+                self.__parse_data()
+            finally:
+                self._stats.stop()
         return self._fw_data
 
-    def __identify_comm(self, comm: str) -> str:
-        comm_type_to_pattern = {
-            'fw rules': '^set (?!groups ).*security policies .* policy .*',
-            'address-groups': '^set (?!groups ).*security .* address-set .*',
-            'addresses': '^set (?!groups ).*security .* address .*',
-            'services': '^set (?!groups ).*applications application .*',
-            'service-groups': '^set (?!groups ).*application-set .* application .*',
-            'static route': '^set (?!groups ).*routing-options static route .*',
-            'interface IPv4': '^set (?!groups ).*interfaces .* unit .* family inet address .*',
-            'intf to Routing Instance': '^set (?!groups ).*routing-instances .* interface .*',
-            'static NAT': '^set (?!groups ).*security nat static rule-set',
-            'hostname': 'set system host-name .*',
-        }
+    def get_references(self) -> ReferenceIndex | None:
+        return self._references
 
-        result = ''
-        for comm_type in comm_type_to_pattern.keys():
-            pattern = comm_type_to_pattern[comm_type]
-            if re.match(pattern, comm):
-                result = comm_type
-                break
-        return result
+    def __identify_comm(self, comm: str) -> str:
+        return self._classifier.comm_type(comm)
 
     def __parse_data(self):
+        ## Without stats only "is not None" checks are added per line
+        stats = self._stats
+        references = self._references
         for line in self._conf_data.get():
             if 'set' not in line: 
+                if stats is not None:
+                    stats.skipped_lines += 1
                 continue
+            if stats is not None:
+                mark = stats.mark()
             line = line.strip()
             comm_splited = line.split()
             comm_splited, logsys = self.__get_ls_and_new_comm_splited(comm_splited)
+            comm_type = self.__identify_comm(line)
 
             ## Parse:
-            match self.__identify_comm(line):
+            match comm_type:
             ### Firewall Rule:
                 case 'fw rules':
                     result = self.__parse_fw_rule(comm_splited, logsys)
@@ -107,38 +220,55 @@ class ParserSrxSets(ParserSrx):
                 case 'addresses':
                     addr_name, address_data = self.__parse_address(comm_splited, logsys)
                     self._fw_data[logsys]['addresses'][addr_name] = address_data
+                    if references is not None:
+                        references.define(logsys, 'addresses', addr_name)
                 ### Address-set:
                 case 'address-groups':
                     set_name, addr = self.__parse_address_set(comm_splited, logsys)
+                    addr = self._intern(addr)
                     if set_name not in self._fw_data[logsys]['address-groups']:
                         self._fw_data[logsys]['address-groups'][set_name] = [addr]
                     else:
                         self._fw_data[logsys]['address-groups'][set_name].append(addr)
+                    if references is not None:
+                        references.define(logsys, 'address-groups', set_name)
+                        references.add(logsys, 'address', addr, 'address-groups', set_name)
                 ### Services:
                 case 'services':
                     app_name, key, val = self.__parse_app(comm_splited, logsys)
                     if app_name not in self._fw_data[logsys]['services']:
-                        self._fw_data[logsys]['services'][app_name] = {}
+                        self._fw_data[logsys]['services'][app_name] = self._new_record(Service)
                     self._fw_data[logsys]['services'][app_name][key] = val
+                    if references is not None:
+                        references.define(logsys, 'services', app_name)
                 ### Service-Groups:
                 case 'service-groups':
                     set_name, app_name = self.__parse_app_set(comm_splited, logsys)
+                    app_name = self._intern(app_name)
                     if set_name not in self._fw_data[logsys]['service-groups']:
                         self._fw_data[logsys]['service-groups'][set_name] = []
                     self._fw_data[logsys]['service-groups'][set_name].append(app_name)
+                    if references is not None:
+                        references.define(logsys, 'service-groups', set_name)
+                        references.add(logsys, 'service', app_name, 'service-groups', set_name)
                 ### Static Routes:
                 case 'static route':
                     key, next_hop, dest_ip = self.__parse_static_route(comm_splited, logsys)
-                    route_data = {'dest IP': dest_ip}
+                    route_data = self._new_record(Route)
+                    route_data['dest IP'] = dest_ip
                     route_data[key] = next_hop
+                    if 'routing-instances' in comm_splited:
+                        instance = comm_splited[comm_splited.index('routing-instances')+1]
+                        route_data['routing instance'] = self._intern(instance)
                     self._fw_data[logsys]['routes']['static'].append(route_data)
                 ### Local Routes:
                 case 'interface IPv4':
-                    intf_data = self._fw_data[logsys]['interfaces']
                     int_ip, int_nbr, unit = self.__parse_intf_local_route(comm_splited)
-                    if int_nbr not in intf_data:
-                        intf_data[int_nbr] = {}
-                    intf_data[int_nbr][unit] = {'IP': int_ip}
+                    self.__intf_unit(logsys, int_nbr, unit)['IP'] = int_ip
+                ### Interface in Routing Instance:
+                case 'intf to Routing Instance':
+                    instance, int_nbr, unit = self.__parse_intf_to_ri(comm_splited)
+                    self.__intf_unit(logsys, int_nbr, unit)['routing instance'] = self._intern(instance)
                 ### Static NATs:
                 case 'static NAT':
                     if 'from' in comm_splited and 'zone' in comm_splited:
@@ -147,17 +277,63 @@ class ParserSrxSets(ParserSrx):
                         static_nats = self._fw_data[logsys]['NATs']['static']
                         nat_rule_name, key, val = self.__parse_static_nat(comm_splited, logsys)
                         if nat_rule_name not in static_nats:
-                            static_nats[nat_rule_name] = {'src zone': self.__stat_nat_src_zone}
+                            static_nats[nat_rule_name] = self._new_record(StaticNat)
+                            static_nats[nat_rule_name]['src zone'] = self.__stat_nat_src_zone
+                            if references is not None:
+                                references.add(logsys, 'zone', self.__stat_nat_src_zone, 'NATs', nat_rule_name)
                         static_nats[nat_rule_name][key] = val
                 ### Hostname:
                 case 'hostname':
                     self._hostname = comm_splited[-1]
+
+            if stats is not None:
+                stats.add_line(comm_type, logsys, mark)
         
         ## Clear: just for parsing vars:
-        try:
-            del self.__stat_nat_src_zone
-        except AttributeError as e:
-            print(e)
+        self.__dict__.pop('_ParserSrxSets__stat_nat_src_zone', None)
+
+    ## Entry of fw_data which line is parsed to:
+    ## tuple(logical system, section, sub-type, name), None for lines not parsed.
+    ## Static route lines are one entry per logical system (routes are list),
+    ## "from zone" lines of static NAT and hostname lines have no logical system,
+    ## they affect lines of all logical systems.
+    ## Used by ParserSrxSetsIncremental to find what changed line affects.
+    def _line_entry(self, line: str) -> tuple[str | None, str, str | None, str | None] | None:
+        if 'set' not in line:
+            return None
+        line = line.strip()
+        comm_splited = line.split()
+        if comm_splited[1] == 'logical-systems':
+            logsys = comm_splited[2]
+            comm_splited = comm_splited[:1] + comm_splited[3:]
+        else:
+            logsys = 'root'
+        match self.__identify_comm(line):
+            case 'fw rules':
+                zones = self.__parse_fw_rule_zones(comm_splited)
+                rule_name = comm_splited[comm_splited.index('policy')+1]
+                return logsys, 'fw rules', None, f'{zones[0]};{zones[1]};{rule_name}'
+            case 'addresses':
+                return logsys, 'addresses', None, comm_splited[-2]
+            case 'address-groups':
+                return logsys, 'address-groups', None, self.__parse_address_set(comm_splited, logsys)[0]
+            case 'services':
+                return logsys, 'services', None, self.__parse_app(comm_splited, logsys)[0]
+            case 'service-groups':
+                return logsys, 'service-groups', None, self.__parse_app_set(comm_splited, logsys)[0]
+            case 'static route':
+                return logsys, 'routes', 'static', None
+            case 'interface IPv4':
+                return logsys, 'interfaces', None, self.__parse_intf_local_route(comm_splited)[1]
+            case 'intf to Routing Instance':
+                return logsys, 'interfaces', None, self.__parse_intf_to_ri(comm_splited)[1]
+            case 'static NAT':
+                if 'from' in comm_splited and 'zone' in comm_splited:
+                    return None, 'NATs', 'static', None
+                return logsys, 'NATs', 'static', comm_splited[comm_splited.index('rule') + 1]
+            case 'hostname':
+                return None, 'hostname', None, None
+        return None
 
     ## Extract logical system from comm_splited, 
     ## returns tuple(comm_splited without logical-system keyword and name, logical-system name)
@@ -189,6 +365,11 @@ class ParserSrxSets(ParserSrx):
             self._fw_data[logsys]['fw rules'][rule_name] = rule_data
             zones = self.__parse_fw_rule_zones(comm_splited)
             rule_data['src_zone'], rule_data['dst_zone'] = zones
+            if self._references is not None:
+                for zone in zones[0]:
+                    self._references.add_rule(logsys, rule_name, 'src_zone', zone)
+                for zone in zones[1]:
+                    self._references.add_rule(logsys, rule_name, 'dst_zone', zone)
         else:
             rule_data = self._fw_data[logsys]['fw rules'][rule_name]
         ## Remove any from global policy, if there is match zone definied :
@@ -196,7 +377,9 @@ class ParserSrxSets(ParserSrx):
             rule_data['src_zone'].pop(rule_data['src_zone'].index('any'))
         if key == 'dst_zone' and 'any' in rule_data['dst_zone']:
             rule_data['dst_zone'].pop(rule_data['src_zone'].index('any'))
-        rule_data[key].append(val)
+        rule_data[key].append(self._intern(val))
+        if self._references is not None:
+            self._references.add_rule(logsys, rule_name, key, val)
 
     def __parse_fw_rule_zones(self, comm_splited: list[str]):
         if 'global' not in comm_splited:
@@ -251,10 +434,9 @@ class ParserSrxSets(ParserSrx):
             addr_type = 'address'
         else:
             addr_type = 'fqdn'
-        address_data = {
-            'type': addr_type,
-            'address': addr
-        }
+        address_data = self._new_record(Address)
+        address_data['type'] = addr_type
+        address_data['address'] = addr
         return addr_name, address_data
 
     def __parse_address_set(self, comm_splited, logsys):
@@ -288,6 +470,22 @@ class ParserSrxSets(ParserSrx):
         int_numbr = get('interfaces')
         unit = get('unit')
         return int_ip, int_numbr, unit
+
+    ## "routing-instances VR1 interface ge-0/0/1.10" -> ('VR1', 'ge-0/0/1', '10'),
+    ## interface without unit is unit 0
+    def __parse_intf_to_ri(self, comm_splited):
+        instance = comm_splited[comm_splited.index('routing-instances')+1]
+        int_numbr, _, unit = comm_splited[comm_splited.index('interface')+1].partition('.')
+        return instance, int_numbr, unit or '0'
+
+    ## Unit record of interface, created on first address or routing instance line
+    def __intf_unit(self, logsys, int_nbr, unit):
+        intf_data = self._fw_data[logsys]['interfaces']
+        if int_nbr not in intf_data:
+            intf_data[int_nbr] = {}
+        if unit not in intf_data[int_nbr]:
+            intf_data[int_nbr][unit] = self._new_record(InterfaceUnit)
+        return intf_data[int_nbr][unit]
     
     def __parse_static_nat(self, comm_splited, logsys):
         nat_rule_name = comm_splited[comm_splited.index('rule') + 1]
@@ -300,7 +498,997 @@ class ParserSrxSets(ParserSrx):
         return nat_rule_name, key, val
 
 
-def parsers_factory(vendor, conf_getter):
-    match vendor:
-        case 'srx_set':
-            return ParserSrxSets(conf_getter)
\ No newline at end of file
+## Parse one shard in worker process, returns tuple(hostname, fw_data, stats):
+def _parse_srx_set_shard(
+        lines: list[str],
+        compact: bool = False,
+        stats: ParseStats | None = None,
+        references: ReferenceIndex | None = None
+) -> tuple[str, dict, ParseStats | None, ReferenceIndex | None]:
+    parser = ParserSrxSets(ConfigDataList(lines), compact, stats, references)
+    parser.run()
+    return *parser.get_data(), parser.get_stats(), parser.get_references()
+
+
+## Set-style config parsed in process pool, one shard per logical system.
+## Lines of root stay in one shard: policy zones and static NAT rules
+## depend on earlier root lines, so root cannot be cut at arbitrary line.
+## Result is the same as from ParserSrxSets, references too: every shard
+## fills own index of its logical system, merged into references.
+class ParserSrxSetsParallel(ParserSrxSets):
+    def __init__(
+            self, conf_data: ConfigData,
+            workers: int | None = None,
+            compact: bool = False,
+            stats: ParseStats | None = None,
+            references: ReferenceIndex | None = None
+    ):
+        super().__init__(conf_data, compact, stats, references)
+        self._conf_type = 'Set-style parallel'
+        self.__workers = workers
+
+    def run(self):
+        shards = self.__split_to_shards()
+        ## Every shard fills own stats, merged below:
+        new_stats = lambda: None if self._stats is None else ParseStats(self._stats.track_allocations)
+        new_references = lambda: None if self._references is None else ReferenceIndex()
+        if self.__workers == 1 or len(shards) == 1:
+            results = {
+                ls: _parse_srx_set_shard(lines, self._compact, new_stats(), new_references())
+                for ls, lines in shards.items()
+            }
+        else:
+            with ProcessPoolExecutor(max_workers=self.__workers) as executor:
+                ## Biggest shards first, so they do not finish last:
+                by_size = sorted(shards, key=lambda ls: len(shards[ls]), reverse=True)
+                futures = {
+                    ls: executor.submit(
+                        _parse_srx_set_shard, shards[ls], self._compact, new_stats(), new_references()
+                    )
+                    for ls in by_size
+                }
+                results = {ls: futures[ls].result() for ls in shards}
+
+        ## Shards are in order of first appearance of logical system,
+        ## same order as ParserSrxSets creates them in fw_data:
+        self._hostname, root_data, _, _ = results['root']
+        self._fw_data = {'root': root_data['root']}
+        for logsys in shards:
+            if logsys != 'root':
+                self._fw_data[logsys] = results[logsys][1][logsys]
+        if self._stats is not None:
+            for _, _, shard_stats, _ in results.values():
+                self._stats.merge(shard_stats)
+        if self._references is not None:
+            for _, _, _, shard_references in results.values():
+                self._references.merge(shard_references)
+        return self._fw_data
+
+    ## Returns dict: logical system -> its lines, root always first.
+    ## Static NAT "from zone" lines are copied to every shard, because
+    ## source zone carries over to next static NAT rules in any logical system.
+    ## Stats count such line once for every shard it is copied to.
+    def __split_to_shards(self) -> dict[str, list[str]]:
+        shards = {'root': []}
+        last_nat_zone_line = None
+        for line in self._conf_data.get():
+            if 'set' not in line:
+                if self._stats is not None:
+                    self._stats.skipped_lines += 1
+                continue
+            comm_splited = line.split()
+            if len(comm_splited) > 2 and comm_splited[1] == 'logical-systems':
+                logsys = comm_splited[2]
+                if logsys not in shards:
+                    shards[logsys] = [last_nat_zone_line] if last_nat_zone_line else []
+            else:
+                logsys = 'root'
+
+            if (
+                'rule-set' in line
+                and 'from' in comm_splited and 'zone' in comm_splited
+                and self._classifier.comm_type(line.strip()) == 'static NAT'
+            ):
+                last_nat_zone_line = line
+                for shard in shards.values():
+                    shard.append(line)
+            else:
+                shards[logsys].append(line)
+        return shards
+
+
+## Set-style parser which keeps lines of last parse and fw_data entry of every
+## line; update() parses only what changed since then and patches fw_data.
+## Old and new lines are aligned (_diff_hunks), only lines not seen in changed
+## parts before are classified. Every entry with added or removed line (rule,
+## object, group, interface) is parsed again from all its lines, found through
+## blocks of lines with entries counted in each block. Static routes are
+## spliced into list of logical system; when "from zone" line of static NAT
+## changes, all static NATs are parsed again.
+## Entry added or with first line moved is put back in order of first lines
+## of its section, through entries counted in blocks.
+## Re-parse time follows size of edit, besides reading and comparing lines
+## and reordering sections with such entries.
+## Result equals full parse of new config, order of entries included.
+## With references, logical systems with changed rules, objects, groups or
+## static NATs are indexed again from all their lines.
+class ParserSrxSetsIncremental(ParserSrxSets):
+    BLOCK_SIZE = 4096
+    NAT_ZONE = (None, 'NATs', 'static', None)
+
+    def __init__(
+            self, conf_data: ConfigData,
+            compact: bool = False,
+            stats: ParseStats | None = None,
+            references: ReferenceIndex | None = None
+    ):
+        super().__init__(conf_data, compact, stats, references)
+        self._conf_type = 'Set-style incremental'
+        self.__lines = []
+        self.__entries = []
+        ## [number of lines, Counter of entries, last "from zone" line or None,
+        ##  logical systems in order of first line]
+        self.__blocks = []
+        self.__logsys_lines = Counter()
+
+    def run(self):
+        self.__lines = list(self._conf_data.get())
+        self._conf_data = ConfigDataList(self.__lines)
+        super().run()
+        self.__entries = [self._line_entry(line) for line in self.__lines]
+        self.__blocks = self.__make_blocks(self.__lines, self.__entries, 0, len(self.__lines))
+        self.__logsys_lines = Counter(self.__logical_systems(self.__lines))
+        return self._fw_data
+
+    ## Parses changes in conf_data since last run() or update(),
+    ## returns number of lines parsed again.
+    ## On error (e.g. unsupported command) state of last parse is kept.
+    def update(self, conf_data: ConfigData) -> int:
+        lines = list(conf_data.get())
+        old_lines, old_entries = self.__lines, self.__entries
+        hunks = _diff_hunks(old_lines, lines)
+
+        ## Entry of line depends only on its text:
+        known = {}
+        for old_start, old_end, _, _ in hunks:
+            known.update(zip(old_lines[old_start:old_end], old_entries[old_start:old_end]))
+        entries = []
+        changed = set()
+        removed_lines, added_lines = [], []
+        position = 0
+        for old_start, old_end, new_start, new_end in hunks:
+            entries += old_entries[position:old_start]
+            for line in lines[new_start:new_end]:
+                if line not in known:
+                    known[line] = self._line_entry(line)
+                entries.append(known[line])
+            changed.update(old_entries[old_start:old_end], entries[new_start:new_end])
+            removed_lines += old_lines[old_start:old_end]
+            added_lines += lines[new_start:new_end]
+            position = old_end
+        entries += old_entries[position:]
+        changed.discard(None)
+        routes = {entry for entry in changed if entry[1] == 'routes'}
+        affected = changed - routes
+
+        blocks = self.__update_blocks(lines, entries, hunks)
+        if self.NAT_ZONE in affected:
+            affected.update(
+                entry for block in blocks for entry in block[1]
+                if entry is not None and entry[2] == 'static' and entry[1] == 'NATs'
+            )
+        reparsed = self.__lines_of(lines, entries, blocks, affected)
+        ## Route lines of changed parts, spliced into old lists below:
+        route_lines = {entry: [] for entry in routes}
+        for _, _, new_start, new_end in hunks:
+            for line, entry in zip(lines[new_start:new_end], entries[new_start:new_end]):
+                if entry in routes:
+                    route_lines[entry].append(line)
+        parser = ParserSrxSets(
+            ConfigDataList(reparsed + [line for entry in routes for line in route_lines[entry]]),
+            self._compact,
+        )
+        parser.run()
+        hostname, parsed = parser.get_data()
+        route_splices = {entry: self.__route_splices(entry, hunks, entries) for entry in routes}
+        reorder = {
+            entry[:3] for entry in affected
+            if entry[3] is not None and self.__first_line_moved(entry, hunks, entries, blocks)
+        }
+
+        logsys_lines = self.__logsys_lines.copy()
+        logsys_lines.subtract(self.__logical_systems(removed_lines))
+        logsys_lines.update(self.__logical_systems(added_lines))
+
+        if self._references is not None:
+            reindexed, references = self.__references_of(lines, entries, changed, logsys_lines)
+
+        self.__lines, self.__entries, self.__blocks = lines, entries, blocks
+        self.__logsys_lines = +logsys_lines
+        self._conf_data = ConfigDataList(lines)
+        self.__patch(affected, hostname, parsed, reorder)
+        if self._references is not None:
+            self._references.clear(reindexed)
+            self._references.merge(references)
+        for entry, splices in route_splices.items():
+            logsys = entry[0]
+            if logsys in self._fw_data:
+                new_routes = iter(parsed[logsys]['routes']['static'] if logsys in parsed else [])
+                old_routes = self._fw_data[logsys]['routes']['static']
+                routes_list = []
+                position = 0
+                for before, removed, added in splices:
+                    routes_list += old_routes[position:before]
+                    routes_list += [next(new_routes) for _ in range(added)]
+                    position = before + removed
+                routes_list += old_routes[position:]
+                self._fw_data[logsys]['routes']['static'] = routes_list
+        return len(reparsed) + sum(map(len, route_lines.values()))
+
+    ## Returns tuple(logical systems with changed entries which references are
+    ## kept for, their index parsed from all their lines and "from zone" lines
+    ## of static NAT)
+    def __references_of(self, lines, entries, changed, logsys_lines) -> tuple[set[str], ReferenceIndex]:
+        if self.NAT_ZONE in changed:
+            logical_systems = set(self.__logsys_lines) | set(logsys_lines)
+        else:
+            logical_systems = {
+                entry[0] for entry in changed
+                if entry[0] is not None and entry[1] not in ('routes', 'interfaces')
+            }
+        references = ReferenceIndex()
+        if logical_systems:
+            parser = ParserSrxSets(
+                ConfigDataList([
+                    line for line, entry in zip(lines, entries)
+                    if entry is not None and (entry[0] in logical_systems or entry == self.NAT_ZONE)
+                ]),
+                self._compact, references=references,
+            )
+            parser.run()
+        return logical_systems, references
+
+    def __make_blocks(self, lines, entries, start, end) -> list[list]:
+        blocks = []
+        for block_start in range(start, end, self.BLOCK_SIZE):
+            block_end = min(block_start + self.BLOCK_SIZE, end)
+            block_entries = entries[block_start:block_end]
+            counts = Counter(block_entries)
+            last_zone = None
+            if self.NAT_ZONE in counts:
+                last = len(block_entries) - 1 - block_entries[::-1].index(self.NAT_ZONE)
+                last_zone = lines[block_start + last]
+            logical_systems = self.__first_logical_systems(lines[block_start:block_end])
+            blocks.append([block_end - block_start, counts, last_zone, logical_systems])
+        return blocks
+
+    ## Blocks of new lines: runs of old blocks overlapping changed parts are
+    ## made again, other blocks are kept
+    def __update_blocks(self, lines, entries, hunks) -> list[list]:
+        total = len(self.__lines)
+        marked = [False] * len(self.__blocks)
+        starts = []
+        offset = 0
+        for size, _, _, _ in self.__blocks:
+            starts.append(offset)
+            offset += size
+        for old_start, old_end, _, _ in hunks:
+            if old_start >= total:
+                if marked:
+                    marked[-1] = True
+                continue
+            first = bisect_right(starts, old_start) - 1
+            last = bisect_right(starts, max(old_end - 1, old_start)) - 1
+            for i in range(first, last + 1):
+                marked[i] = True
+
+        if not self.__blocks:
+            return self.__make_blocks(lines, entries, 0, len(lines))
+
+        ## Position in new lines of old position, which is not inside changed part;
+        ## called with growing positions
+        shift = 0
+        next_hunk = 0
+
+        def new_position(position):
+            nonlocal shift, next_hunk
+            if position >= total:
+                return len(lines)
+            while next_hunk < len(hunks) and hunks[next_hunk][0] < position:
+                old_start, old_end, new_start, new_end = hunks[next_hunk]
+                shift += (new_end - new_start) - (old_end - old_start)
+                next_hunk += 1
+            return position + shift
+
+        blocks = []
+        i = 0
+        while i < len(self.__blocks):
+            if not marked[i]:
+                blocks.append(self.__blocks[i])
+                i += 1
+                continue
+            run_start = i
+            while i < len(self.__blocks) and marked[i]:
+                i += 1
+            region_end = starts[i] if i < len(self.__blocks) else total
+            blocks += self.__make_blocks(
+                lines, entries, new_position(starts[run_start]), new_position(region_end)
+            )
+        return blocks
+
+    ## Lines of entries in order of config, with "from zone" line in effect
+    ## before lines of static NAT rules
+    def __lines_of(self, lines, entries, blocks, affected) -> list[str]:
+        result = []
+        if not affected:
+            return result
+        offset = 0
+        zone_line = added_zone_line = None
+        for size, counts, last_zone, _ in blocks:
+            if counts.keys().isdisjoint(affected):
+                zone_line = last_zone or zone_line
+                offset += size
+                continue
+            for i in range(offset, offset + size):
+                entry = entries[i]
+                if entry == self.NAT_ZONE:
+                    zone_line = lines[i]
+                if entry in affected:
+                    if entry[1] == 'NATs' and zone_line is not None and zone_line is not added_zone_line:
+                        result.append(zone_line)
+                        added_zone_line = zone_line
+                    if entry != self.NAT_ZONE:
+                        result.append(lines[i])
+            offset += size
+        return result
+
+    ## For every changed part with lines of routes entry: tuple(routes before it
+    ## in old list, old routes removed, new routes added)
+    def __route_splices(self, entry, hunks, entries) -> list[tuple[int, int, int]]:
+        splices = []
+        for old_start, old_end, new_start, new_end in hunks:
+            removed = self.__entries[old_start:old_end].count(entry)
+            added = entries[new_start:new_end].count(entry)
+            if removed or added:
+                splices.append((self.__count_before(entry, old_start), removed, added))
+        return splices
+
+    ## Lines of entry before position in old lines, whole blocks from counters
+    def __count_before(self, entry, position) -> int:
+        count = offset = 0
+        for size, counts, _, _ in self.__blocks:
+            if offset + size > position:
+                break
+            count += counts[entry]
+            offset += size
+        return count + self.__entries[offset:position].count(entry)
+
+    ## Logical systems of lines in order of first line; lines of logical
+    ## system already found are skipped by prefix, without split
+    def __first_logical_systems(self, lines) -> tuple[str, ...]:
+        found = {}
+        prefixes = ()
+        for line in lines:
+            if 'logical-systems' not in line or line.startswith(prefixes):
+                continue
+            for logsys in self.__logical_systems([line]):
+                if logsys not in found:
+                    found[logsys] = None
+                    prefixes += (f'set logical-systems {logsys} ',)
+        return tuple(found)
+
+    ## Logical system is in fw_data while any its line is in config, even not parsed one
+    def __logical_systems(self, lines):
+        for line in lines:
+            if 'set' in line:
+                comm_splited = line.split()
+                if len(comm_splited) > 2 and comm_splited[1] == 'logical-systems':
+                    yield comm_splited[2]
+
+    ## Entry is new or its first line is in changed part (removed or added),
+    ## otherwise it keeps its place among first lines of other entries
+    def __first_line_moved(self, entry, hunks, entries, blocks) -> bool:
+        old = self.__first_line(entry, self.__entries, self.__blocks)
+        new = self.__first_line(entry, entries, blocks)
+        if old is None or new is None:
+            return new is not None
+        return any(
+            old_start <= old < old_end or new_start <= new < new_end
+            for old_start, old_end, new_start, new_end in hunks
+        )
+
+    ## Position of first line of entry, None if it has no lines
+    @staticmethod
+    def __first_line(entry, entries, blocks) -> int | None:
+        offset = 0
+        for size, counts, _, _ in blocks:
+            if entry in counts:
+                return entries.index(entry, offset, offset + size)
+            offset += size
+        return None
+
+    def __patch(self, affected: set, hostname: str, parsed: dict, reorder: set):
+        for logsys in list(self._fw_data):
+            if logsys != 'root' and logsys not in self.__logsys_lines:
+                del self._fw_data[logsys]
+        for logsys in self.__logsys_lines:
+            if logsys not in self._fw_data:
+                self._fw_data[logsys] = self._create_fw_data_template()
+        ## Logical systems in order of first line, like full parse creates them:
+        order = {'root': None}
+        for block in self.__blocks:
+            order.update(dict.fromkeys(block[3]))
+        self.__reorder(self._fw_data, list(order))
+
+
+        for entry in affected:
+            logsys, section, sub_type, name = entry
+            if section == 'hostname':
+                self._hostname = hostname
+                continue
+            ## All static NATs, when "from zone" line changed:
+            if name is None:
+                sub_type, name = None, sub_type
+            for ls in self._fw_data if logsys is None else [logsys]:
+                if ls not in self._fw_data:
+                    continue
+                source = (parsed[ls] if ls in parsed else self._create_fw_data_template())[section]
+                target = self._fw_data[ls][section]
+                if sub_type is not None:
+                    source, target = source[sub_type], target[sub_type]
+                if name in source:
+                    target[name] = source[name]
+                else:
+                    target.pop(name, None)
+        ## Sections, tuple(logsys, section, sub-type), with entry new or moved:
+        if reorder:
+            for (ls, section, sub_type), order in self.__section_orders(reorder).items():
+                if ls not in self._fw_data:
+                    continue
+                target = self._fw_data[ls][section]
+                self.__reorder(target if sub_type is None else target[sub_type], order)
+
+    ## Names of entries in order of first line, for every section of sections;
+    ## counters of blocks keep entries in order of first line within block
+    def __section_orders(self, sections: set) -> dict[tuple, list]:
+        orders = {section: {} for section in sections}
+        for _, counts, _, _ in self.__blocks:
+            for entry in counts:
+                if entry is not None and entry[3] is not None:
+                    order = orders.get(entry[:3])
+                    if order is not None:
+                        order[entry[3]] = None
+        return {section: list(order) for section, order in orders.items()}
+
+    ## Moves keys of dict to order, from first misplaced key on
+    ## (in place, fw_data given out by get_data() stays valid)
+    @staticmethod
+    def __reorder(data: dict, order: list):
+        order = [key for key in order if key in data]
+        keys = list(data)
+        if keys == order:
+            return
+        start = next((i for i, (key, expected) in enumerate(zip(keys, order)) if key != expected), len(order))
+        for key in order[start:]:
+            data[key] = data.pop(key)
+
+
+## Aligns two versions of lines: returns changed parts, list of
+## tuple(old start, old end, new start, new end), lines between them are equal.
+## Equal runs are skipped comparing slices, after difference lines are
+## synchronized again on ANCHOR equal lines, looking ahead as far as needed.
+## Result is not always the shortest diff, but every line outside changed
+## parts is paired with equal line.
+def _diff_hunks(old: list, new: list, anchor: int = 4) -> list[tuple[int, int, int, int]]:
+    hunks = []
+    i = j = 0
+    while True:
+        same = _common_run(old, i, new, j)
+        i, j = i + same, j + same
+        if i == len(old) and j == len(new):
+            return hunks
+        if i == len(old) or j == len(new):
+            hunks.append((i, len(old), j, len(new)))
+            return hunks
+        skip_old, skip_new = _resync(old, i, new, j, anchor)
+        hunks.append((i, i + skip_old, j, j + skip_new))
+        i, j = i + skip_old, j + skip_new
+
+
+## Number of equal lines from old[i] and new[j], compared in doubling slices
+def _common_run(old: list, i: int, new: list, j: int) -> int:
+    limit = min(len(old) - i, len(new) - j)
+    same, step = 0, 8
+    while same < limit:
+        size = min(step, limit - same)
+        if old[i + same:i + same + size] == new[j + same:j + same + size]:
+            same += size
+            step *= 2
+            continue
+        ## Difference is in this slice:
+        low, high = 0, size - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if old[i + same + low:i + same + middle] == new[j + same + low:j + same + middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return same + low
+    return same
+
+
+## Returns tuple(old lines, new lines) to skip from old[i] and new[j] to next
+## place where anchor lines (or rest of both lists) are equal, fewest skipped lines first
+def _resync(old: list, i: int, new: list, j: int, anchor: int) -> tuple[int, int]:
+    lookahead = 32
+    while True:
+        positions = {}
+        for q in range(j, min(j + lookahead, len(new))):
+            positions.setdefault(new[q], []).append(q)
+        best = None
+        for p in range(i, min(i + lookahead, len(old))):
+            if best is not None and p - i >= best[0] + best[1]:
+                break
+            for q in positions.get(old[p], ()):
+                if best is not None and (p - i) + (q - j) >= best[0] + best[1]:
+                    break
+                if old[p:p + anchor] == new[q:q + anchor] and (
+                    p + anchor <= len(old) and q + anchor <= len(new) or old[p:] == new[q:]
+                ):
+                    best = (p - i, q - j)
+                    break
+        if best is not None:
+            return best
+        if i + lookahead >= len(old) and j + lookahead >= len(new):
+            return len(old) - i, len(new) - j
+        lookahead *= 2
+
+
+## Turns hierarchical SRX config ("show configuration") into set commands,
+## the same as "show configuration | display set" gives, one statement at a time.
+## Only prefixes of open blocks are kept, so memory depends on nesting depth.
+## Lists [ a b ] give one command per member, "inactive:" statements are followed
+## by deactivate command, comments and /* annotations */ are skipped.
+class SrxHierarchyTokenizer():
+    ## Quoted string (also not closed in this line), comment, punctuation or word:
+    _token_pattern = re.compile(r'"(?:[^"\\]|\\.)*(?:(")|\\?$)|/\*|#.*|[{};\[\]]|[^\s{};\[\]"]+')
+    ## Statement without anything that needs tokenizing:
+    _plain_pattern = re.compile(r'[^"#{};\[\]]*')
+
+    def set_commands(self, lines):
+        plain = self._plain_pattern.fullmatch
+        ## Open blocks as [prefix of commands, inactive, has statements]:
+        stack = [['set ', False, True]]
+        top = stack[-1]
+        words = []
+        values = None
+        in_comment = False
+        pending = ''
+        for line in lines:
+            line = line.strip()
+            if pending:
+                line = f'{pending}\n{line}'
+                pending = ''
+            ## Most lines are one statement, block start or end:
+            elif not (in_comment or words) and line and '/*' not in line:
+                last = line[-1]
+                if last == ';' and plain(line, 0, len(line) - 1) and not line.startswith(('inactive:', 'protect:')):
+                    top[2] = True
+                    yield top[0] + line[:-1]
+                    continue
+                if last == '{' and plain(line, 0, len(line) - 1) and not line.startswith(('inactive:', 'protect:')):
+                    top[2] = True
+                    top = [f'{top[0]}{line[:-1].rstrip()} ', False, False]
+                    stack.append(top)
+                    continue
+                if line == '}' and len(stack) > 1:
+                    yield from self.__close_block(stack.pop())
+                    top = stack[-1]
+                    continue
+
+            pos = 0
+            while True:
+                if in_comment:
+                    end = line.find('*/', pos)
+                    if end < 0:
+                        break
+                    in_comment = False
+                    pos = end + 2
+                match = self._token_pattern.search(line, pos)
+                if match is None:
+                    break
+                token = match.group()
+                pos = match.end()
+                match token[0]:
+                    case '#':
+                        break
+                    case '/' if token == '/*':
+                        in_comment = True
+                    case '"' if match.group(1) is None:
+                        ## Quoted string continues in next line:
+                        pending = line[match.start():]
+                        break
+                    case '{':
+                        inactive = self.__strip_flags(words)
+                        top[2] = True
+                        top = [f'{top[0]}{" ".join(words)} ', inactive, False]
+                        stack.append(top)
+                        words = []
+                    case '}':
+                        if len(stack) > 1:
+                            yield from self.__close_block(stack.pop())
+                            top = stack[-1]
+                    case '[':
+                        values = []
+                    case ']':
+                        pass
+                    case ';':
+                        inactive = self.__strip_flags(words)
+                        top[2] = True
+                        statement = top[0] + ' '.join(words)
+                        for value in (values if values is not None else (None,)):
+                            command = statement if value is None else f'{statement} {value}'
+                            yield command
+                            if inactive:
+                                yield 'deactivate ' + command[len('set '):]
+                        words = []
+                        values = None
+                    case _:
+                        if values is not None:
+                            values.append(token)
+                        else:
+                            words.append(token)
+
+    ## Removes "inactive:" and "protect:" from statement, returns True if inactive
+    def __strip_flags(self, words: list[str]) -> bool:
+        inactive = False
+        while words and words[0] in ('inactive:', 'protect:'):
+            inactive = inactive or words.pop(0) == 'inactive:'
+        return inactive
+
+    ## Empty block is command itself, inactive one is deactivated after its statements
+    def __close_block(self, block):
+        prefix, inactive, has_statements = block
+        if not has_statements:
+            yield prefix.rstrip()
+        if inactive:
+            yield 'deactivate ' + prefix[len('set '):].rstrip()
+
+
+## For parsing hierarchical config ("show configuration" without display set).
+## Statements are turned into set commands by SrxHierarchyTokenizer and parsed
+## with the same handlers as in ParserSrxSets, so data is the same as from
+## set-style config; stats count set commands, not lines.
+class ParserSrxHierarchical(ParserSrxSets):
+    _tokenizer = SrxHierarchyTokenizer()
+
+    def __init__(
+            self, conf_data: ConfigData,
+            compact: bool = False,
+            stats: ParseStats | None = None,
+            references: ReferenceIndex | None = None
+    ):
+        super().__init__(conf_data, compact, stats, references)
+        self._conf_type = 'Hierarchical'
+
+    def run(self):
+        conf_data = self._conf_data
+        self._conf_data = ConfigDataList(self._tokenizer.set_commands(conf_data.get()))
+        try:
+            return super().run()
+        finally:
+            self._conf_data = conf_data
+
+
+## Parser of FortiGate "show full-configuration" output, in one pass.
+## Config is made of nested blocks:
+##   config <section> / edit <name> / set <attribute> <values> / next / end
+## Only stack of open blocks and attributes of object being edited
+## are kept while parsing, so memory used besides fw_data depends
+## on nesting depth, not on config size.
+## VDOMs are kept as logical systems of fw_data, 'root' without VDOMs.
+## Policies are keyed by policy ID, actions accept/deny as permit/deny.
+class ParserFortinet(Parser):
+    ## Kinds of blocks on stack:
+    VDOMS, GLOBAL, VDOM, SECTION, OBJECT = range(5)
+    ACTIONS = {'accept': 'permit'}
+    POLICY_ATTRIBUTES = {
+        'srcintf': 'src_zone', 'dstintf': 'dst_zone',
+        'srcaddr': 'src_IP', 'dstaddr': 'dst_IP',
+        'service': 'services',
+    }
+    ## Attribute with value of other address types:
+    ADDRESS_TYPE_VALUES = {
+        'geography': 'country', 'wildcard': 'wildcard',
+        'wildcard-fqdn': 'wildcard-fqdn', 'interface-subnet': 'subnet',
+        'mac': 'macaddr',
+    }
+    SERVICE_PROTOCOLS = ('tcp', 'udp', 'udp-lite', 'sctp')
+    ## Quoted value, backslash escapes quote and backslash, or word:
+    _value_pattern = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)', re.DOTALL)
+    _escape_pattern = re.compile(r'\\(.)', re.DOTALL)
+
+    def __init__(
+            self, conf_data: ConfigData,
+            compact: bool = False,
+            stats: ParseStats | None = None
+    ):
+        super().__init__(conf_data, compact, stats)
+        self.__vendor = 'FortiGate'
+        self._conf_type = 'full-configuration'
+        ## Called with (name, attributes, VDOM) on "next" of every object;
+        ## sections without objects (system global) on "end"
+        self.__section_handlers = {
+            'system global': self.__add_system_global,
+            'system interface': self.__add_interface,
+            'firewall address': self.__add_address,
+            'firewall addrgrp': self.__add_address_group,
+            'firewall service custom': self.__add_service,
+            'firewall service group': self.__add_service_group,
+            'firewall policy': self.__add_policy,
+            'firewall vip': self.__add_vip,
+            'router static': self.__add_static_route,
+        }
+
+    def run(self):
+        self._fw_data = {'root': self._create_fw_data_template()}
+        if self._stats is None:
+            self.__parse_data()
+        else:
+            self._stats.start()
+            try:
+                self.__parse_data()
+            finally:
+                self._stats.stop()
+        return self._fw_data
+
+    def __parse_data(self):
+        stats = self._stats
+        handlers = self.__section_handlers
+        ## Open blocks, lists of [kind, name, handler, attributes];
+        ## attributes only for blocks of parsed sections:
+        stack = []
+        logsys = 'root'
+        ## Set command with quoted value continued in next lines:
+        pending = None
+        for line in self._conf_data.get():
+            line = line.strip()
+            if pending is not None:
+                line = f'{pending}\n{line}'
+                if not self.__quotes_closed(line):
+                    pending = line
+                    if stats is not None:
+                        stats.skipped_lines += 1
+                    continue
+                pending = None
+            elif not line or line[0] == '#':
+                if stats is not None:
+                    stats.skipped_lines += 1
+                continue
+            keyword, _, rest = line.partition(' ')
+            if keyword == 'set' and '"' in rest and not self.__quotes_closed(rest):
+                pending = line
+                if stats is not None:
+                    stats.skipped_lines += 1
+                continue
+            if stats is not None:
+                mark = stats.mark()
+                comm_type = self.__current_section(stack)
+            top = stack[-1] if stack else None
+
+            match keyword:
+                case 'set':
+                    if top is not None and top[3] is not None:
+                        attribute, _, values = rest.partition(' ')
+                        top[3][attribute] = self.__split_values(values)
+                case 'edit':
+                    name = self.__split_values(rest)[0] if '"' in rest else rest
+                    if top is None:
+                        stack.append([self.OBJECT, name, None, None])
+                    elif top[0] == self.VDOMS:
+                        logsys = self._intern(name)
+                        self.__logsys_data(logsys)
+                        stack.append([self.VDOM, logsys, None, None])
+                    elif top[0] == self.SECTION and top[2] is not None:
+                        stack.append([self.OBJECT, name, top[2], {}])
+                    else:
+                        stack.append([self.OBJECT, name, None, None])
+                case 'config':
+                    ## Sections nested in objects (e.g. interface secondaryip)
+                    ## are not parsed:
+                    if top is not None and top[0] not in (self.VDOM, self.GLOBAL):
+                        stack.append([self.SECTION, rest, None, None])
+                    elif rest == 'vdom':
+                        stack.append([self.VDOMS, rest, None, None])
+                    elif rest == 'global':
+                        stack.append([self.GLOBAL, rest, None, None])
+                    else:
+                        handler = handlers.get(rest)
+                        stack.append([self.SECTION, rest, handler, None if handler is None else {}])
+                    if stats is not None:
+                        comm_type = self.__current_section(stack)
+                case 'next' if top is not None:
+                    kind, name, handler, attributes = stack.pop()
+                    if kind == self.VDOM:
+                        logsys = 'root'
+                    elif handler is not None:
+                        handler(name, attributes, logsys)
+                case 'end' if top is not None:
+                    kind, name, handler, attributes = stack.pop()
+                    if handler is not None and attributes:
+                        handler(None, attributes, logsys)
+
+            if stats is not None:
+                stats.add_line(comm_type, logsys, mark)
+
+    ## Name of parsed section the stack is in, '' if none
+    def __current_section(self, stack) -> str:
+        for kind, name, handler, _ in stack:
+            if kind == self.SECTION and handler is not None:
+                return name
+        return ''
+
+    def __quotes_closed(self, text: str) -> bool:
+        if '\\' not in text:
+            return text.count('"') % 2 == 0
+        inside = escaped = False
+        for char in text:
+            if escaped:
+                escaped = False
+            elif char == '\\' and inside:
+                escaped = True
+            elif char == '"':
+                inside = not inside
+        return not inside
+
+    def __split_values(self, values: str) -> list[str]:
+        if '"' not in values:
+            return values.split()
+        result = []
+        for match in self._value_pattern.finditer(values):
+            quoted, word = match.groups()
+            if quoted is None:
+                result.append(word)
+            elif '\\' in quoted:
+                result.append(self._escape_pattern.sub(r'\1', quoted))
+            else:
+                result.append(quoted)
+        return result
+
+    def __logsys_data(self, logsys: str) -> dict:
+        if logsys not in self._fw_data:
+            self._fw_data[logsys] = self._create_fw_data_template()
+        return self._fw_data[logsys]
+
+    ## ['10.0.0.1', '255.255.255.0'] -> '10.0.0.1/24'
+    def __to_prefix(self, values: list[str]) -> str:
+        if len(values) != 2:
+            return ' '.join(values)
+        network = ipv4_network(' '.join(values))
+        if network is None:
+            return ' '.join(values)
+        return f'{values[0]}/{network[1].bit_count()}'
+
+    def __add_system_global(self, name, attributes, logsys):
+        if 'hostname' in attributes:
+            self._hostname = attributes['hostname'][0]
+
+    ## Interfaces are defined in global section, VDOM is their attribute.
+    ## Only interfaces with IPv4 address are kept, as unit '0'.
+    def __add_interface(self, name, attributes, logsys):
+        ip = attributes.get('ip')
+        if not ip or ip[0] == '0.0.0.0':
+            return
+        if 'vdom' in attributes:
+            logsys = self._intern(attributes['vdom'][0])
+        intf_data = self.__logsys_data(logsys)['interfaces']
+        unit = self._new_record(InterfaceUnit)
+        unit['IP'] = self.__to_prefix(ip)
+        intf_data.setdefault(name, {})['0'] = unit
+
+    def __add_address(self, name, attributes, logsys):
+        address_data = self._new_record(Address)
+        addr_type = attributes.get('type', ('ipmask',))[0]
+        match addr_type:
+            case 'ipmask':
+                address_data['type'] = 'address'
+                address_data['address'] = self.__to_prefix(attributes.get('subnet', ['0.0.0.0', '0.0.0.0']))
+            case 'iprange':
+                address_data['type'] = 'range'
+                address_data['address'] = [
+                    attributes.get('start-ip', ['0.0.0.0'])[0],
+                    attributes.get('end-ip', ['0.0.0.0'])[0],
+                ]
+            case 'fqdn':
+                address_data['type'] = 'fqdn'
+                address_data['address'] = attributes.get('fqdn', [''])[0]
+            case _:
+                address_data['type'] = addr_type
+                value = attributes.get(self.ADDRESS_TYPE_VALUES.get(addr_type), [])
+                address_data['address'] = ' '.join(value)
+        self.__logsys_data(logsys)['addresses'][name] = address_data
+
+    def __add_address_group(self, name, attributes, logsys):
+        members = [self._intern(member) for member in attributes.get('member', [])]
+        self.__logsys_data(logsys)['address-groups'][name] = members
+
+    ## Port ranges are "dst_low[-dst_high][:src_low[-src_high]]",
+    ## ports of all protocols are joined, per protocol kept in <protocol>-portrange
+    def __add_service(self, name, attributes, logsys):
+        service = self._new_record(Service)
+        protocol = attributes.get('protocol', ('TCP/UDP/SCTP',))[0]
+        if protocol.startswith('TCP/UDP'):
+            protocols, dst_ports, src_ports = [], [], []
+            for proto in self.SERVICE_PROTOCOLS:
+                port_ranges = attributes.get(f'{proto}-portrange')
+                if not port_ranges:
+                    continue
+                protocols.append(proto)
+                for port_range in port_ranges:
+                    dst_port, _, src_port = port_range.partition(':')
+                    dst_ports.append(dst_port)
+                    if src_port:
+                        src_ports.append(src_port)
+                service[f'{proto}-portrange'] = ' '.join(port_ranges)
+            service['protocol'] = ' '.join(protocols)
+            if dst_ports:
+                service['destination-port'] = ' '.join(dst_ports)
+            if src_ports:
+                service['source-port'] = ' '.join(src_ports)
+        elif protocol == 'IP':
+            service['protocol'] = attributes.get('protocol-number', ['0'])[0]
+        else:
+            service['protocol'] = protocol.lower()
+            if 'icmptype' in attributes:
+                service['icmp-type'] = attributes['icmptype'][0]
+        self.__logsys_data(logsys)['services'][name] = service
+
+    def __add_service_group(self, name, attributes, logsys):
+        members = [self._intern(member) for member in attributes.get('member', [])]
+        self.__logsys_data(logsys)['service-groups'][name] = members
+
+    ## Source NAT is IP pool names, or 'interface' without pool
+    def __add_policy(self, policy_id, attributes, logsys):
+        rule_data = self._fw_rule_data_template()
+        intern = self._intern
+        for attribute, key in self.POLICY_ATTRIBUTES.items():
+            values = attributes.get(attribute)
+            if values:
+                rule_data[key].extend(intern(value) for value in values)
+        action = attributes.get('action', ('deny',))[0]
+        rule_data['term_action'].append(intern(self.ACTIONS.get(action, action)))
+        rule_data['status'].append(intern(attributes.get('status', ('enable',))[0]))
+        if 'comments' in attributes:
+            rule_data['description'].append(' '.join(attributes['comments']))
+        if attributes.get('nat', ('disable',))[0] == 'enable':
+            pools = attributes.get('poolname')
+            if attributes.get('ippool', ('disable',))[0] == 'enable' and pools:
+                rule_data['src_NAT'].extend(intern(pool) for pool in pools)
+            else:
+                rule_data['src_NAT'].append('interface')
+        self.__logsys_data(logsys)['fw rules'][policy_id] = rule_data
+
+    ## VIPs with port forwarding are destination NATs, other static NATs;
+    ## ports are not kept
+    def __add_vip(self, name, attributes, logsys):
+        nat = self._new_record(StaticNat)
+        nat['src zone'] = attributes.get('extintf', ('any',))[0]
+        nat['orginal IP'] = attributes.get('extip', ('',))[0]
+        nat['NATed IP'] = ' '.join(attributes.get('mappedip', ()))
+        nat_type = 'dst' if attributes.get('portforward', ('disable',))[0] == 'enable' else 'static'
+        self.__logsys_data(logsys)['NATs'][nat_type][name] = nat
+
+    ## Destination is network or address object name (dstaddr)
+    def __add_static_route(self, route_id, attributes, logsys):
+        route_data = self._new_record(Route)
+        if 'dstaddr' in attributes and attributes['dstaddr'][0]:
+            route_data['dest IP'] = attributes['dstaddr'][0]
+        else:
+            route_data['dest IP'] = self.__to_prefix(attributes.get('dst', ['0.0.0.0', '0.0.0.0']))
+        gateway = attributes.get('gateway')
+        if gateway and gateway[0] != '0.0.0.0':
+            route_data['next hop IP'] = gateway[0]
+        device = attributes.get('device')
+        if device and device[0]:
+            route_data['next hop interface'] = device[0]
+        self.__logsys_data(logsys)['routes']['static'].append(route_data)
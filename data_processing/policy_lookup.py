@@ -0,0 +1,316 @@
+from bisect import bisect_right
+from typing import NamedTuple
+from data_processing._numpy import np, numpy_available
+from data_processing.groups import (
+    ANY_ADDRESS, ANY_SERVICE, PORT_PROTOCOLS, PORTS, GroupResolver, IntervalSet, address_resolver,
+    protocol_number, service_resolver,
+)
+from data_processing.isip import ip_to_int
+
+
+## First matching policy for a flow, built from parsed fw_data of one logical system:
+##   lookup = PolicyLookup(fw_data['root'])
+##   lookup.lookup('trust', 'untrust', '10.1.1.1', '192.0.2.10', 'tcp', 443)
+##   -> Match(name=..., action='permit', unresolved=()) or None
+## Rules of every zone pair are indexed in three dimensions - source IP,
+## destination IP and protocol+destination port - by segment trees over
+## sorted interval boundaries: node keeps rules (ids in policy order) which
+## intervals cover its range, so rule is in O(log segments) nodes per interval
+## and memory grows with n log n, not with segments x rules.
+## Rules covering value are in nodes on path from its segment to root. Lookup
+## walks them in dimension where fewest rules cover the flow, in policy order,
+## checks other two dimensions on intervals of rule and stops at first match.
+## Cost is log of rule count plus rules walked - in the worst case (flow
+## matching no rule) all rules covering flow in its most selective dimension,
+## e.g. every rule with source 'any' when sources of flow are not narrower.
+## See benchmarks/policy_lookup_bench.py: rules spread over zone pairs and
+## all in one zone pair.
+## Address and service groups are flattened to intervals by GroupResolver
+## (data_processing.groups); resolvers can be shared with other consumers.
+## Global policies (zone 'any') match every zone pair; with global_last=True
+## (SRX) they are checked after zone policies, with False (FortiGate) policies
+## keep order of config. Disabled rules are skipped. Source ports of services
+## are not compared.
+## Names which are not resolved to addresses or services (FQDN, predefined
+## application not in groups.JUNOS_APPLICATIONS, missing object) are listed
+## in unresolved. Rule using them may match any value in that dimension:
+## when it is not sure to match flow (flow is not in its resolved names),
+## it is reported in Match.unresolved and lookup goes on - answer after it
+## holds only if these rules do not match. Match with name None: no rule
+## matches for sure, but rules in unresolved may. Such rules are indexed as
+## if they matched any value of that dimension, so they are walked by more lookups.
+
+GLOBAL_PREFIX = "['any'];['any'];"
+
+
+class Match(NamedTuple):
+    name: str | None
+    action: str | None
+    ## Names of rules before the match which may match flow, see above
+    unresolved: tuple[str, ...] = ()
+
+
+## Segment tree of one dimension; segment i is [starts[i], starts[i + 1]),
+## node keeps ids of rules covering its range, ascending
+class _Dimension():
+    def __init__(self, rule_intervals: list[IntervalSet]):
+        self.starts = sorted({
+            bound for intervals in rule_intervals for start, end in intervals for bound in (start, end + 1)
+        })
+        self.size = 1 << max(len(self.starts) - 1, 0).bit_length()
+        self.nodes = {}
+        positions = {start: i for i, start in enumerate(self.starts)}
+        for rule, intervals in enumerate(rule_intervals):
+            for start, end in intervals:
+                low = positions[start] + self.size
+                high = positions[end + 1] + self.size
+                while low < high:
+                    if low & 1:
+                        self.nodes.setdefault(low, []).append(rule)
+                        low += 1
+                    if high & 1:
+                        high -= 1
+                        self.nodes.setdefault(high, []).append(rule)
+                    low >>= 1
+                    high >>= 1
+
+    def segment(self, value: int) -> int:
+        return bisect_right(self.starts, value) - 1
+
+    ## Lists of rules covering segment, -1 is below all intervals
+    def covering(self, segment: int) -> list[list[int]]:
+        if segment < 0:
+            return []
+        nodes = self.nodes
+        node = segment + self.size
+        lists = []
+        while node:
+            rules = nodes.get(node)
+            if rules:
+                lists.append(rules)
+            node >>= 1
+        return lists
+
+
+## Rules are indexed with intervals they may match; uncertain - id of rule
+## with unresolved names -> tuple of its resolved sources, destinations, services
+class _ZonePairIndex():
+    def __init__(self, names, actions, sources, destinations, services, uncertain):
+        self.names = names
+        self.actions = actions
+        self.intervals = (sources, destinations, services)
+        self.uncertain = uncertain
+        self.dimensions = tuple(_Dimension(intervals) for intervals in self.intervals)
+
+    def lookup(self, source: int, destination: int, service: int) -> tuple[int, list[int]]:
+        values = (source, destination, service)
+        segments = [dimension.segment(value) for dimension, value in zip(self.dimensions, values)]
+        return self.lookup_segments(segments, values)
+
+    ## Returns tuple(id of first rule sure to match or -1, ids of rules before
+    ## it which may match); segments of values in every dimension. Rules of
+    ## dimension with fewest covering are walked in order, each list up to best
+    ## id so far, other two dimensions checked on intervals.
+    def lookup_segments(self, segments, values) -> tuple[int, list[int]]:
+        best_count = None
+        for d, (dimension, segment) in enumerate(zip(self.dimensions, segments)):
+            lists = dimension.covering(segment)
+            count = sum(len(rules) for rules in lists)
+            if not count:
+                return -1, []
+            if best_count is None or count < best_count:
+                best_count, walked, walked_dimension = count, lists, d
+        (first, first_value), (second, second_value) = [
+            (self.intervals[other], values[other]) for other in range(3) if other != walked_dimension
+        ]
+        uncertain = self.uncertain
+        best = len(self.names)
+        possible = []
+        for rules in walked:
+            for rule in rules:
+                if rule >= best:
+                    break
+                if first_value in first[rule] and second_value in second[rule]:
+                    resolved = uncertain.get(rule) if uncertain else None
+                    if resolved is None or all(value in intervals for value, intervals in zip(values, resolved)):
+                        best = rule
+                        break
+                    possible.append(rule)
+        if possible:
+            possible = sorted(rule for rule in possible if rule < best)
+        return (best if best < len(self.names) else -1), possible
+
+
+class PolicyLookup():
+    DIMENSIONS = ('sources', 'destinations', 'services')
+    __ANY = {
+        'sources': IntervalSet([ANY_ADDRESS]), 'destinations': IntervalSet([ANY_ADDRESS]),
+        'services': IntervalSet([ANY_SERVICE]),
+    }
+
+    def __init__(
+            self, logsys_data: dict,
+            global_last: bool = True,
+            addresses: GroupResolver | None = None,
+            services: GroupResolver | None = None,
+    ):
+        addresses = addresses or address_resolver(logsys_data)
+        services = services or service_resolver(logsys_data)
+        self.__rules = compile_rules(logsys_data, global_last, addresses, services)
+        ## Names which are not addresses or services
+        self.unresolved = addresses.unresolved | services.unresolved
+        self.__indexes = {}
+        for pair in zone_pairs(self.__rules):
+            self.__index(*pair)
+
+    ## Returns first matching rule or None; addresses as strings or integers,
+    ## protocol as name or number, port is destination port (ignored for icmp)
+    def lookup(self, src_zone, dst_zone, src_ip, dst_ip, protocol, port=0) -> Match | None:
+        index = self.__index(src_zone, dst_zone)
+        return _match(index, *index.lookup(ip_to_int(src_ip), ip_to_int(dst_ip), _service_key(protocol, port)))
+
+    ## flows - iterable of tuple(src_zone, dst_zone, src_ip, dst_ip, protocol, port),
+    ## returns list of Match or None in order of flows. With numpy segments
+    ## of all flows of one zone pair are found by one searchsorted per dimension.
+    def lookup_batch(self, flows) -> list[Match | None]:
+        by_pair = {}
+        for i, (src_zone, dst_zone, src_ip, dst_ip, protocol, port) in enumerate(flows):
+            keys = by_pair.setdefault((src_zone, dst_zone), ([], [], [], []))
+            keys[0].append(i)
+            keys[1].append(ip_to_int(src_ip))
+            keys[2].append(ip_to_int(dst_ip))
+            keys[3].append(_service_key(protocol, port))
+        results = [None] * sum(len(keys[0]) for keys in by_pair.values())
+        use_numpy = numpy_available()
+        for pair, (positions, sources, destinations, services) in by_pair.items():
+            index = self.__index(*pair)
+            values = (sources, destinations, services)
+            if use_numpy:
+                segments = zip(*(
+                    _batch_segments(dimension, dimension_values)
+                    for dimension, dimension_values in zip(index.dimensions, values)
+                ))
+            else:
+                segments = (
+                    [dimension.segment(value) for dimension, value in zip(index.dimensions, flow_values)]
+                    for flow_values in zip(*values)
+                )
+            for position, flow_segments, flow_values in zip(positions, segments, zip(*values)):
+                results[position] = _match(index, *index.lookup_segments(flow_segments, flow_values))
+        return results
+
+    def rule_count(self) -> int:
+        return len(self.__rules)
+
+    ## Compiled rules in order of evaluation, see compile_rules
+    def rules(self) -> list[dict]:
+        return self.__rules
+
+    ## Indexes of zone pairs named in rules are built in constructor; other
+    ## pairs (e.g. matched only by global policies) are built on first lookup
+    def __index(self, src_zone, dst_zone) -> _ZonePairIndex:
+        index = self.__indexes.get((src_zone, dst_zone))
+        if index is None:
+            rules = zone_pair_rules(self.__rules, src_zone, dst_zone)
+            index = self.__indexes[(src_zone, dst_zone)] = _ZonePairIndex(
+                [rule['name'] for rule in rules],
+                [rule['action'] for rule in rules],
+                *(
+                    [self.__ANY[key] if key in rule['unresolved'] else rule[key] for rule in rules]
+                    for key in self.DIMENSIONS
+                ),
+                {
+                    i: tuple(rule[key] for key in self.DIMENSIONS)
+                    for i, rule in enumerate(rules) if rule['unresolved']
+                },
+            )
+        return index
+
+
+## Rules in order of evaluation, dicts with name, action, src_zones, dst_zones,
+## global (True for global policy), IntervalSet of sources, destinations
+## and services (of resolved names) and unresolved - dict of dimension
+## (sources...) -> names not resolved, nested in groups included, for
+## dimensions which have them. Disabled rules are left out.
+def compile_rules(
+        logsys_data: dict,
+        global_last: bool = True,
+        addresses: GroupResolver | None = None,
+        services: GroupResolver | None = None,
+) -> list[dict]:
+    addresses = addresses or address_resolver(logsys_data)
+    services = services or service_resolver(logsys_data)
+    zone_rules, global_rules = [], []
+    for name, rule in logsys_data.get('fw rules', {}).items():
+        if 'disable' in rule.get('status', ()):
+            continue
+        src_zones = tuple(rule.get('src_zone') or ('any',))
+        dst_zones = tuple(rule.get('dst_zone') or ('any',))
+        actions = rule.get('term_action') or [None]
+        ## SRX global policy keeps its key when narrowed by "match from-zone":
+        is_global = name.startswith(GLOBAL_PREFIX) or 'any' in src_zones and 'any' in dst_zones
+        compiled = {
+            'name': name, 'action': actions[-1],
+            'src_zones': src_zones, 'dst_zones': dst_zones, 'global': is_global,
+        }
+        compiled['unresolved'] = {}
+        for key, resolver, names in (
+                ('sources', addresses, rule.get('src_IP') or ['any']),
+                ('destinations', addresses, rule.get('dst_IP') or ['any']),
+                ('services', services, rule.get('services') or ['any']),
+        ):
+            compiled[key] = resolver.union(names)
+            if resolver.unresolved:
+                unresolved = sorted({
+                    member for name in names for member in resolver.members(name)
+                    if member in resolver.unresolved
+                })
+                if unresolved:
+                    compiled['unresolved'][key] = unresolved
+        (global_rules if global_last and is_global else zone_rules).append(compiled)
+    return zone_rules + global_rules
+
+
+## Zone pairs named in compiled rules
+def zone_pairs(rules: list[dict]) -> list[tuple[str, str]]:
+    pairs = {}
+    for rule in rules:
+        for src_zone in rule['src_zones']:
+            for dst_zone in rule['dst_zones']:
+                pairs[(src_zone, dst_zone)] = None
+    return list(pairs)
+
+
+## Compiled rules applied to traffic of zone pair, in order of evaluation
+def zone_pair_rules(rules: list[dict], src_zone: str, dst_zone: str) -> list[dict]:
+    return [
+        rule for rule in rules
+        if _zone_matches(rule['src_zones'], src_zone) and _zone_matches(rule['dst_zones'], dst_zone)
+    ]
+
+
+def _zone_matches(zones, zone) -> bool:
+    return zone in zones or 'any' in zones
+
+
+def _match(index: _ZonePairIndex, rule: int, possible: list[int]) -> Match | None:
+    unresolved = tuple(index.names[i] for i in possible)
+    if rule < 0:
+        return Match(None, None, unresolved) if unresolved else None
+    return Match(index.names[rule], index.actions[rule], unresolved)
+
+
+def _service_key(protocol, port) -> int:
+    number = protocol_number(protocol)
+    if number is None:
+        raise ValueError(f'Unknown protocol {protocol!r}')
+    return number * PORTS + (int(port or 0) if number in PORT_PROTOCOLS else 0)
+
+
+## Segments of many values: one searchsorted over interval starts
+def _batch_segments(dimension: _Dimension, values: list[int]) -> list[int]:
+    if not dimension.starts:
+        return [-1] * len(values)
+    return (np.searchsorted(
+        np.array(dimension.starts, dtype=np.int64), np.array(values, dtype=np.int64), side='right'
+    ) - 1).tolist()
@@ -0,0 +1,146 @@
+import sys
+from collections.abc import Mapping
+
+## Compact records for parsed data, used instead of small dicts
+## when parser runs with compact=True.
+## Record is read-write mapping with fixed keys stored in __slots__,
+## so consumers using rule['src_IP'] work without conversion.
+## Keys holding lists are created on first use, scalar keys are
+## present only after they are set - same as in dict built by parser.
+
+
+class Record(Mapping):
+    __slots__ = ()
+    _keys: tuple[str, ...] = ()
+    _list_keys: frozenset[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        slots = [slot for slot in cls.__slots__ if slot != '_extra']
+        cls._key_to_slot = dict(zip(cls._keys, slots))
+
+    def __init__(self):
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+
+    def __getitem__(self, key):
+        slot = self._key_to_slot.get(key)
+        if slot is None:
+            return self.__get_extra(key)
+        value = getattr(self, slot)
+        if value is None:
+            if key not in self._list_keys:
+                raise KeyError(key)
+            value = []
+            setattr(self, slot, value)
+        return value
+
+    ## Unlike record[key], does not create empty list in record
+    def get(self, key, default=None):
+        slot = self._key_to_slot.get(key)
+        if slot is None:
+            extra = getattr(self, '_extra', None)
+            return default if extra is None else extra.get(key, default)
+        value = getattr(self, slot)
+        if value is None:
+            return [] if key in self._list_keys else default
+        return value
+
+    def __setitem__(self, key, value):
+        if type(value) is str:
+            value = sys.intern(value)
+        slot = self._key_to_slot.get(key)
+        if slot is not None:
+            setattr(self, slot, value)
+        elif '_extra' in self.__slots__:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+        else:
+            raise KeyError(f'{type(self).__name__} has no key {key!r}')
+
+    def __iter__(self):
+        for key, slot in self._key_to_slot.items():
+            if key in self._list_keys or getattr(self, slot) is not None:
+                yield key
+        if getattr(self, '_extra', None):
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self.to_dict() == dict(other.items())
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+    ## Dict in the shape built by parser without compact records.
+    ## Lists are shared with record, not copied.
+    def to_dict(self) -> dict:
+        result = {}
+        for key, slot in self._key_to_slot.items():
+            value = getattr(self, slot)
+            if value is None:
+                if key not in self._list_keys:
+                    continue
+                value = []
+            result[key] = value
+        if getattr(self, '_extra', None):
+            result.update(self._extra)
+        return result
+
+    def __get_extra(self, key):
+        extra = getattr(self, '_extra', None)
+        if extra is None or key not in extra:
+            raise KeyError(key)
+        return extra[key]
+
+
+class FwRule(Record):
+    __slots__ = (
+        'src_zone', 'dst_zone', 'src_IP',
+        'dst_IP', 'src_NAT', 'dst_NAT',
+        'term_action', 'description',
+        'services', 'non_term_action',
+        'status',
+    )
+    _keys = __slots__
+    _list_keys = frozenset(__slots__)
+
+
+class Address(Record):
+    __slots__ = ('type', 'address')
+    _keys = __slots__
+
+
+## Application attributes other than below are kept in _extra dict
+class Service(Record):
+    __slots__ = ('protocol', 'source_port', 'destination_port', '_extra')
+    _keys = ('protocol', 'source-port', 'destination-port')
+
+
+class Route(Record):
+    __slots__ = ('dest_IP', 'next_hop_IP', 'next_hop_interface', 'routing_instance')
+    _keys = ('dest IP', 'next hop IP', 'next hop interface', 'routing instance')
+
+
+class InterfaceUnit(Record):
+    __slots__ = ('IP', 'routing_instance')
+    _keys = ('IP', 'routing instance')
+
+
+class StaticNat(Record):
+    __slots__ = ('src_zone', 'orginal_IP', 'NATed_IP')
+    _keys = ('src zone', 'orginal IP', 'NATed IP')
+
+
+## For json.dump(default=...), serializes records as dicts
+def record_to_dict(obj):
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
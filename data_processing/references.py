@@ -0,0 +1,137 @@
+from typing import NamedTuple
+
+## Opt-in reverse-reference index, passed to parser as
+## ParserSrxSets(conf_data, references=ReferenceIndex()) and filled in the
+## same pass as fw_data. Maps objects of every logical system to what
+## references them. Objects are (kind, name):
+##   'address' - addresses and address-sets (one namespace of address book)
+##   'service' - applications and application-sets
+##   'zone'    - security zones of policies and static NAT rule-sets
+## Referrers are Reference(section, name) of fw_data entries: rules
+## ('fw rules'), groups ('address-groups', 'service-groups') and static NATs
+## ('NATs'). Built-in names (any, junos-*) are referenced, but not defined,
+## so they are never reported as unused.
+##
+## Defined objects without referrers are kept up to date while indexing,
+## so reports walk only their answer, not rules of fw_data.
+
+
+class Reference(NamedTuple):
+    section: str
+    name: str
+
+
+class ReferenceIndex():
+    ## Kind of objects by fw_data section which defines them:
+    KINDS = {
+        'addresses': 'address', 'address-groups': 'address',
+        'services': 'service', 'service-groups': 'service',
+    }
+    GROUP_SECTIONS = ('address-groups', 'service-groups')
+    ## Rule keys which reference objects:
+    RULE_KEYS = {
+        'src_IP': 'address', 'dst_IP': 'address', 'services': 'service',
+        'src_zone': 'zone', 'dst_zone': 'zone',
+    }
+
+    def __init__(self):
+        ## (logsys, kind, name) -> {(section, name): None}, referrers in order of config
+        self.__referrers = {}
+        ## (logsys, kind, group) -> {member: None}
+        self.__members = {}
+        ## (logsys, kind, name) -> section which defines object
+        self.__defined = {}
+        ## logsys -> {(kind, name): section}, defined objects without referrers
+        self.__unused = {}
+
+    ## Called by parser:
+    def define(self, logsys: str, section: str, name: str):
+        kind = self.KINDS[section]
+        key = logsys, kind, name
+        if key not in self.__defined:
+            self.__defined[key] = section
+            if key not in self.__referrers:
+                self.__unused.setdefault(logsys, {})[kind, name] = section
+
+    def add(self, logsys: str, kind: str, name: str, section: str, referrer: str):
+        key = logsys, kind, name
+        referrers = self.__referrers.get(key)
+        if referrers is None:
+            referrers = self.__referrers[key] = {}
+            if key in self.__defined:
+                del self.__unused[logsys][kind, name]
+        ## Plain tuple, Reference is made only for answers:
+        referrers[section, referrer] = None
+        if section in self.GROUP_SECTIONS:
+            self.__members.setdefault((logsys, kind, referrer), {})[name] = None
+
+    ## Value of rule key, as in fw_data (src_IP, services, dst_zone...)
+    def add_rule(self, logsys: str, rule_name: str, key: str, value: str):
+        kind = self.RULE_KEYS.get(key)
+        if kind is not None and not (kind == 'zone' and value == 'any'):
+            self.add(logsys, kind, value, 'fw rules', rule_name)
+
+    ## Adds index of other logical systems, e.g. filled by parser of other shard
+    def merge(self, other: 'ReferenceIndex'):
+        overlap = self.logical_systems() & other.logical_systems()
+        if overlap:
+            raise ValueError(f'Logical systems {sorted(overlap)} are in both indexes')
+        self.__referrers.update(other.__referrers)
+        self.__members.update(other.__members)
+        self.__defined.update(other.__defined)
+        self.__unused.update(other.__unused)
+
+    ## Removes everything of given logical systems, to fill them again
+    def clear(self, logical_systems):
+        logical_systems = set(logical_systems)
+        for index in (self.__referrers, self.__members, self.__defined):
+            for key in [key for key in index if key[0] in logical_systems]:
+                del index[key]
+        for logsys in logical_systems:
+            self.__unused.pop(logsys, None)
+
+    def logical_systems(self) -> set[str]:
+        return {key[0] for key in self.__referrers} | {key[0] for key in self.__defined}
+
+    ## Entries referencing object directly
+    def referrers(self, logsys: str, kind: str, name: str) -> list[Reference]:
+        return [Reference(*referrer) for referrer in self.__referrers.get((logsys, kind, name), ())]
+
+    ## Entries referencing object directly or through nested groups,
+    ## groups on the way included; nearest first
+    def blast_radius(self, logsys: str, kind: str, name: str) -> list[Reference]:
+        seen = {}
+        queue = [name]
+        for member in queue:
+            for referrer in self.__referrers.get((logsys, kind, member), ()):
+                if referrer not in seen:
+                    seen[referrer] = None
+                    if referrer[0] in self.GROUP_SECTIONS:
+                        queue.append(referrer[1])
+        return [Reference(*referrer) for referrer in seen]
+
+    ## Defined objects and groups not referenced by anything. With transitive,
+    ## also objects referenced only by unused groups, nested to any depth;
+    ## groups which reference only each other in cycle are not found.
+    def unused(self, logsys: str = 'root', transitive: bool = False) -> list[Reference]:
+        unused = self.__unused.get(logsys, {})
+        result = [Reference(section, name) for (_, name), section in unused.items()]
+        if not transitive:
+            return result
+        dead = set(unused)
+        ## Unused referrers of object, unused when it has no other:
+        dead_referrers = {}
+        queue = [(kind, name) for (kind, name), section in unused.items() if section in self.GROUP_SECTIONS]
+        for kind, group in queue:
+            for member in self.__members.get((logsys, kind, group), ()):
+                key = logsys, kind, member
+                if (kind, member) in dead or key not in self.__defined:
+                    continue
+                dead_referrers[key] = dead_referrers.get(key, 0) + 1
+                if dead_referrers[key] == len(self.__referrers[key]):
+                    dead.add((kind, member))
+                    section = self.__defined[key]
+                    result.append(Reference(section, member))
+                    if section in self.GROUP_SECTIONS:
+                        queue.append((kind, member))
+        return result
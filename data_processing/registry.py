@@ -0,0 +1,102 @@
+import importlib
+
+## Config readers, parsers and writers by name, e.g. parsers_factory('srx_set', ...).
+## Classes are registered as "module:attribute" strings and imported when
+## first requested, so reading text file does not import netmiko and
+## writing JSON does not import openpyxl or pyarrow.
+## Other packages add their own through entry points, in groups
+## bricklayer.config_data, bricklayer.parsers and bricklayer.writers:
+##   [project.entry-points."bricklayer.parsers"]
+##   asa = "my_package.parsers:ParserAsa"
+## Entry points are looked up only for names not registered here.
+
+
+class Registry():
+    def __init__(self, kind: str, entry_point_group: str):
+        self.kind = kind
+        self.entry_point_group = entry_point_group
+        self.__targets = {}
+        self.__defaults = {}
+        self.__loaded = {}
+        self.__entry_points_loaded = False
+
+    ## target - class (or other callable), or "module:attribute" string
+    ## imported on first use; defaults - keyword arguments passed on create()
+    def register(self, name: str, target, **defaults):
+        self.__targets[name] = target
+        self.__defaults[name] = defaults
+        self.__loaded.pop(name, None)
+
+    def get(self, name: str):
+        loaded = self.__loaded.get(name)
+        if loaded is not None:
+            return loaded
+        if name not in self.__targets:
+            self.__load_entry_points()
+        if name not in self.__targets:
+            raise ValueError(f'Unknown {self.kind} {name!r}, available: {", ".join(self.names())}')
+        loaded = self.__loaded[name] = self.__import(self.__targets[name])
+        return loaded
+
+    def create(self, name: str, *args, **kwargs):
+        target = self.get(name)
+        return target(*args, **{**self.__defaults[name], **kwargs})
+
+    def names(self) -> list[str]:
+        self.__load_entry_points()
+        return list(self.__targets)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names()
+
+    ## Entry points are registered without importing them
+    def __load_entry_points(self):
+        if self.__entry_points_loaded:
+            return
+        self.__entry_points_loaded = True
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=self.entry_point_group):
+            if entry_point.name not in self.__targets:
+                self.register(entry_point.name, entry_point)
+
+    def __import(self, target):
+        if isinstance(target, str):
+            module, _, attribute = target.partition(':')
+            return getattr(importlib.import_module(module), attribute)
+        ## importlib.metadata.EntryPoint:
+        if hasattr(target, 'load') and hasattr(target, 'group'):
+            return target.load()
+        return target
+
+
+config_readers = Registry('config reader', 'bricklayer.config_data')
+config_readers.register('txt', 'data_processing.config_data:ConfigDataTXT')
+config_readers.register('ssh', 'data_processing.config_data:ConfigDataSSH')
+
+parsers = Registry('parser', 'bricklayer.parsers')
+parsers.register('srx_set', 'data_processing.parsers:ParserSrxSets')
+parsers.register('srx_set_parallel', 'data_processing.parsers:ParserSrxSetsParallel')
+parsers.register('srx_set_incremental', 'data_processing.parsers:ParserSrxSetsIncremental')
+parsers.register('srx_hierarchical', 'data_processing.parsers:ParserSrxHierarchical')
+parsers.register('fortinet', 'data_processing.parsers:ParserFortinet')
+
+writers = Registry('writer', 'bricklayer.writers')
+writers.register('json', 'data_processing.data_writers:DataWriterJson')
+writers.register('json_compact', 'data_processing.data_writers:DataWriterJson', compact=True)
+writers.register('ndjson', 'data_processing.data_writers:DataWriterNdjson')
+writers.register('excel', 'data_processing.data_writers:DataWriterExcel')
+writers.register('parquet', 'data_processing.data_writers:DataWriterParquet')
+writers.register('arrow', 'data_processing.data_writers:DataWriterArrow')
+writers.register('sqlite', 'data_processing.data_writers:DataWriterSqlite')
+
+
+def config_data_factory(data_type, *args, **kwargs):
+    return config_readers.create(data_type, *args, **kwargs)
+
+
+def parsers_factory(vendor, conf_getter, *args, **kwargs):
+    return parsers.create(vendor, conf_getter, *args, **kwargs)
+
+
+def writers_factory(data_type, *args, **kwargs):
+    return writers.create(data_type, *args, **kwargs)
@@ -0,0 +1,213 @@
+from typing import NamedTuple
+from data_processing._numpy import np, numpy_available
+from data_processing.isip import int_to_ipv4, ipv4_network, ipv4_ranges_batch, ip_to_int
+
+
+## Longest prefix match over routes of parsed fw_data:
+##   tables = routing_tables(fw_data)
+##   tables[('root', 'master')].lookup('10.1.2.3')
+##   -> (RouteEntry('10.1.0.0/16', 'static', '192.0.2.1', None),)
+## One table per logical system and routing instance; routes and interfaces
+## without routing instance are in DEFAULT_INSTANCE. Interface addresses give
+## connected routes: 'direct' for network of interface, 'local' for address itself.
+## Table is path-compressed binary trie (radix trie) of prefixes, single
+## lookup walks at most one node per prefix length present on the path.
+## For batch lookups trie is flattened to sorted disjoint address ranges
+## with route of each range; addresses are then found by one searchsorted.
+## Next hop IP of static route is not resolved to interface.
+
+DEFAULT_INSTANCE = 'master'
+## Route preference like Junos, lower wins for same prefix; equal ones are kept all (ECMP)
+PREFERENCES = {'direct': 0, 'local': 0, 'static': 5}
+OTHER_PREFERENCE = 170
+
+
+class RouteEntry(NamedTuple):
+    destination: str
+    type: str
+    next_hop_ip: str | None
+    next_hop_interface: str | None
+
+
+class _Node():
+    __slots__ = ('network', 'length', 'entry', 'children')
+
+    def __init__(self, network: int, length: int, entry: int | None):
+        self.network = network
+        self.length = length
+        self.entry = entry
+        self.children = [None, None]
+
+
+class RoutingTable():
+    def __init__(self):
+        self.__root = _Node(0, 0, None)
+        ## Routes of one prefix (best preference, ECMP) by entry id:
+        self.__entries: list[tuple[RouteEntry, ...]] = []
+        self.__prefixes: dict[tuple[int, int], int] = {}
+        self.__ranges = None
+        ## Routes which destination is not IPv4 network (e.g. address object name)
+        self.skipped: list[RouteEntry] = []
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def add(self, route: RouteEntry):
+        network = ipv4_network(route.destination)
+        if network is None:
+            self.skipped.append(route)
+            return
+        network, mask = network
+        length = mask.bit_count()
+        entry = self.__prefixes.get((network, length))
+        if entry is not None:
+            routes = self.__entries[entry]
+            old, new = _preference(routes[0]), _preference(route)
+            if new < old:
+                self.__entries[entry] = (route,)
+            elif new == old and route not in routes:
+                self.__entries[entry] = routes + (route,)
+            return
+        entry = self.__prefixes[(network, length)] = len(self.__entries)
+        self.__entries.append((route,))
+        self.__insert(network, length, entry)
+        self.__ranges = None
+
+    ## Routes of longest matching prefix, empty tuple if no route;
+    ## address as string or integer
+    def lookup(self, address) -> tuple[RouteEntry, ...]:
+        entry = self.lookup_entry(ip_to_int(address))
+        return () if entry < 0 else self.__entries[entry]
+
+    ## Entry id of longest matching prefix for integer address, -1 if no route
+    def lookup_entry(self, ip: int) -> int:
+        node = self.__root
+        best = -1
+        while node is not None:
+            length = node.length
+            if length and (ip ^ node.network) >> (32 - length):
+                break
+            if node.entry is not None:
+                best = node.entry
+            if length == 32:
+                break
+            node = node.children[(ip >> (31 - length)) & 1]
+        return best
+
+    ## Entry ids for many addresses (list or array of integers, or strings),
+    ## -1 where there is no route; routes of entry are given by entry(id)
+    def lookup_batch(self, addresses):
+        if not numpy_available():
+            raise ImportError('RoutingTable.lookup_batch requires numpy: pip install numpy')
+        addresses = np.asarray(addresses)
+        if addresses.dtype.kind in 'USO':
+            valid, addresses, end = ipv4_ranges_batch(addresses)
+            if not (valid & (addresses == end)).all():
+                raise ValueError('Addresses must be IPv4 addresses without mask')
+        starts, entries = self.__flatten()
+        return entries[np.searchsorted(starts, addresses.astype(np.int64), side='right') - 1]
+
+    def entry(self, entry: int) -> tuple[RouteEntry, ...]:
+        return () if entry < 0 else self.__entries[entry]
+
+    def routes(self) -> list[RouteEntry]:
+        return [route for routes in self.__entries for route in routes]
+
+    def __insert(self, network: int, length: int, entry: int):
+        node = self.__root
+        while True:
+            if node.length == length:
+                node.entry = entry
+                return
+            bit = (network >> (31 - node.length)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _Node(network, length, entry)
+                return
+            common = min(child.length, length, 32 - (child.network ^ network).bit_length())
+            if common == child.length:
+                node = child
+                continue
+            ## Split edge to child at last common bit:
+            if common == length:
+                branch = _Node(network, length, entry)
+            else:
+                branch = _Node(network & ~(0xFFFFFFFF >> common), common, None)
+                branch.children[(network >> (31 - common)) & 1] = _Node(network, length, entry)
+            branch.children[(child.network >> (31 - common)) & 1] = child
+            node.children[bit] = branch
+            return
+
+    ## Starts of disjoint address ranges and entry id of each range (-1 - no route),
+    ## built from prefixes sorted by start, nested ones after their parents
+    def __flatten(self):
+        if self.__ranges is not None:
+            return self.__ranges
+        starts, entries = [0], [-1]
+
+        def set_from(start, entry):
+            if start > 0xFFFFFFFF:
+                return
+            if starts[-1] == start:
+                entries[-1] = entry
+            else:
+                starts.append(start)
+                entries.append(entry)
+
+        open_prefixes = []
+        for (network, length), entry in sorted(self.__prefixes.items(), key=lambda item: item[0]):
+            while open_prefixes and open_prefixes[-1][0] < network:
+                end = open_prefixes.pop()[0]
+                set_from(end + 1, open_prefixes[-1][1] if open_prefixes else -1)
+            open_prefixes.append((network | (0xFFFFFFFF >> length), entry))
+            set_from(network, entry)
+        while open_prefixes:
+            end = open_prefixes.pop()[0]
+            set_from(end + 1, open_prefixes[-1][1] if open_prefixes else -1)
+        self.__ranges = np.array(starts, dtype=np.int64), np.array(entries, dtype=np.int64)
+        return self.__ranges
+
+
+## Tables by tuple(logical system, routing instance). Interfaces are named
+## "interface.unit" (SRX); with interface_units=False by interface only (FortiGate).
+def routing_tables(fw_data: dict, interface_units: bool = True) -> dict[tuple[str, str], RoutingTable]:
+    tables = {}
+
+    def table(logsys, instance):
+        key = (logsys, instance or DEFAULT_INSTANCE)
+        if key not in tables:
+            tables[key] = RoutingTable()
+        return tables[key]
+
+    for logsys, logsys_data in fw_data.items():
+        for intf, units in logsys_data.get('interfaces', {}).items():
+            for unit, unit_data in units.items():
+                name = f'{intf}.{unit}' if interface_units else intf
+                for route in _connected_routes(unit_data.get('IP'), name):
+                    table(logsys, unit_data.get('routing instance')).add(route)
+        addresses = logsys_data.get('addresses', {})
+        for route_type, routes in logsys_data.get('routes', {}).items():
+            for route in routes:
+                destination = route.get('dest IP')
+                ## FortiGate route to address object:
+                if destination in addresses:
+                    destination = addresses[destination].get('address') or destination
+                table(logsys, route.get('routing instance')).add(RouteEntry(
+                    destination, route_type, route.get('next hop IP'), route.get('next hop interface'),
+                ))
+    return tables
+
+
+def _connected_routes(address: str | None, interface: str) -> list[RouteEntry]:
+    if not address or ipv4_network(address) is None:
+        return []
+    network, mask = ipv4_network(address)
+    length = mask.bit_count()
+    routes = [RouteEntry(f'{address.partition("/")[0]}/32', 'local', None, interface)]
+    if length < 32:
+        routes.append(RouteEntry(f'{int_to_ipv4(network)}/{length}', 'direct', None, interface))
+    return routes
+
+
+def _preference(route: RouteEntry) -> int:
+    return PREFERENCES.get(route.type, OTHER_PREFERENCE)
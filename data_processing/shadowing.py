@@ -0,0 +1,186 @@
+from typing import NamedTuple
+from data_processing._numpy import np, numpy_available
+from data_processing.groups import GroupResolver
+from data_processing.policy_lookup import compile_rules, zone_pair_rules, zone_pairs
+
+
+## Anomalies of rules within each zone pair, rules in order of evaluation
+## (see policy_lookup.compile_rules):
+##   shadowed   - earlier rule matches all traffic of the rule, with other action;
+##                rule never matches
+##   redundant  - earlier rule matches all its traffic with the same action;
+##                rule can be removed, equal=True if both match the same traffic
+##   correlated - rules match partly the same traffic with different actions,
+##                neither covers the other; order of them decides
+## Every rule is compared with single earlier rules: rule covered only by
+## union of several earlier rules is not reported. Rules matching nothing
+## (unresolved FQDN etc.) are left out. Global policies are compared with
+## each other only in zone pair ('any', 'any').
+##
+## Source, destination and service of rules are kept in NumPy arrays of
+## hulls (lowest, highest value) per zone pair. Rules are sorted by lower
+## bound in dimension where they overlap least and compared in blocks: for block
+## of rules only rules which hull can overlap in that dimension are taken
+## (wide rules are in separate blocks, so they do not widen others),
+## then containment and overlap in all dimensions is tested on matrix of
+## block x candidates. Hull tests are exact for single intervals, pairs
+## with rules of several intervals are checked again on IntervalSets.
+
+FINDING_TYPES = ('shadowed', 'redundant', 'correlated')
+DIMENSIONS = ('sources', 'destinations', 'services')
+BLOCK_SIZE = 256
+## Rule is wide in sorted dimension if it is this many times wider than median rule
+WIDE_FACTOR = 16
+
+
+class Finding(NamedTuple):
+    src_zone: str
+    dst_zone: str
+    type: str
+    rule: str
+    other: str
+    equal: bool
+
+
+def analyze(
+        logsys_data: dict,
+        global_last: bool = True,
+        correlated: bool = True,
+        addresses: GroupResolver | None = None,
+        services: GroupResolver | None = None,
+) -> list[Finding]:
+    if not numpy_available():
+        raise ImportError('Rule analysis requires numpy: pip install numpy')
+    rules = compile_rules(logsys_data, global_last, addresses, services)
+    findings = []
+    for src_zone, dst_zone in zone_pairs(rules):
+        pair_rules = zone_pair_rules(rules, src_zone, dst_zone)
+        compare_global = (src_zone, dst_zone) == ('any', 'any')
+        for finding_type, rule, other, equal in analyze_rules(pair_rules, correlated, compare_global):
+            findings.append(Finding(src_zone, dst_zone, finding_type, rule['name'], other['name'], equal))
+    return findings
+
+
+## Findings for list of compiled rules of one zone pair:
+## tuple(type, rule, earlier rule, equal), ordered by rule
+def analyze_rules(rules: list[dict], correlated: bool = True, compare_global: bool = True) -> list[tuple]:
+    if not numpy_available():
+        raise ImportError('Rule analysis requires numpy: pip install numpy')
+    rules = [rule for rule in rules if all(rule[dimension] for dimension in DIMENSIONS)]
+    if len(rules) < 2:
+        return []
+    arrays = _RuleArrays(rules)
+    covering, correlations = [], []
+    for earlier, later in arrays.overlapping_pairs(compare_global):
+        covers, covered_by, overlaps = arrays.relations(earlier, later, rules)
+        covering.append(np.stack([later[covers], earlier[covers], covered_by[covers]]))
+        if correlated:
+            correlation = overlaps & ~covers & ~covered_by & (arrays.actions[earlier] != arrays.actions[later])
+            correlations.append(np.stack([later[correlation], earlier[correlation]]))
+    results = []
+    covered = np.zeros(len(rules), dtype=bool)
+    if covering:
+        later, earlier, equal = np.concatenate(covering, axis=1)
+        ## First (earliest) covering rule of every covered rule:
+        order = np.lexsort((earlier, later))
+        later, earlier, equal = later[order], earlier[order], equal[order]
+        first = np.flatnonzero(np.diff(later, prepend=-1) != 0)
+        covered[later[first]] = True
+        for j, i, is_equal in zip(later[first].tolist(), earlier[first].tolist(), equal[first].tolist()):
+            finding_type = 'redundant' if rules[i]['action'] == rules[j]['action'] else 'shadowed'
+            results.append((j, i, finding_type, bool(is_equal)))
+    if correlations:
+        later, earlier = np.concatenate(correlations, axis=1)
+        ## Dead rule is reported once, as shadowed or redundant:
+        alive = ~covered[later]
+        results += [(j, i, 'correlated', False) for j, i in zip(later[alive].tolist(), earlier[alive].tolist())]
+    results.sort(key=lambda result: (result[0], result[1]))
+    return [(finding_type, rules[j], rules[i], equal) for j, i, finding_type, equal in results]
+
+
+class _RuleArrays():
+    def __init__(self, rules: list[dict]):
+        count = len(rules)
+        self.low = np.empty((len(DIMENSIONS), count), dtype=np.int64)
+        self.high = np.empty((len(DIMENSIONS), count), dtype=np.int64)
+        ## Rule has single interval in every dimension:
+        self.single = np.array(
+            [all(len(rule[dimension]) == 1 for dimension in DIMENSIONS) for rule in rules], dtype=bool,
+        )
+        for d, dimension in enumerate(DIMENSIONS):
+            hulls = [rule[dimension].hull() for rule in rules]
+            self.low[d] = [hull[0] for hull in hulls]
+            self.high[d] = [hull[1] for hull in hulls]
+        self.is_global = np.array([rule['global'] for rule in rules], dtype=bool)
+        codes = {}
+        self.actions = np.array([codes.setdefault(rule['action'], len(codes)) for rule in rules])
+
+    ## Pairs (earlier, later) of rule indexes which hulls overlap in all
+    ## dimensions, as arrays, one pair of arrays per block
+    def overlapping_pairs(self, compare_global: bool):
+        low, high = self.low, self.high
+        ## Sort by dimension with fewest overlapping pairs of hulls; overlaps of
+        ## rule are rules starting before its end minus rules ending before its start:
+        overlaps = [
+            (np.searchsorted(np.sort(low[d]), high[d], side='right')
+             - np.searchsorted(np.sort(high[d]), low[d], side='left')).sum()
+            for d in range(len(DIMENSIONS))
+        ]
+        d = int(np.argmin(overlaps))
+        order = np.argsort(low[d], kind='stable')
+        sorted_low = low[d][order]
+        ## Wide rules (e.g. any) would make candidates of their block all rules,
+        ## they are put in blocks of their own:
+        width = high[d][order] - sorted_low
+        wide = width > WIDE_FACTOR * max(int(np.median(width)), 1)
+        blocks = [order[~wide][start:start + BLOCK_SIZE] for start in range(0, int((~wide).sum()), BLOCK_SIZE)]
+        blocks += [order[wide][start:start + BLOCK_SIZE] for start in range(0, int(wide.sum()), BLOCK_SIZE)]
+        for block in blocks:
+            end = np.searchsorted(sorted_low, high[d][block].max(), side='right')
+            candidates = order[:end]
+            candidates = candidates[high[d][candidates] >= low[d][block].min()]
+            ## Earlier rules only, each pair is taken once:
+            matrix = candidates[None, :] < block[:, None]
+            if not compare_global:
+                matrix &= ~(self.is_global[candidates][None, :] & self.is_global[block][:, None])
+            for dimension in range(len(DIMENSIONS)):
+                matrix &= low[dimension][candidates][None, :] <= high[dimension][block][:, None]
+                matrix &= high[dimension][candidates][None, :] >= low[dimension][block][:, None]
+            later, earlier = np.nonzero(matrix)
+            if len(later):
+                yield candidates[earlier], block[later]
+
+    ## For pairs of rules with overlapping hulls: (earlier covers later,
+    ## later covers earlier, rules overlap) as bool arrays. Hull tests decide
+    ## pairs of rules with single intervals, other pairs are checked on IntervalSets.
+    def relations(self, earlier, later, rules: list[dict]):
+        low, high = self.low, self.high
+        covers = ((low[:, earlier] <= low[:, later]) & (high[:, earlier] >= high[:, later])).all(axis=0)
+        covered_by = ((low[:, later] <= low[:, earlier]) & (high[:, later] >= high[:, earlier])).all(axis=0)
+        overlaps = np.ones(len(earlier), dtype=bool)
+        single_earlier, single_later = self.single[earlier], self.single[later]
+        undecided = np.flatnonzero(
+            covers & ~single_earlier | covered_by & ~single_later | ~(single_earlier & single_later)
+        )
+        for k, i, j in zip(undecided.tolist(), earlier[undecided].tolist(), later[undecided].tolist()):
+            covers[k] = covers[k] and _covers(rules[i], rules[j])
+            covered_by[k] = covered_by[k] and _covers(rules[j], rules[i])
+            overlaps[k] = _intersects(rules[i], rules[j])
+        return covers, covered_by, overlaps
+
+
+def _covers(rule: dict, other: dict) -> bool:
+    return all(rule[dimension].covers(other[dimension]) for dimension in DIMENSIONS)
+
+
+def _intersects(rule: dict, other: dict) -> bool:
+    return all(rule[dimension].intersects(other[dimension]) for dimension in DIMENSIONS)
+
+
+## Counts of findings by zone pair and type
+def summarize(findings: list[Finding]) -> dict:
+    summary = {}
+    for finding in findings:
+        counts = summary.setdefault((finding.src_zone, finding.dst_zone), {})
+        counts[finding.type] = counts.get(finding.type, 0) + 1
+    return summary
@@ -1,40 +1,245 @@
+import argparse
+import fnmatch
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple
 from data_processing.data_processors import ProcessSRX
-from data_processing.parsers import parsers_factory
-from data_processing.config_data import config_data_factory
-from data_processing.data_writers import writers_factory
+from data_processing.registry import config_data_factory, parsers_factory, writers_factory
+from data_processing.parse_cache import ParseCache
+from data_processing.parse_stats import ParseStats
 
 
 class Generate():
-    def __call__(self, input_data_type, vendor, config_getter_args):
+    ## cache: optional ParseCache, used for 'txt' input; reader arguments
+    ## (line_type, raise_errors...) are passed to it and are part of its key
+    ## stats: True - collect ParseStats of every parse: self.last_stats of
+    ## last parse, self.stats merged of all parses so far;
+    ## 'allocations' - with allocated memory too; cache is skipped then
+    def __init__(self, cache=None, stats=False):
+        self.__cache = cache
+        self.__collect_stats = stats
+        self.stats = None
+        self.last_stats = None
+
+    def __call__(self, input_data_type, vendor, config_getter_args, parser_args=None):
+        if self.__cache is not None and input_data_type == 'txt' and not self.__collect_stats:
+            reader_args = {key: value for key, value in config_getter_args.items() if key != 'conf_file'}
+            return self.__cache.get_or_parse(
+                config_getter_args['conf_file'], vendor, parser_args, reader_args
+            )
+
         conf_getter = config_data_factory(input_data_type, **config_getter_args)
 
-        parser = parsers_factory(vendor, conf_getter)
+        parser_args = dict(parser_args or {})
+        if self.__collect_stats:
+            self.last_stats = ParseStats(track_allocations=self.__collect_stats == 'allocations')
+            parser_args['stats'] = self.last_stats
+        parser = parsers_factory(vendor, conf_getter, **parser_args)
         parser.run()
+        if self.__collect_stats:
+            if self.stats is None:
+                self.stats = ParseStats(track_allocations=self.last_stats.track_allocations)
+            self.stats.merge(self.last_stats)
 
         hostname, fwdata = parser.get_data()
         return hostname, fwdata
 
-    def write_data_to_file(self, fw_data, path, data_type):
-        writer = writers_factory(data_type) #obj init
+    def write_data_to_file(self, fw_data, path, data_type, writer_args=None):
+        writer = writers_factory(data_type, **(writer_args or {})) #obj init
         writer.write(path, fw_data)
 
+    ## JSON report of stats of all parses
+    def write_stats_report(self, path):
+        if self.stats is None:
+            raise Exception('No parse stats, create Generate(stats=True) to collect them')
+        self.stats.write_json(path)
 
 
-args_generate = {
-    'input_data_type': 'txt',
-    'vendor': 'srx_set',
-    'config_getter_args': {
-        'conf_file': r'/home/obojetnie/Projekty_Python/Bricklayer/config_files/srx_sets_2.txt'
-    }
+## Output of every config file is named after the file: <name><suffix>;
+## parquet and arrow write directory, sqlite one database for all files
+OUTPUT_SUFFIXES = {
+    'json': '.json', 'json_compact': '.json', 'ndjson': '.ndjson',
+    'excel': '.xlsx', 'parquet': '', 'arrow': '',
 }
+HOSTNAME_WRITERS = ('parquet', 'arrow', 'sqlite')
 
-generate = Generate()
-hostname, fwdata = generate(**args_generate)
 
-args_write = {
-    'path': f'/home/obojetnie/Projekty_Python/Bricklayer/config_files/{hostname}.json',
-    'data_type': 'json',
-    'fw_data': fwdata
-}
+class BatchResult(NamedTuple):
+    conf_file: str
+    output: str | None
+    hostname: str
+    size: int
+    seconds: float
+    error: str | None
+    fw_data: dict | None
+
+
+## Config files of given paths: files, glob patterns and directories,
+## searched recursively for file names matching pattern; each file once
+def find_config_files(paths: list[str], pattern: str = '*') -> list[str]:
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if fnmatch.fnmatch(name, pattern):
+                        files[os.path.join(root, name)] = None
+        elif os.path.isfile(path):
+            files[path] = None
+        else:
+            for match in sorted(glob.glob(path, recursive=True)):
+                if os.path.isfile(match):
+                    files[match] = None
+    return list(files)
+
+
+## Parses one file in worker process and writes its output there,
+## so parsed data is not sent back; without output fw_data is returned.
+## Errors are returned as traceback text, batch goes on; file which cannot
+## be read fails, it is not parsed as empty config.
+def _process_file(conf_file, vendor, output, data_type, parser_args, cache_dir) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        size = os.path.getsize(conf_file)
+        generate = Generate(ParseCache(cache_dir) if cache_dir else None)
+        hostname, fw_data = generate('txt', vendor, {'conf_file': conf_file, 'raise_errors': True}, parser_args)
+        if output is not None:
+            writer_args = {'hostname': _device_name(hostname, conf_file)} if data_type in HOSTNAME_WRITERS else None
+            generate.write_data_to_file(fw_data, output, data_type, writer_args)
+            fw_data = None
+    except Exception:
+        return BatchResult(conf_file, output, '', 0, time.perf_counter() - start, traceback.format_exc(), None)
+    return BatchResult(conf_file, output, hostname, size, time.perf_counter() - start, None, fw_data)
+
+
+## Device key of writers: hostname, or file name without extension
+## for configs without host-name
+def _device_name(hostname: str, conf_file: str) -> str:
+    return hostname or os.path.splitext(os.path.basename(conf_file))[0]
+
+
+## Output path of every file, names made unique with -2, -3... suffix
+def _output_paths(files: list[str], output: str, data_type: str) -> dict[str, str]:
+    suffix = OUTPUT_SUFFIXES[data_type]
+    used = set()
+    outputs = {}
+    for conf_file in files:
+        name = os.path.splitext(os.path.basename(conf_file))[0]
+        unique_name, i = name, 1
+        while unique_name in used:
+            i += 1
+            unique_name = f'{name}-{i}'
+        used.add(unique_name)
+        outputs[conf_file] = os.path.join(output, unique_name + suffix)
+    return outputs
+
+
+## Parses files in process pool (workers: processes, all CPUs if None,
+## 1 - in this process), yields BatchResult of every file when it is done.
+## Output is written by worker, to directory output, named after the file;
+## sqlite database (output is its path) is written here, one file at a time.
+## Worker killed (e.g. out of memory) breaks the pool: files not done by then
+## are failed results, batch is reported to the end.
+def run_batch(
+        files: list[str], vendor: str, output: str,
+        data_type: str = 'json', workers: int | None = None,
+        parser_args: dict | None = None, cache_dir: str | None = None
+):
+    if data_type == 'sqlite':
+        outputs = dict.fromkeys(files)
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+    else:
+        if data_type not in OUTPUT_SUFFIXES:
+            raise ValueError(f'Unknown output data type {data_type!r}')
+        outputs = _output_paths(files, output, data_type)
+        os.makedirs(output, exist_ok=True)
+
+    def written(result):
+        if data_type != 'sqlite' or result.error is not None:
+            return result
+        try:
+            writers_factory('sqlite', hostname=_device_name(result.hostname, result.conf_file)).write(
+                output, result.fw_data
+            )
+        except Exception:
+            return result._replace(error=traceback.format_exc(), fw_data=None)
+        return result._replace(output=output, fw_data=None)
+
+    if workers == 1:
+        for conf_file in files:
+            yield written(_process_file(conf_file, vendor, outputs[conf_file], data_type, parser_args, cache_dir))
+        return
+    ## Biggest files first, so they do not finish last:
+    by_size = sorted(files, key=lambda f: os.path.getsize(f) if os.path.isfile(f) else 0, reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                _process_file, conf_file, vendor, outputs[conf_file], data_type, parser_args, cache_dir
+            ): conf_file
+            for conf_file in by_size
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                conf_file = futures[future]
+                result = BatchResult(conf_file, outputs[conf_file], '', 0, 0.0, traceback.format_exc(), None)
+            yield written(result)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description='Parse firewall config files and write parsed data, one output per file'
+    )
+    arg_parser.add_argument('paths', nargs='+', help='config files, glob patterns or directories')
+    arg_parser.add_argument('-v', '--vendor', default='srx_set', help='parser, e.g. srx_set, srx_hierarchical, fortinet')
+    arg_parser.add_argument('-o', '--output', default='output', help='output directory, database file for sqlite')
+    arg_parser.add_argument('-f', '--format', default='json', choices=[*OUTPUT_SUFFIXES, 'sqlite'])
+    arg_parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes, all CPUs by default')
+    arg_parser.add_argument('--pattern', default='*', help='file names searched in directories')
+    arg_parser.add_argument('--compact', action='store_true', help='parse to compact records')
+    arg_parser.add_argument('--cache', default=None, help='parse cache directory')
+    args = arg_parser.parse_args(argv)
+
+    files = find_config_files(args.paths, args.pattern)
+    if not files:
+        print('no config files found')
+        return 1
+    parser_args = {'compact': True} if args.compact else None
+
+    start = time.perf_counter()
+    done = size = 0
+    failed = []
+    for result in run_batch(files, args.vendor, args.output, args.format, args.workers, parser_args, args.cache):
+        done += 1
+        elapsed = time.perf_counter() - start
+        if result.error is None:
+            size += result.size
+            status = f'{result.hostname or "-"} -> {result.output} ({result.seconds:.2f} s)'
+        else:
+            failed.append(result)
+            status = f'FAILED: {result.error.strip().splitlines()[-1]}'
+        print(
+            f'[{done}/{len(files)}] {result.conf_file}: {status} | '
+            f'{done / elapsed:.1f} files/s, {size / 1024**2 / elapsed:.1f} MB/s'
+        )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f'{len(files) - len(failed)} parsed, {len(failed)} failed, '
+        f'{size / 1024**2:.1f} MB in {elapsed:.2f} s ({len(files) / elapsed:.1f} files/s)'
+    )
+    for result in failed:
+        print(f'failed {result.conf_file}:\n{result.error}')
+    return 1 if failed else 0
+
 
-generate.write_data_to_file(**args_write)
+if __name__ == '__main__':
+    sys.exit(main())
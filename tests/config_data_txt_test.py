@@ -0,0 +1,47 @@
+import gzip
+import lzma
+import pytest
+from data_processing.config_data import ConfigDataTXT
+
+LINES = [
+    'set system host-name SRX-SAMPLE\n',
+    'set security address-book global address net1 10.1.1.0/24\n',
+    '\n',
+    'set security policies from-zone trust to-zone untrust policy P1 then permit\n',
+    'set routing-options static route 0.0.0.0/0 next-hop 192.168.0.1',  # no newline at end
+]
+
+
+@pytest.fixture(params=['plain', 'gz', 'xz'])
+def conf_file(request, tmp_path):
+    data = ''.join(LINES).encode()
+    path = tmp_path / f'srx.{request.param}'
+    match request.param:
+        case 'plain':
+            path.write_bytes(data)
+        case 'gz':
+            path.write_bytes(gzip.compress(data))
+        case 'xz':
+            path.write_bytes(lzma.compress(data))
+    return str(path)
+
+
+@pytest.mark.parametrize('line_type', ['str', 'bytes', 'memoryview'])
+@pytest.mark.parametrize('chunk_size', [16, 1024**2])
+def test_txt_line_types(conf_file, line_type, chunk_size):
+    lines = list(ConfigDataTXT(conf_file, line_type=line_type, chunk_size=chunk_size).get())
+    assert all(type(line).__name__ == line_type for line in lines)
+    if line_type != 'str':
+        lines = [bytes(line).decode() for line in lines]
+    assert lines == LINES
+
+
+def test_txt_empty_file(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    assert list(ConfigDataTXT(str(path), line_type='memoryview').get()) == []
+
+
+def test_txt_wrong_line_type():
+    with pytest.raises(ValueError):
+        ConfigDataTXT('srx.txt', line_type='list')
@@ -0,0 +1,159 @@
+import json
+import pytest
+import data_processing.data_writers as data_writers
+from data_processing.data_writers import writers_factory
+from data_processing.records import record_to_dict
+from tests.records_test import parse
+from data_processing.parsers import ParserSrxSets
+
+
+@pytest.fixture(params=[False, True], ids=['dicts', 'records'])
+def fw_data(request):
+    return parse(ParserSrxSets, compact=request.param)[1]
+
+
+@pytest.fixture(params=[True, False], ids=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    if request.param:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(data_writers, 'orjson', None)
+
+
+def test_json_same_as_json_dump(fw_data, tmp_path):
+    writers_factory('json').write(tmp_path / 'out.json', fw_data)
+    expected = json.dumps(fw_data, indent=4, default=record_to_dict)
+    assert (tmp_path / 'out.json').read_text() == expected
+
+
+def test_json_compact(fw_data, encoder, tmp_path):
+    writers_factory('json_compact').write(tmp_path / 'out.json', fw_data)
+    text = (tmp_path / 'out.json').read_text()
+    assert '\n' not in text
+    assert json.loads(text) == json.loads(json.dumps(fw_data, default=record_to_dict))
+
+
+def test_ndjson(fw_data, encoder, tmp_path):
+    writers_factory('ndjson').write(tmp_path / 'out.ndjson', fw_data)
+    with open(tmp_path / 'out.ndjson') as file:
+        records = [json.loads(line) for line in file]
+
+    rules = [r for r in records if r['section'] == 'fw rules']
+    assert len(rules) == 1
+    assert rules[0]['logical_system'] == 'root'
+    assert rules[0]['data']['term_action'] == ['permit']
+    routes = [r for r in records if r['section'] == 'routes']
+    assert [r['type'] for r in routes] == ['static', 'static']
+    assert routes[1]['name'] is None
+    assert routes[1]['data'] == {'dest IP': '10.0.0.0/8', 'next hop interface': 'st0.1'}
+    nats = [r for r in records if r['section'] == 'NATs']
+    assert nats[0]['logical_system'] == 'LS1'
+    assert nats[0]['name'] == 'R1'
+    assert nats[0]['data']['NATed IP'] == '1.1.1.1'
+
+
+def test_excel(fw_data, tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    writers_factory('excel').write(tmp_path / 'out.xlsx', fw_data)
+    workbook = openpyxl.load_workbook(tmp_path / 'out.xlsx')
+
+    ## Empty sections are skipped:
+    assert workbook.sheetnames == [
+        'root fw rules', 'root routes', 'root addresses', 'root address-groups',
+        'root services', 'root service-groups', 'root interfaces', 'LS1 NATs',
+    ]
+    rules = list(workbook['root fw rules'].values)
+    assert rules[0][:4] == ('name', 'src_zone', 'dst_zone', 'src_IP')
+    assert rules[1][3] == 'net1'
+    addresses = list(workbook['root addresses'].values)
+    assert addresses[2] == ('range1', 'range', '10.1.1.1-10.1.1.9')
+    nats = list(workbook['LS1 NATs'].values)
+    assert nats == [
+        ('type', 'name', 'src zone', 'orginal IP', 'NATed IP'),
+        ('static', 'R1', 'trust', '10.0.0.1/32', '1.1.1.1'),
+    ]
+
+
+def test_excel_sheet_names(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    long_name = 'LOGICAL-SYSTEM-WITH-VERY/LONG-NAME'
+    fw_data = {
+        f'{long_name}-1': {'addresses': {'a': {'type': 'fqdn', 'address': 'x.com'}}},
+        f'{long_name}-2': {'addresses': {'a': {'type': 'fqdn', 'address': 'y.com'}}},
+    }
+    writers_factory('excel').write(tmp_path / 'out.xlsx', fw_data)
+    names = openpyxl.load_workbook(tmp_path / 'out.xlsx').sheetnames
+    assert names == ['LOGICAL-SYSTEM-WITH-VERY_LONG-N', 'LOGICAL-SYSTEM-WITH-VERY_LO (2)']
+
+
+def test_excel_formula_text(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    fw_data = {'root': {'addresses': {
+        '=HYPERLINK("http://x","y")': {'type': 'fqdn', 'address': '+cmd|calc'},
+        ## Range is written as start-end:
+        '@SUM(1)': {'type': 'range', 'address': ['-1+1', 'x.com']},
+    }}}
+    writers_factory('excel').write(tmp_path / 'out.xlsx', fw_data)
+    sheet = openpyxl.load_workbook(tmp_path / 'out.xlsx')['root addresses']
+    assert list(sheet.values)[1:] == [
+        ('=HYPERLINK("http://x","y")', 'fqdn', '+cmd|calc'),
+        ('@SUM(1)', 'range', '-1+1-x.com'),
+    ]
+    assert all(cell.data_type == 's' for row in sheet.iter_rows(min_row=2) for cell in row)
+
+
+@pytest.mark.parametrize('data_type', ['parquet', 'arrow'])
+def test_columnar(fw_data, data_type, tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    from data_processing.data_writers import read_columnar
+    writer = writers_factory(data_type, hostname='SRX-SAMPLE', row_group_size=1)
+    writer.write(tmp_path / 'out', fw_data)
+    tables = read_columnar(tmp_path / 'out')
+
+    assert sorted(tables) == [
+        'NATs', 'address-groups', 'addresses', 'fw_rules',
+        'interfaces', 'routes', 'service-groups', 'services',
+    ]
+    rules = tables['fw_rules'].to_pylist()
+    assert rules[0]['hostname'] == 'SRX-SAMPLE'
+    assert rules[0]['logical_system'] == 'root'
+    assert rules[0]['src_IP'] == ['net1']
+    assert rules[0]['dst_IP'] == []
+    assert pa.types.is_list(tables['fw_rules'].schema.field('services').type)
+    assert tables['routes'].column('next hop interface').to_pylist() == [None, 'st0.1']
+    assert tables['NATs'].to_pylist() == [{
+        'hostname': 'SRX-SAMPLE', 'logical_system': 'LS1', 'type': 'static', 'name': 'R1',
+        'src zone': 'trust', 'orginal IP': '10.0.0.1/32', 'NATed IP': '1.1.1.1',
+    }]
+    assert read_columnar(tmp_path / 'out', columns=['name'])['services'].column_names == ['name']
+
+
+def test_sqlite_upsert(fw_data, tmp_path):
+    import sqlite3
+    path = tmp_path / 'fleet.db'
+    for hostname in ('FW-A', 'FW-B', 'FW-A'):
+        writers_factory('sqlite', hostname=hostname).write(path, fw_data)
+    connection = sqlite3.connect(path)
+
+    assert connection.execute('SELECT hostname FROM devices ORDER BY id').fetchall() == [('FW-A',), ('FW-B',)]
+    ## Device written again replaces its rows:
+    assert connection.execute('SELECT COUNT(*) FROM rules').fetchone() == (2,)
+    rows = connection.execute(
+        'SELECT d.hostname, r.src_zone, r.dst_zone, r.term_action FROM rules r '
+        'JOIN rule_members m ON m.rule_id = r.id JOIN devices d ON d.id = r.device_id '
+        "WHERE m.field = 'src_IP' AND m.value = 'net1' ORDER BY d.hostname"
+    ).fetchall()
+    assert rows == [('FW-A', 'trust', 'untrust', 'permit'), ('FW-B', 'trust', 'untrust', 'permit')]
+    ## 10.1.1.5 is in net1 and in range1:
+    rows = connection.execute(
+        'SELECT DISTINCT name FROM addresses WHERE ip_start <= ? AND ip_end >= ? ORDER BY name',
+        (0x0A010105, 0x0A010105)
+    ).fetchall()
+    assert rows == [('net1',), ('range1',)]
+    assert connection.execute(
+        "SELECT next_hop_interface FROM routes WHERE destination = '10.0.0.0/8'"
+    ).fetchall() == [('st0.1',), ('st0.1',)]
+    assert connection.execute('SELECT original_ip, translated_ip FROM nats LIMIT 1').fetchone() == (
+        '10.0.0.1/32', '1.1.1.1'
+    )
+    connection.close()
@@ -0,0 +1,106 @@
+import io
+import json
+from data_processing.config_data import ConfigDataList
+from data_processing.diff import Change, Fingerprint, diff, main, summarize, write_ndjson
+from data_processing.parsers import ParserSrxSets
+
+CONFIG = [
+    'set system host-name SRX-1',
+    'set security address-book global address net1 10.1.1.0/24',
+    'set security address-book global address net2 10.1.2.0/24',
+    'set security policies from-zone trust to-zone untrust policy P1 match source-address net1',
+    'set security policies from-zone trust to-zone untrust policy P1 match destination-address any',
+    'set security policies from-zone trust to-zone untrust policy P1 match application junos-http',
+    'set security policies from-zone trust to-zone untrust policy P1 then permit',
+    'set security policies from-zone trust to-zone untrust policy P2 match source-address net2',
+    'set security policies from-zone trust to-zone untrust policy P2 then deny',
+    'set routing-options static route 0.0.0.0/0 next-hop 192.0.2.1',
+]
+
+
+def parse(lines, compact=False):
+    parser = ParserSrxSets(ConfigDataList(lines), compact=compact)
+    parser.run()
+    return parser.get_data()[1]
+
+
+def test_same_content_has_no_changes():
+    fw_data = parse(CONFIG)
+    assert diff(fw_data, parse(CONFIG)) == []
+    ## Compact records and JSON read back hash the same as dicts:
+    assert Fingerprint(parse(CONFIG, compact=True)).digest == Fingerprint(fw_data).digest
+    assert diff(json.loads(json.dumps(fw_data)), parse(CONFIG, compact=True)) == []
+
+
+def test_added_removed_modified():
+    new_config = [line for line in CONFIG if 'net2' not in line and 'P2' not in line] + [
+        'set security policies from-zone trust to-zone untrust policy P1 match application junos-https',
+        'set security policies from-zone trust to-zone untrust policy P3 then permit',
+        'set routing-options static route 0.0.0.0/0 next-hop 192.0.2.2',
+    ]
+    old, new = parse(CONFIG), parse(new_config)
+    changes = diff(old, new)
+
+    ## Rules are keyed by zones and name:
+    assert [(c.section, c.type, c.name, c.change) for c in changes] == [
+        ('fw rules', None, "['trust'];['untrust'];P1", 'modified'),
+        ('fw rules', None, "['trust'];['untrust'];P2", 'removed'),
+        ('fw rules', None, "['trust'];['untrust'];P3", 'added'),
+        ('routes', 'static', None, 'added'),
+        ('addresses', None, 'net2', 'removed'),
+    ]
+    modified = changes[0]
+    assert modified.fields == ['services']
+    assert modified.old['services'] == ['junos-http']
+    assert modified.new['services'] == ['junos-http', 'junos-https']
+    assert changes[3].new['next hop IP'] == '192.0.2.2'
+    assert summarize(changes) == {'root': {
+        'fw rules': {'modified': 1, 'removed': 1, 'added': 1},
+        'routes': {'added': 1},
+        'addresses': {'removed': 1},
+    }}
+
+
+def test_logical_systems_and_fingerprint_reuse():
+    old = Fingerprint(parse(CONFIG))
+    new = parse(CONFIG + ['set logical-systems LS1 security address-book global address net3 10.1.3.0/24'])
+    assert diff(old, new) == [
+        Change('LS1', 'addresses', None, 'net3', 'added', None, new['LS1']['addresses']['net3'], None),
+    ]
+    assert [c.change for c in diff(new, old)] == ['removed']
+
+
+def test_ndjson_output(tmp_path, capsys):
+    old_path, new_path = tmp_path / 'old.json', tmp_path / 'new.json'
+    old_path.write_text(json.dumps(parse(CONFIG)))
+    new_path.write_text(json.dumps(parse(CONFIG[:-1], compact=True), default=dict))
+    assert main([str(old_path), str(old_path)]) == 0
+    assert main([str(old_path), str(new_path)]) == 1
+    ## Parser prints to stdout too:
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+    assert [json.loads(line)['change'] for line in lines] == ['removed']
+
+    output = io.StringIO()
+    write_ndjson(output, diff(parse(CONFIG), parse(CONFIG[:-1], compact=True)))
+    assert json.loads(output.getvalue()) == {
+        'logical_system': 'root', 'section': 'routes', 'type': 'static', 'name': None,
+        'change': 'removed', 'old': {'dest IP': '0.0.0.0/0', 'next hop IP': '192.0.2.1'},
+        'new': None, 'fields': None,
+    }
+
+
+def test_moved_rules():
+    p1, p2 = CONFIG[3:7], CONFIG[7:9]
+    p3 = ['set security policies from-zone trust to-zone untrust policy P3 then permit']
+    old = parse(CONFIG[:3] + p1 + p2 + p3)
+    ## P3 moved to the top, P1 and P2 keep their order:
+    new = parse(CONFIG[:3] + p3 + p1 + p2)
+    assert Fingerprint(old).digest != Fingerprint(new).digest
+    assert [(c.name, c.change, c.old, c.new) for c in diff(old, new)] == [
+        ("['trust'];['untrust'];P3", 'moved', 2, 0),
+    ]
+    assert summarize(diff(old, new)) == {'root': {'fw rules': {'moved': 1}}}
+    ## Added rule does not move the others; order of addresses is not compared:
+    p0 = ['set security policies from-zone trust to-zone untrust policy P0 then permit']
+    assert [c.change for c in diff(old, parse(CONFIG[:3] + p1 + p0 + p2 + p3))] == ['added']
+    assert diff(parse(CONFIG), parse([CONFIG[0], CONFIG[2], CONFIG[1]] + CONFIG[3:])) == []
@@ -0,0 +1,76 @@
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from data_processing.fleet import FleetCollector
+
+SRX_CONFIG = (
+    'set system host-name {host}\n'
+    'set security address-book global address net1 10.1.1.0/24\n'
+)
+
+
+def device(ip, **kwargs):
+    return {
+        'ip': ip, 'user': 'user', 'passwd': 'pass',
+        'vendor': 'juniper_junos', 'parser': 'srx_set', **kwargs
+    }
+
+
+class FakeConnectHandler():
+    def __init__(self, fail_times=None, delay=0):
+        self.fail_times = fail_times or {}
+        self.delay = delay
+        self.calls = {}
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, **device):
+        host = device['host']
+        with self.lock:
+            self.calls[host] = self.calls.get(host, 0) + 1
+            if self.calls[host] <= self.fail_times.get(host, 0):
+                raise ConnectionError(f'{host} unreachable')
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        def send_command(comm, **kwargs):
+            time.sleep(self.delay)
+            return SRX_CONFIG.format(host=f'FW-{host}')
+
+        def disconnect():
+            with self.lock:
+                self.running -= 1
+
+        connection = MagicMock()
+        connection.send_command.side_effect = send_command
+        connection.disconnect.side_effect = disconnect
+        return connection
+
+
+def test_fleet_collects_and_parses():
+    fake = FakeConnectHandler(delay=0.01)
+    devices = [device(f'10.0.0.{i}') for i in range(10)]
+    with patch('data_processing.config_data.ConnectHandler', fake):
+        results = list(FleetCollector(max_workers=3, backoff=0).collect(devices))
+
+    assert sorted(r.hostname for r in results) == sorted(f'FW-10.0.0.{i}' for i in range(10))
+    assert all(r.error is None and r.attempts == 1 for r in results)
+    assert 'net1' in results[0].fw_data['root']['addresses']
+    assert fake.max_running <= 3
+
+
+def test_fleet_retries_and_failures():
+    fake = FakeConnectHandler(fail_times={'10.0.0.1': 1, '10.0.0.2': 10})
+    devices = [device('10.0.0.1'), device('10.0.0.2'), device('10.0.0.3', parser=None)]
+    with patch('data_processing.config_data.ConnectHandler', fake):
+        results = {r.device['ip']: r for r in FleetCollector(retries=2, backoff=0).collect(devices)}
+
+    assert results['10.0.0.1'].hostname == 'FW-10.0.0.1'
+    assert results['10.0.0.1'].attempts == 2
+    assert isinstance(results['10.0.0.2'].error, ConnectionError)
+    assert results['10.0.0.2'].attempts == 3
+    assert fake.calls['10.0.0.2'] == 3
+    ## Without parser only config lines are returned:
+    assert results['10.0.0.3'].fw_data is None
+    assert list(results['10.0.0.3'].conf_data.get())[0] == 'set system host-name FW-10.0.0.3'
@@ -0,0 +1,116 @@
+import random
+import pytest
+from data_processing.groups import (
+    ANY_SERVICE, IntervalSet, address_resolver, service_interval, service_resolver,
+)
+from data_processing.isip import ipv4_range
+
+LOGSYS_DATA = {
+    'addresses': {
+        'net1': {'type': 'address', 'address': '10.0.0.0/24'},
+        'net2': {'type': 'address', 'address': '10.0.1.0/24'},
+        'host3': {'type': 'address', 'address': '10.0.5.5/32'},
+        'web': {'type': 'fqdn', 'address': 'www.example.com'},
+    },
+    'address-groups': {
+        'inner': ['net2', 'web'],
+        'outer': ['net1', 'inner', 'missing'],
+        'loop-a': ['host3', 'loop-b'],
+        'loop-b': ['loop-a', 'outer'],
+        'top': ['loop-b'],
+    },
+    'services': {
+        'tcp-8000': {'protocol': 'tcp', 'destination-port': '8000-8100'},
+        'DNS': {'protocol': 'tcp udp', 'tcp-portrange': '53', 'udp-portrange': '53:1024-65535'},
+    },
+    'service-groups': {'apps': ['tcp-8000', 'junos-https'], 'all-apps': ['apps', 'any']},
+}
+
+
+def test_interval_set():
+    intervals = IntervalSet([(10, 20), (0, 5), (21, 30), (40, 40)])
+    assert list(intervals) == [(0, 5), (10, 30), (40, 40)]
+    assert 30 in intervals and 40 in intervals and 31 not in intervals and 6 not in intervals
+    assert intervals.size() == 6 + 21 + 1
+    assert intervals.covers(IntervalSet([(12, 30), (0, 0)]))
+    assert not intervals.covers(IntervalSet([(12, 31)]))
+    assert intervals.intersects(IntervalSet([(31, 45)]))
+    assert not intervals.intersects(IntervalSet([(6, 9), (41, 50)]))
+    assert intervals | IntervalSet([(6, 9)]) == IntervalSet([(0, 30), (40, 40)])
+    assert IntervalSet() == IntervalSet([]) and not IntervalSet()
+
+
+def test_nested_groups_cycles_and_dangling():
+    addresses = address_resolver(LOGSYS_DATA)
+    assert addresses.members('outer') == {'net1', 'net2', 'web', 'missing'}
+    assert list(addresses.intervals('outer')) == [ipv4_range('10.0.0.0/23')]
+    ## Groups in cycle get members of the whole cycle:
+    assert addresses.members('loop-a') == addresses.members('loop-b') == addresses.members('top')
+    assert 'host3' in addresses.members('top') and 'net1' in addresses.members('top')
+    addresses.expand_all()
+    assert addresses.cycles == [['loop-a', 'loop-b']]
+    assert addresses.dangling == {'outer': ['missing']}
+    assert addresses.unresolved == {'web', 'missing'}
+    ## Object and literal outside of groups:
+    assert list(addresses.intervals('10.0.0.1')) == [(0x0A000001, 0x0A000001)]
+    assert list(addresses.union(['net2', 'net1'])) == [ipv4_range('10.0.0.0/23')]
+
+
+def test_services():
+    services = service_resolver(LOGSYS_DATA)
+    assert list(services.intervals('apps')) == [service_interval('tcp', '443'), service_interval('tcp', '8000-8100')]
+    assert list(services.intervals('all-apps')) == [ANY_SERVICE]
+    ## FortiGate ports per protocol, source port after colon is not used:
+    assert list(services.intervals('DNS')) == [service_interval('tcp', '53'), service_interval('udp', '53')]
+    assert service_interval('icmp', None) == (1 << 16, (2 << 16) - 1)
+    assert service_interval('tcp', 'http') is None
+
+
+def test_invalidate_changed_group_and_object():
+    logsys_data = {
+        'addresses': dict(LOGSYS_DATA['addresses']),
+        'address-groups': {name: list(members) for name, members in LOGSYS_DATA['address-groups'].items()},
+    }
+    addresses = address_resolver(logsys_data)
+    addresses.expand_all()
+    top = addresses.intervals('top')
+
+    logsys_data['address-groups']['loop-b'].remove('loop-a')
+    addresses.invalidate('loop-b')
+    ## Group outside of changed part is kept:
+    assert addresses.intervals('outer') is addresses.intervals('outer')
+    addresses.expand_all()
+    assert addresses.cycles == []
+    assert 'host3' not in addresses.members('top') and 'host3' in addresses.members('loop-a')
+
+    logsys_data['addresses']['net1'] = {'type': 'address', 'address': '192.0.2.0/24'}
+    addresses.invalidate('net1')
+    assert 0xC0000201 in addresses.intervals('top') and top != addresses.intervals('top')
+    logsys_data['address-groups']['new'] = ['top', 'host3']
+    addresses.invalidate('new')
+    assert addresses.members('new') == addresses.members('loop-a')
+
+
+## Cached expansion against recursive walk without cache
+@pytest.mark.parametrize('seed', range(5))
+def test_expansion_equals_recursive_walk(seed):
+    rng = random.Random(seed)
+    addresses = {f'A{i}': {'type': 'address', 'address': f'10.{i}.{rng.randrange(256)}.0/24'} for i in range(60)}
+    names = list(addresses)
+    groups = {}
+    for i in range(80):
+        groups[f'G{i}'] = rng.sample(names, rng.randrange(0, 4)) + [f'G{rng.randrange(80)}' for _ in range(2)]
+    resolver = address_resolver({'addresses': addresses, 'address-groups': groups})
+
+    def walk(name, seen):
+        if name not in groups:
+            return {name}
+        if name in seen:
+            return set()
+        seen.add(name)
+        return set().union(*(walk(member, seen) for member in groups[name]))
+
+    for name in rng.sample(list(groups), 80):
+        members = walk(name, set())
+        assert resolver.members(name) == members
+        assert resolver.intervals(name) == IntervalSet(ipv4_range(addresses[m]['address']) for m in members)
@@ -1,5 +1,9 @@
+import random
 import pytest
-from data_processing.isip import is_ipv4_with_mask, is_ipv4_without_mask
+from data_processing.isip import (
+    is_ipv4_with_mask, is_ipv4_without_mask,
+    ipv4_to_int, ip_to_int, int_to_ipv4, ipv4_network, ipv4_range, ipv4_ranges_batch,
+)
 
 
 @pytest.mark.parametrize("param1, expected", [
@@ -42,4 +46,64 @@ def test_isip_mask(param1, expected):
     ('1.1.1.1/32', False),
 ])
 def test_isip_no_mask(param1, expected):
-    assert is_ipv4_without_mask(param1) == expected
\ No newline at end of file
+    assert is_ipv4_without_mask(param1) == expected
+
+
+@pytest.mark.parametrize("address, expected", [
+    ('10.0.0.1', (0x0A000001, 0x0A000001)),
+    ('10.0.0.1/8', (0x0A000000, 0x0AFFFFFF)),
+    ('192.168.1.0 255.255.255.0', (0xC0A80100, 0xC0A801FF)),
+    ('0.0.0.0/0', (0, 0xFFFFFFFF)),
+    ('10.1.1.1-10.1.1.9', (0x0A010101, 0x0A010109)),
+    (['10.1.1.1', '10.1.1.9'], (0x0A010101, 0x0A010109)),
+    (['10.1.1.1'], None),
+    ('10.1.1.1-10.1.1', None),
+    ('8.8.8.8 255.255.0.255', None),
+    ('host.example.com', None),
+    ('010.0.0.1000', None),
+])
+def test_ipv4_range(address, expected):
+    assert ipv4_range(address) == expected
+
+
+def test_ipv4_network_and_int():
+    assert ipv4_network('192.168.0.1/25') == (0xC0A80000, 0xFFFFFF80)
+    assert ipv4_network('10.0.0.0 255.0.0.0') == (0x0A000000, 0xFF000000)
+    assert ipv4_network('10.0.0.0') is None
+    assert ipv4_to_int('1.2.3.4') == 0x01020304
+    assert ipv4_to_int('1.2.3.4/32') is None
+    assert int_to_ipv4(0xC0A80001) == '192.168.0.1'
+
+
+def test_ip_to_int():
+    assert ip_to_int('1.2.3.4') == 0x01020304
+    assert ip_to_int(0x01020304) == 0x01020304
+    with pytest.raises(ValueError):
+        ip_to_int('1.2.3.0/24')
+
+
+def random_literal(rng):
+    octet = lambda: str(rng.choice([0, 1, 10, 127, 255, 256, 999, rng.randrange(300)]))
+    ip = lambda: '.'.join(octet() for _ in range(rng.choice([3, 4, 4, 4, 5])))
+    return rng.choice([
+        lambda: ip(),
+        lambda: f'{ip()}/{rng.randrange(40)}',
+        lambda: f'{ip()} {ip()}',
+        lambda: f'{ip()} 255.255.{rng.choice([0, 128, 255])}.{rng.choice([0, 255])}',
+        lambda: f'{ip()}-{ip()}',
+        lambda: f'{ip()}{rng.choice(["", " ", "/", "x", "..", "-"])}',
+        lambda: ''.join(rng.choice('0123456789./- ax') for _ in range(rng.randrange(35))),
+    ])()
+
+
+def test_batch_same_as_ipv4_range():
+    pytest.importorskip('numpy')
+    rng = random.Random(0)
+    addresses = [random_literal(rng) for _ in range(5000)] + ['10.0.0.1 ', 'ipó', '']
+    valid, start, end = ipv4_ranges_batch(addresses)
+    for address, is_valid, first, last in zip(addresses, valid, start, end):
+        expected = ipv4_range(address)
+        assert (expected is not None) == is_valid, address
+        if is_valid:
+            assert (int(first), int(last)) == expected, address
+    assert valid.sum() > 250
@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import pytest
+from data_processing.parse_cache import ParseCache
+from data_processing.parsers import ParserSrxSets, ParserSrxSetsParallel
+from run import Generate
+
+CONFIG = (
+    'set system host-name SRX-SAMPLE\n'
+    'set security address-book global address net1 10.1.1.0/24\n'
+    'set security policies from-zone trust to-zone untrust policy P1 then permit\n'
+)
+
+
+@pytest.fixture
+def conf_file(tmp_path):
+    path = tmp_path / 'srx.txt'
+    path.write_text(CONFIG)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(str(tmp_path / 'cache'))
+
+
+def test_cache_hit_does_not_parse(conf_file, cache, monkeypatch):
+    hostname, fw_data = cache.get_or_parse(conf_file, 'srx_set')
+    assert hostname == 'SRX-SAMPLE'
+
+    def fail(self):
+        raise AssertionError('parsed on cache hit')
+    monkeypatch.setattr(ParserSrxSets, 'run', fail)
+    assert cache.get_or_parse(conf_file, 'srx_set') == (hostname, fw_data)
+
+
+def test_cache_key_changes(conf_file, cache, monkeypatch):
+    key = cache.get_key(conf_file, 'srx_set', 1)
+    assert key != cache.get_key(conf_file, 'srx_set', 2)
+    assert key != cache.get_key(conf_file, 'srx_set_parallel', 1)
+    with open(conf_file, 'a') as file:
+        file.write('set system host-name OTHER\n')
+    assert key != cache.get_key(conf_file, 'srx_set', 1)
+    assert cache.get_or_parse(conf_file, 'srx_set')[0] == 'OTHER'
+
+
+def test_cache_invalidate(conf_file, cache):
+    cache.get_or_parse(conf_file, 'srx_set')
+    key = cache.get_key(conf_file, 'srx_set', ParserSrxSets.version)
+    assert cache.get(key) is not None
+    assert cache.invalidate(conf_file) == 1
+    assert cache.get(key) is None
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'), max_size=10_000)
+    payload = ('host', {'data': 'x' * 3000})
+    for i in range(3):
+        cache.put(f'key{i}', payload)
+        os.utime(cache._ParseCache__entry_path(f'key{i}'), ns=(i, i))
+    ## key0 used recently, key1 is least recently used:
+    cache.get('key0')
+    cache.put('key3', payload)
+    assert cache.get('key1') is None
+    assert cache.get('key0') is not None
+    assert cache.size() <= 10_000
+
+
+def test_cache_key_of_parser_args(conf_file, cache):
+    compact = cache.args_hash(ParserSrxSets, {'compact': True})
+    assert compact != ''
+    ## Default values and workers do not change key:
+    assert cache.args_hash(ParserSrxSets, {'compact': False}) == cache.args_hash(ParserSrxSets, {}) == ''
+    assert cache.args_hash(ParserSrxSetsParallel, {'workers': 4, 'compact': True}) == compact
+    assert cache.get_key(conf_file, 'srx_set', 1, compact) != cache.get_key(conf_file, 'srx_set', 1)
+
+    ## Records and dicts are cached apart:
+    records = cache.get_or_parse(conf_file, 'srx_set', {'compact': True})[1]
+    dicts = cache.get_or_parse(conf_file, 'srx_set')[1]
+    assert isinstance(dicts['root']['fw rules']["['trust'];['untrust'];P1"], dict)
+    assert not isinstance(records['root']['fw rules']["['trust'];['untrust'];P1"], dict)
+    assert cache.get_or_parse(conf_file, 'srx_set', {'compact': True})[1] == records
+    assert cache.invalidate(conf_file, 'srx_set') == 2
+
+
+def test_corrupt_entry_is_miss(conf_file, cache):
+    cache.get_or_parse(conf_file, 'srx_set')
+    key = cache.get_key(conf_file, 'srx_set', ParserSrxSets.version)
+    path = cache._ParseCache__entry_path(key)
+    with open(path, 'r+b') as file:
+        file.truncate(10)
+    assert cache.get(key) is None
+    assert not os.path.exists(path)
+    assert cache.get_or_parse(conf_file, 'srx_set')[0] == 'SRX-SAMPLE'
+
+
+def _put_and_evict(cache_dir, worker, barrier):
+    cache = ParseCache(cache_dir, max_size=20_000)
+    barrier.wait()
+    for i in range(300):
+        cache.put(f'w{worker}-{i}', ('host', {'data': 'x' * 3000}))
+        cache.get(f'w{1 - worker}-{i}')
+        cache.size()
+
+
+## Both processes evict entries the other one is reading, stating or removing:
+def test_processes_evict_at_the_same_time(tmp_path):
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(2)
+    workers = [
+        context.Process(target=_put_and_evict, args=(str(tmp_path / 'cache'), worker, barrier))
+        for worker in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+    assert [worker.exitcode for worker in workers] == [0, 0]
+    assert ParseCache(str(tmp_path / 'cache'), max_size=20_000).size() <= 20_000 + 2 * 3100
+
+
+def test_cache_key_of_reader_args(conf_file, cache):
+    assert cache.args_hash(ParserSrxSets, {}, {'chunk_size': 1024}) == ''
+    raising = cache.args_hash(ParserSrxSets, {}, {'raise_errors': True})
+    assert raising not in ('', cache.args_hash(ParserSrxSets, {'raise_errors': True}))
+
+    ## Generate passes reader arguments on, as without cache:
+    generate = Generate(cache)
+    assert generate('txt', 'srx_set', {'conf_file': conf_file, 'chunk_size': 1024})[0] == 'SRX-SAMPLE'
+    with pytest.raises(ValueError, match='line_type'):
+        generate('txt', 'srx_set', {'conf_file': conf_file, 'line_type': 'lines'})
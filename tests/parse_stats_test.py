@@ -0,0 +1,60 @@
+import json
+from data_processing.config_data import ConfigDataList
+from data_processing.parse_stats import ParseStats
+from data_processing.parsers import ParserSrxSets, ParserSrxSetsParallel
+from tests.records_test import CONFIG, parse
+
+LINES = ['## comment', *CONFIG, 'set system syslog file messages any any', '']
+
+
+def run_with_stats(parser_class, **kwargs):
+    stats = ParseStats(**kwargs)
+    parser = parser_class(ConfigDataList(LINES), stats=stats)
+    parser.run()
+    return parser, stats
+
+
+def test_stats_counts():
+    parser, stats = run_with_stats(ParserSrxSets)
+    assert parser.get_stats() is stats
+
+    assert stats.lines == len(LINES)
+    assert stats.skipped_lines == 2
+    assert stats.unmatched_lines == 1
+    assert stats.by_comm_type['fw rules'].lines == sum('security policies' in line for line in CONFIG)
+    assert stats.by_comm_type['hostname'].lines == 1
+    assert stats.by_logical_system['LS1'].lines == sum('logical-systems LS1' in line for line in CONFIG)
+    assert sum(c.lines for c in stats.by_logical_system.values()) == len(LINES) - 2
+    assert all(c.time_ns > 0 for c in stats.by_comm_type.values())
+    assert all(c.allocated_bytes == 0 for c in stats.by_comm_type.values())
+
+
+def test_stats_do_not_change_output():
+    parser, _ = run_with_stats(ParserSrxSets)
+    assert parser.get_data() == parse(ParserSrxSets)
+    assert ParserSrxSets(ConfigDataList(LINES)).get_stats() is None
+
+
+def test_stats_allocations():
+    _, stats = run_with_stats(ParserSrxSets, track_allocations=True)
+    assert stats.by_comm_type['fw rules'].allocated_bytes > 0
+
+
+def test_parallel_stats_merged():
+    _, serial = run_with_stats(ParserSrxSets)
+    _, parallel = run_with_stats(ParserSrxSetsParallel)
+    assert parallel.skipped_lines == serial.skipped_lines
+    for comm_type, counter in serial.by_comm_type.items():
+        ## "from zone" line is parsed in root and LS1 shard:
+        duplicates = 1 if comm_type == 'static NAT' else 0
+        assert parallel.by_comm_type[comm_type].lines == counter.lines + duplicates
+
+
+def test_stats_json(tmp_path):
+    _, stats = run_with_stats(ParserSrxSets)
+    stats.write_json(tmp_path / 'stats.json')
+    report = json.loads((tmp_path / 'stats.json').read_text())
+    assert report['lines'] == len(LINES)
+    assert report['unmatched_lines'] == 1
+    assert set(report['by_logical_system']) == {'root', 'LS1'}
+    assert report['by_comm_type']['fw rules']['time_s'] > 0
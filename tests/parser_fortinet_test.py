@@ -0,0 +1,288 @@
+import pytest
+from benchmarks.fortigate_config_generator import generate_fortigate_config, generate_fortigate_config_lines
+from data_processing.config_data import ConfigDataList
+from data_processing.parse_stats import ParseStats
+from data_processing.parsers import ParserFortinet, parsers_factory
+from data_processing.records import Record
+
+CONFIG = '''#config-version=FGT60F-7.2.5-FW-build1517-230606:opmode=0:vdom=1:user=admin
+#conf_file_ver=1
+config vdom
+edit root
+next
+edit DMZ
+next
+end
+config global
+    config system global
+        set hostname "FGT-1"
+        set timezone 28
+    end
+    config system interface
+        edit "port1"
+            set vdom "root"
+            set ip 192.0.2.1 255.255.255.0
+            config secondaryip
+                edit 1
+                    set ip 198.51.100.1 255.255.255.0
+                next
+            end
+        next
+        edit "port2"
+            set vdom "DMZ"
+            set ip 172.16.0.1 255.255.0.0
+        next
+        edit "port3"
+            set vdom "root"
+            set ip 0.0.0.0 0.0.0.0
+        next
+    end
+    config vpn certificate local
+        edit "Fortinet_Factory"
+            set comments "First line
+next
+end"
+            set certificate "-----BEGIN CERTIFICATE-----
+MIIDZTCCAk2gAwIBAgIIXYZ
+-----END CERTIFICATE-----"
+        next
+    end
+end
+config vdom
+edit root
+    config firewall address
+        edit "all"
+        next
+        edit "NET-1"
+            set subnet 10.1.0.0 255.255.0.0
+        next
+        edit "RANGE-1"
+            set type iprange
+            set start-ip 10.2.0.1
+            set end-ip 10.2.0.9
+        next
+        edit "WEB"
+            set type fqdn
+            set fqdn "www.example.com"
+        next
+        edit "PL"
+            set type geography
+            set country "PL"
+        next
+    end
+    config firewall addrgrp
+        edit "GRP-1"
+            set member "NET-1" "RANGE-1"
+        next
+    end
+    config firewall service custom
+        edit "WEB-PORTS"
+            set protocol TCP/UDP/SCTP
+            set tcp-portrange 80 443:1024-65535
+            set udp-portrange 8443
+        next
+        edit "PING"
+            set protocol ICMP
+            set icmptype 8
+        next
+        edit "GRE"
+            set protocol IP
+            set protocol-number 47
+        next
+    end
+    config firewall service group
+        edit "SVC-GRP"
+            set member "WEB-PORTS" "PING"
+        next
+    end
+    config firewall policy
+        edit 1
+            set name "out"
+            set srcintf "port1"
+            set dstintf "port2"
+            set action accept
+            set srcaddr "NET-1" "GRP-1"
+            set dstaddr "all"
+            set service "WEB-PORTS"
+            set nat enable
+            set comments "say \\"hi\\""
+        next
+        edit 2
+            set srcintf "port2"
+            set dstintf "port1"
+            set srcaddr "all"
+            set dstaddr "all"
+            set service "ALL"
+            set status disable
+        next
+    end
+    config router static
+        edit 1
+            set dst 10.9.0.0 255.255.0.0
+            set gateway 192.0.2.254
+            set device "port1"
+        next
+        edit 2
+            set device "tunnel"
+        next
+    end
+next
+edit DMZ
+    config firewall vip
+        edit "VIP-1"
+            set extip 203.0.113.10
+            set mappedip "172.16.0.10"
+            set extintf "port2"
+        next
+        edit "VIP-2"
+            set extip 203.0.113.11
+            set mappedip "172.16.0.11-172.16.0.12"
+            set extintf "any"
+            set portforward enable
+            set extport 8080
+        next
+    end
+    config firewall policy
+        edit 7
+            set srcintf "port2"
+            set dstintf "port2"
+            set srcaddr "all"
+            set dstaddr "VIP-1"
+            set action accept
+            set service "HTTP"
+            set nat enable
+            set ippool enable
+            set poolname "POOL-1"
+        next
+    end
+next
+end
+'''.splitlines()
+
+
+def parse(lines=CONFIG, **kwargs):
+    parser = ParserFortinet(ConfigDataList(lines), **kwargs)
+    parser.run()
+    return parser.get_data()
+
+
+def test_vdoms_and_hostname():
+    hostname, fw_data = parse()
+    assert hostname == 'FGT-1'
+    assert list(fw_data) == ['root', 'DMZ']
+
+
+def test_interfaces():
+    _, fw_data = parse()
+    assert fw_data['root']['interfaces'] == {'port1': {'0': {'IP': '192.0.2.1/24'}}}
+    assert fw_data['DMZ']['interfaces'] == {'port2': {'0': {'IP': '172.16.0.1/16'}}}
+
+
+def test_addresses_and_groups():
+    _, fw_data = parse()
+    assert fw_data['root']['addresses'] == {
+        'all': {'type': 'address', 'address': '0.0.0.0/0'},
+        'NET-1': {'type': 'address', 'address': '10.1.0.0/16'},
+        'RANGE-1': {'type': 'range', 'address': ['10.2.0.1', '10.2.0.9']},
+        'WEB': {'type': 'fqdn', 'address': 'www.example.com'},
+        'PL': {'type': 'geography', 'address': 'PL'},
+    }
+    assert fw_data['root']['address-groups'] == {'GRP-1': ['NET-1', 'RANGE-1']}
+
+
+def test_services():
+    _, fw_data = parse()
+    services = fw_data['root']['services']
+    assert services['WEB-PORTS'] == {
+        'tcp-portrange': '80 443:1024-65535',
+        'udp-portrange': '8443',
+        'protocol': 'tcp udp',
+        'destination-port': '80 443 8443',
+        'source-port': '1024-65535',
+    }
+    assert services['PING'] == {'protocol': 'icmp', 'icmp-type': '8'}
+    assert services['GRE'] == {'protocol': '47'}
+    assert fw_data['root']['service-groups'] == {'SVC-GRP': ['WEB-PORTS', 'PING']}
+
+
+def test_policies():
+    _, fw_data = parse()
+    rules = fw_data['root']['fw rules']
+    assert list(rules) == ['1', '2']
+    assert rules['1']['src_zone'] == ['port1']
+    assert rules['1']['dst_zone'] == ['port2']
+    assert rules['1']['src_IP'] == ['NET-1', 'GRP-1']
+    assert rules['1']['services'] == ['WEB-PORTS']
+    assert rules['1']['term_action'] == ['permit']
+    assert rules['1']['src_NAT'] == ['interface']
+    assert rules['1']['description'] == ['say "hi"']
+    assert rules['1']['status'] == ['enable']
+    assert rules['2']['term_action'] == ['deny']
+    assert rules['2']['status'] == ['disable']
+    assert fw_data['DMZ']['fw rules']['7']['src_NAT'] == ['POOL-1']
+
+
+def test_routes_and_vips():
+    _, fw_data = parse()
+    assert fw_data['root']['routes']['static'] == [
+        {'dest IP': '10.9.0.0/16', 'next hop IP': '192.0.2.254', 'next hop interface': 'port1'},
+        {'dest IP': '0.0.0.0/0', 'next hop interface': 'tunnel'},
+    ]
+    nats = fw_data['DMZ']['NATs']
+    assert nats['static'] == {
+        'VIP-1': {'src zone': 'port2', 'orginal IP': '203.0.113.10', 'NATed IP': '172.16.0.10'},
+    }
+    assert nats['dst']['VIP-2']['NATed IP'] == '172.16.0.11-172.16.0.12'
+
+
+def test_single_vdom_config():
+    hostname, fw_data = parse(generate_fortigate_config(
+        policies=4, addresses=5, address_groups=2, services=10, routes=3, interfaces=5, vips=2,
+    ))
+    assert hostname == 'FGT-BENCH'
+    assert list(fw_data) == ['root']
+    root = fw_data['root']
+    assert len(root['fw rules']) == 4
+    ## "all" and generated ones:
+    assert len(root['addresses']) == 6
+    assert len(root['address-groups']) == 2
+    assert len(root['services']) == 10
+    assert len(root['routes']['static']) == 3
+    ## Interface with 0.0.0.0 address is skipped:
+    assert len(root['interfaces']) == 4
+    assert len(root['NATs']['static']) + len(root['NATs']['dst']) == 2
+
+
+def test_generated_vdoms():
+    _, fw_data = parse(generate_fortigate_config(vdoms=3, policies=5, interfaces=2))
+    assert list(fw_data) == ['root', 'VDOM1', 'VDOM2']
+    for vdom_data in fw_data.values():
+        assert len(vdom_data['fw rules']) == 5
+        assert len(vdom_data['interfaces']) == 2
+
+
+def test_compact_same_as_dicts():
+    hostname, fw_data = parse(compact=True)
+    assert isinstance(fw_data['root']['fw rules']['1'], Record)
+    assert (hostname, fw_data) == parse()
+
+
+def test_stats():
+    stats = ParseStats()
+    parse(stats=stats)
+    assert stats.lines == len(CONFIG)
+    ## Both policy sections, from "config" to "end" line:
+    assert stats.by_comm_type['firewall policy'].lines == 21 + 13
+    assert stats.by_comm_type['system global'].lines == 4
+    assert set(stats.by_logical_system) == {'root', 'DMZ'}
+
+
+def test_factory():
+    parser = parsers_factory('fortinet', ConfigDataList(CONFIG))
+    assert isinstance(parser, ParserFortinet)
+
+
+@pytest.mark.parametrize('vdoms', [0, 3])
+def test_generator_size(vdoms):
+    lines = sum(1 for _ in generate_fortigate_config_lines(10_000, vdoms))
+    assert 9_000 < lines < 11_000
@@ -0,0 +1,92 @@
+import pytest
+from benchmarks.srx_config_generator import generate_srx_config_lines, to_hierarchical
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import (
+    ParserSrxHierarchical, ParserSrxSets, SrxHierarchyTokenizer, parsers_factory,
+)
+from tests.records_test import CONFIG, parse
+
+HIERARCHICAL = '''## Last commit: 2026-01-01 00:00:00 UTC by admin
+version 21.4R3.15;
+system {
+    host-name SRX-1; # comment
+}
+/* annotation
+   in two lines */
+security {
+    policies {
+        from-zone trust to-zone untrust {
+            inactive: policy P1 {
+                match {
+                    source-address [ net1 net2 ];
+                    application junos-http;
+                }
+                then {
+                    permit;
+                    log { session-close; }
+                }
+                description "a; {b} [c]";
+            }
+        }
+    }
+    inactive: alg dns;
+    flow { }
+}
+interfaces {
+    ge-0/0/0 {
+        description "first
+second";
+    }
+}'''.splitlines()
+
+
+def set_commands(lines):
+    return list(SrxHierarchyTokenizer().set_commands(lines))
+
+
+def test_tokenizer_set_commands():
+    policy = 'security policies from-zone trust to-zone untrust policy P1'
+    assert set_commands(HIERARCHICAL) == [
+        'set version 21.4R3.15',
+        'set system host-name SRX-1',
+        f'set {policy} match source-address net1',
+        f'set {policy} match source-address net2',
+        f'set {policy} match application junos-http',
+        f'set {policy} then permit',
+        f'set {policy} then log session-close',
+        f'set {policy} description "a; {{b}} [c]"',
+        f'deactivate {policy}',
+        'set security alg dns',
+        'deactivate security alg dns',
+        'set security flow',
+        'set interfaces ge-0/0/0 description "first\nsecond"',
+    ]
+
+
+def test_tokenizer_statement_in_many_lines():
+    assert set_commands(['system {', 'host-name', 'SRX-1', ';', '}', 'a { b { c; } }']) == [
+        'set system host-name SRX-1',
+        'set a b c',
+    ]
+
+
+def test_same_as_set_parser():
+    parser = ParserSrxHierarchical(ConfigDataList(list(to_hierarchical(CONFIG))))
+    parser.run()
+    assert parser.get_data() == parse(ParserSrxSets)
+
+
+@pytest.mark.parametrize('logical_systems', [0, 3])
+@pytest.mark.parametrize('compact', [False, True])
+def test_generated_same_as_set_parser(logical_systems, compact):
+    lines = list(generate_srx_config_lines(5_000, logical_systems))
+    set_parser = ParserSrxSets(ConfigDataList(lines), compact=compact)
+    set_parser.run()
+    parser = parsers_factory('srx_hierarchical', ConfigDataList(list(to_hierarchical(lines))), compact=compact)
+    parser.run()
+    assert parser.get_data() == set_parser.get_data()
+
+
+def test_generated_round_trip():
+    lines = list(generate_srx_config_lines(5_000, logical_systems=2))
+    assert sorted(set_commands(to_hierarchical(lines))) == sorted(lines)
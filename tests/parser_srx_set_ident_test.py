@@ -237,4 +237,43 @@ def test_ident_comm_hostname(command):
 )
 def test_ident_comm_stat_nat(command):
     tested = parser_srx._ParserSrxSets__identify_comm 
-    assert tested(command) == 'static NAT'
\ No newline at end of file
+    assert tested(command) == 'static NAT'
+
+##########################################################################
+### Key token positions:
+@pytest.mark.parametrize(
+    ('command', 'comm_type', 'name'),
+    [
+        (
+            'set logical-systems LS1 security policies from-zone trust to-zone untrust '
+            'policy allow-http description allow policy web',
+            'fw rules', 'allow-http'
+        ),
+        (
+            'set security zones security-zone trust address-book address LAN-HOST1 192.168.1.100/32',
+            'addresses', 'LAN-HOST1'
+        ),
+        ('set applications application-set WEB application junos-http', 'service-groups', 'WEB'),
+        ('set routing-options static route 0.0.0.0/0 next-hop 192.168.0.1', 'static route', '0.0.0.0/0'),
+        ('set system host-name SRX-SAMPLE', 'hostname', 'SRX-SAMPLE'),
+    ]
+)
+def test_classify_key_token(command, comm_type, name):
+    classifier = ParserSrxSets._classifier
+    found_type, key = classifier.classify(command)
+    assert found_type == classifier.comm_type(command) == comm_type
+    assert command.split()[key + 1] == name
+    assert classifier.classify('set system syslog file messages any any') == ('', -1)
+
+
+def test_classify_key_token_not_found():
+    classifier = ParserSrxSets._classifier
+    assert classifier.classify('set security nat static rule-set') == ('static NAT', -1)
+
+
+def test_classify_key_token_repeated_spaces():
+    classifier = ParserSrxSets._classifier
+    command = 'set  security zones security-zone trust  address-book address LAN-HOST1 192.168.1.100/32'
+    comm_type, key = classifier.classify(command)
+    assert (comm_type, key) == ('addresses', 6)
+    assert command.split()[key + 1] == 'LAN-HOST1'
@@ -0,0 +1,179 @@
+import random
+import pytest
+from benchmarks.srx_config_generator import generate_srx_config
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets, ParserSrxSetsIncremental, _diff_hunks
+from data_processing.references import ReferenceIndex
+
+## Abbreviation used in comments:
+## LS - Logical-System
+
+
+def full_parse(lines, compact=False):
+    parser = ParserSrxSets(ConfigDataList(lines), compact=compact)
+    parser.run()
+    return parser.get_data()
+
+
+## Dicts as lists of items, so comparison checks order of entries too
+def ordered(value):
+    if isinstance(value, dict):
+        return [(key, ordered(item)) for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [ordered(item) for item in value]
+    return value
+
+
+def random_edit(rng, lines, pool):
+    lines = list(lines)
+    for _ in range(rng.randint(1, 5)):
+        kind = rng.random()
+        if kind < 0.25 and lines:
+            del lines[rng.randrange(len(lines))]
+        elif kind < 0.5:
+            lines.insert(rng.randrange(len(lines) + 1), rng.choice(pool))
+        elif kind < 0.7 and lines:
+            lines.insert(rng.randrange(len(lines) + 1), lines.pop(rng.randrange(len(lines))))
+        elif lines:
+            i = rng.randrange(len(lines))
+            words = lines[i].split()
+            words[-1] = rng.choice((words[-1] + '0', 'any', '10.9.9.0/24', 'permit'))
+            lines[i] = ' '.join(words)
+    return lines
+
+
+## Property: after any sequence of edits, update() gives the same as full parse,
+## in the same order.
+## Small blocks, so edits cross block boundaries.
+@pytest.mark.parametrize('seed', range(12))
+@pytest.mark.parametrize('block_size', [3, 4096])
+def test_update_equals_full_parse(seed, block_size, monkeypatch):
+    monkeypatch.setattr(ParserSrxSetsIncremental, 'BLOCK_SIZE', block_size)
+    rng = random.Random(seed)
+    lines = list(generate_srx_config(
+        logical_systems=2, policies=15, addresses=15, address_sets=3,
+        applications=3, routes=6, interfaces=3, static_nats=3, seed=seed,
+    ))
+    pool = lines + [
+        'set logical-systems LS9 security address-book global address net9 10.9.0.0/16',
+        'set security nat static rule-set RS9 from zone untrust',
+        'set system host-name SRX-EDITED',
+    ]
+    parser = ParserSrxSetsIncremental(ConfigDataList(lines), compact=bool(seed % 2))
+    parser.run()
+    for _ in range(25):
+        new_lines = random_edit(rng, lines, pool)
+        try:
+            expected = full_parse(new_lines, compact=bool(seed % 2))
+        except Exception:
+            ## Update fails as full parse does and keeps last state:
+            with pytest.raises(Exception):
+                parser.update(ConfigDataList(new_lines))
+            assert ordered(parser.get_data()) == ordered(full_parse(lines, compact=bool(seed % 2)))
+            continue
+        parser.update(ConfigDataList(new_lines))
+        assert ordered(parser.get_data()) == ordered(expected)
+        lines = new_lines
+
+
+## Index of logical systems with changed entries is filled again,
+## others are kept; it equals index of full parse
+@pytest.mark.parametrize('seed', range(4))
+def test_update_keeps_references(seed):
+    rng = random.Random(seed)
+    lines = list(generate_srx_config(
+        logical_systems=2, policies=15, addresses=15, address_sets=3,
+        applications=3, routes=6, interfaces=3, static_nats=3, seed=seed,
+    ))
+    pool = lines + ['set security nat static rule-set RS9 from zone untrust']
+    parser = ParserSrxSetsIncremental(ConfigDataList(lines), references=ReferenceIndex())
+    parser.run()
+    for _ in range(25):
+        new_lines = random_edit(rng, lines, pool)
+        expected = ParserSrxSets(ConfigDataList(new_lines), references=ReferenceIndex())
+        try:
+            expected.run()
+        except Exception:
+            continue
+        parser.update(ConfigDataList(new_lines))
+        assert vars(parser.get_references()) == vars(expected.get_references())
+        for logsys in parser.get_data()[1]:
+            assert parser.get_references().unused(logsys) == expected.get_references().unused(logsys)
+        lines = new_lines
+
+
+def test_update_parses_only_changed_entries():
+    lines = list(generate_srx_config(policies=200, addresses=200, routes=50, seed=1))
+    parser = ParserSrxSetsIncremental(ConfigDataList(lines))
+    parser.run()
+    new_lines = list(lines)
+    i = next(i for i, line in enumerate(lines) if line.endswith((' policy P7 then permit', ' policy P7 then deny')))
+    new_lines[i] = new_lines[i].rsplit(' ', 1)[0] + ' reject'
+    ## Only lines of rule P7 are parsed again:
+    assert parser.update(ConfigDataList(new_lines)) == sum(' policy P7 ' in line for line in new_lines)
+    assert parser.update(ConfigDataList(new_lines)) == 0
+    assert parser.get_data() == full_parse(new_lines)
+
+
+def test_routes_spliced_and_nat_zone_change():
+    lines = [
+        'set routing-options static route 10.0.0.0/8 next-hop 192.0.2.1',
+        'set security nat static rule-set RS1 from zone trust',
+        'set security nat static rule-set RS1 rule R1 match source-address 10.0.0.1/32',
+        'set routing-options static route 10.1.0.0/16 next-hop 192.0.2.1',
+        'set logical-systems LS1 security nat static rule-set RS2 rule R2 then static-nat 1.1.1.2',
+        'set routing-options static route 10.2.0.0/16 next-hop 192.0.2.1',
+    ]
+    parser = ParserSrxSetsIncremental(ConfigDataList(lines))
+    parser.run()
+    new_lines = list(lines)
+    new_lines[3] = 'set routing-options static route 10.1.0.0/16 next-hop 192.0.2.9'
+    new_lines[1] = 'set security nat static rule-set RS1 from zone dmz'
+    parser.update(ConfigDataList(new_lines))
+    hostname, fw_data = parser.get_data()
+    assert fw_data == full_parse(new_lines)[1]
+    assert [route['next hop IP'] for route in fw_data['root']['routes']['static']] == [
+        '192.0.2.1', '192.0.2.9', '192.0.2.1',
+    ]
+    ## Zone carries over to static NAT of other LS:
+    assert fw_data['LS1']['NATs']['static']['R2']['src zone'] == 'dmz'
+
+    ## LS without lines is removed:
+    parser.update(ConfigDataList(new_lines[:4]))
+    assert list(parser.get_data()[1]) == ['root']
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_diff_hunks_pair_equal_lines(seed):
+    rng = random.Random(seed)
+    old = [f'line {rng.randrange(30)}' for _ in range(rng.randrange(200))]
+    new = random_edit(rng, old, [f'line {i}' for i in range(40)])
+    rebuilt = []
+    position = 0
+    for old_start, old_end, new_start, new_end in _diff_hunks(old, new):
+        assert old[position:old_start] == new[len(rebuilt):new_start]
+        rebuilt += old[position:old_start] + new[new_start:new_end]
+        position = old_end
+    assert rebuilt + old[position:] == new
+
+
+def test_added_entries_and_logical_systems_in_config_order():
+    policy = 'set security policies from-zone trust to-zone untrust policy'
+    lines = [
+        'set logical-systems LS1 security address-book global address a1 10.0.0.1/32',
+        f'{policy} P1 match source-address any',
+        f'{policy} P2 match source-address any',
+        'set logical-systems LS2 security address-book global address a2 10.0.0.2/32',
+    ]
+    parser = ParserSrxSetsIncremental(ConfigDataList(lines))
+    parser.run()
+    ## Policy inserted before P1, P2 moved before it:
+    new_lines = [lines[0], lines[2], f'{policy} P0 match source-address any', lines[1], lines[3]]
+    parser.update(ConfigDataList(new_lines))
+    fw_data = parser.get_data()[1]
+    assert [name.rsplit(';', 1)[1] for name in fw_data['root']['fw rules']] == ['P2', 'P0', 'P1']
+    assert ordered(fw_data) == ordered(full_parse(new_lines)[1])
+    ## LS removed and added again keeps its place:
+    parser.update(ConfigDataList(new_lines[1:]))
+    parser.update(ConfigDataList(new_lines))
+    assert list(parser.get_data()[1]) == ['root', 'LS1', 'LS2']
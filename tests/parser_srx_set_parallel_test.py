@@ -0,0 +1,75 @@
+import pytest
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets, ParserSrxSetsParallel
+from data_processing.references import ReferenceIndex
+
+## Abbreviation used in comments:
+## LS - Logical-System
+
+CONFIG = [
+    'set system host-name SRX-SAMPLE',
+    'set security zones security-zone trust address-book address LAN-HOST1 192.168.1.100/32',
+    'set logical-systems LS1 security address-book global address net1 10.1.1.0/24',
+    'set security policies from-zone trust to-zone untrust policy P1 match source-address LAN-HOST1',
+    'set logical-systems LS2 security policies from-zone a to-zone b policy P2 match application junos-http',
+    'set logical-systems LS1 security policies from-zone a to-zone b policy P2 then permit',
+    'set security policies from-zone trust to-zone untrust policy P1 then permit',
+    'set logical-systems LS2 security address-book global address-set SET1 address net2',
+    'set security address-book global address-set SERVERS address LAN-HOST1',
+    'set applications application MyApp destination-port 12345',
+    'set logical-systems LS1 applications application-set WEB application MyApp',
+    'set routing-options static route 0.0.0.0/0 next-hop 192.168.0.1',
+    'set logical-systems LS2 routing-options static route 10.0.0.0/8 next-hop st0.1',
+    'set interfaces ge-0/0/2 unit 0 family inet address 203.0.113.1/24',
+    'set logical-systems LS1 interfaces lt-0/0/0 unit 1 family inet address 10.9.9.1/30',
+    'set interfaces ge-0/0/2 unit 0 description uplink',
+    ## Static NAT source zone set in one LS and used in other LS and root:
+    'set logical-systems LS1 security nat static rule-set RS1 from zone trust',
+    'set logical-systems LS1 security nat static rule-set RS1 rule R1 match source-address 10.0.0.1/32',
+    'set logical-systems LS2 security nat static rule-set RS2 rule R2 then static-nat 1.1.1.2',
+    'set security nat static rule-set RS3 from zone dmz',
+    'set logical-systems LS2 security nat static rule-set RS2 rule R3 then static-nat 1.1.1.3',
+    'set security nat static rule-set RS3 rule R4 then static-nat 1.1.1.4',
+    ## LS which appears after "from zone" lines:
+    'set logical-systems LS3 security nat static rule-set RS5 rule R5 then static-nat 1.1.1.5',
+    'set logical-systems LS1 security nat static rule-set RS1 rule R1 then static-nat 1.1.1.1',
+]
+
+
+def parse(parser_class, lines, **kwargs):
+    parser = parser_class(ConfigDataList(lines), **kwargs)
+    parser.run()
+    return parser.get_data()
+
+
+@pytest.mark.parametrize('workers', [1, 2, 4])
+def test_parallel_same_as_serial(workers):
+    expected = parse(ParserSrxSets, CONFIG)
+    result = parse(ParserSrxSetsParallel, CONFIG, workers=workers)
+    assert result == expected
+    assert list(result[1]) == list(expected[1])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parallel_references_same_as_serial(workers):
+    expected = ParserSrxSets(ConfigDataList(CONFIG), references=ReferenceIndex())
+    expected.run()
+    parser = ParserSrxSetsParallel(ConfigDataList(CONFIG), workers=workers, references=ReferenceIndex())
+    parser.run()
+    assert vars(parser.get_references()) == vars(expected.get_references())
+    for logsys in ('root', 'LS1', 'LS2', 'LS3'):
+        assert parser.get_references().unused(logsys) == expected.get_references().unused(logsys)
+
+
+def test_parallel_nat_zone_carry_over():
+    hostname, fw_data = parse(ParserSrxSetsParallel, CONFIG, workers=2)
+    assert hostname == 'SRX-SAMPLE'
+    assert fw_data['LS2']['NATs']['static']['R2']['src zone'] == 'trust'
+    assert fw_data['LS2']['NATs']['static']['R3']['src zone'] == 'dmz'
+    assert fw_data['LS3']['NATs']['static']['R5']['src zone'] == 'dmz'
+    assert fw_data['root']['NATs']['static']['R4']['src zone'] == 'dmz'
+
+
+def test_parallel_root_only():
+    lines = [l for l in CONFIG if 'logical-systems' not in l]
+    assert parse(ParserSrxSetsParallel, lines, workers=2) == parse(ParserSrxSets, lines)
@@ -1,4 +1,5 @@
 import pytest
+from data_processing.config_data import ConfigDataList
 from data_processing.parsers import ParserSrxSets
 
 ## Abbreviation used in comments:
@@ -214,4 +215,15 @@ def test_ident_comm_hostname(command):
 )
 def test_ident_comm_stat_nat(command):
     tested = parser_srx._ParserSrxSets__identify_comm 
-    assert tested(command) == 'static NAT'
\ No newline at end of file
+    assert tested(command) == 'static NAT'
+
+
+## Static NAT source zone is not kept from one parse to the next
+## and parse without static NAT prints nothing
+def test_nat_zone_cleared_after_parse(capsys):
+    parser = ParserSrxSets(ConfigDataList(['set security nat static rule-set RS1 from zone trust']))
+    parser.run()
+    assert not hasattr(parser, '_ParserSrxSets__stat_nat_src_zone')
+    parser = ParserSrxSets(ConfigDataList(['set system host-name SRX']))
+    parser.run()
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,192 @@
+import random
+import pytest
+from benchmarks.srx_config_generator import generate_srx_config
+from data_processing.config_data import ConfigDataList
+from data_processing.groups import service_interval
+from data_processing.isip import ipv4_range, ipv4_to_int
+from data_processing.parsers import ParserSrxSets
+from data_processing.policy_lookup import Match, PolicyLookup
+
+POLICY = 'set security policies from-zone trust to-zone untrust policy'
+CONFIG = [
+    'set security address-book global address net1 10.1.1.0/24',
+    'set security address-book global address host2 10.1.2.5/32',
+    'set security address-book global address web www.example.com',
+    'set security address-book global address-set inner address host2',
+    'set security address-book global address-set outer address net1',
+    'set security address-book global address-set outer address inner',
+    'set applications application tcp-8000 protocol tcp',
+    'set applications application tcp-8000 destination-port 8000-8100',
+    f'{POLICY} P1 match source-address outer',
+    f'{POLICY} P1 match destination-address any',
+    f'{POLICY} P1 match application tcp-8000',
+    f'{POLICY} P1 then permit',
+    f'{POLICY} P2 match source-address net1',
+    f'{POLICY} P2 match destination-address any',
+    f'{POLICY} P2 match application junos-https',
+    f'{POLICY} P2 then deny',
+    f'{POLICY} P3 match source-address web',
+    f'{POLICY} P3 match destination-address any',
+    f'{POLICY} P3 match application any',
+    f'{POLICY} P3 then permit',
+    'set security policies global policy G1 match source-address any',
+    'set security policies global policy G1 match destination-address any',
+    'set security policies global policy G1 match application junos-ssh',
+    'set security policies global policy G1 then permit',
+]
+
+
+def parse(lines):
+    parser = ParserSrxSets(ConfigDataList(lines))
+    parser.run()
+    return parser.get_data()[1]['root']
+
+
+def test_first_match_in_policy_order():
+    lookup = PolicyLookup(parse(CONFIG))
+    ## Member of nested group, port in range:
+    assert lookup.lookup('trust', 'untrust', '10.1.2.5', '192.0.2.1', 'tcp', 8050) == Match(
+        "['trust'];['untrust'];P1", 'permit'
+    )
+    assert lookup.lookup('trust', 'untrust', '10.1.1.9', '192.0.2.1', 6, 443).name.endswith('P2')
+    ## udp 443 and tcp 8101 do not match P1 or P2; FQDN of P3 is not resolved,
+    ## P3 may match any source:
+    p3 = Match(None, None, ("['trust'];['untrust'];P3",))
+    assert lookup.lookup('trust', 'untrust', '10.1.1.9', '192.0.2.1', 'udp', 443) == p3
+    assert lookup.lookup('trust', 'untrust', '10.1.1.9', '192.0.2.1', 'tcp', 8101) == p3
+    assert lookup.unresolved == {'web'}
+    assert lookup.lookup('untrust', 'trust', '10.1.1.9', '192.0.2.1', 'tcp', 443) is None
+
+
+def test_global_policies_last():
+    ## Global policy first in config is still checked after zone policies:
+    lookup = PolicyLookup(parse(CONFIG[-4:] + CONFIG[:-4]))
+    ## P3 with FQDN may match before:
+    assert lookup.lookup('trust', 'untrust', '10.1.1.1', '192.0.2.1', 'tcp', 22) == Match(
+        "['any'];['any'];G1", 'permit', ("['trust'];['untrust'];P3",)
+    )
+    ## Zone pair without own policies:
+    assert lookup.lookup('dmz', 'mgmt', ipv4_to_int('10.9.9.9'), '192.0.2.1', 'tcp', 22).name.endswith('G1')
+    assert lookup.lookup('dmz', 'mgmt', '10.9.9.9', '192.0.2.1', 'tcp', 23) is None
+    ## FortiGate keeps order of config:
+    lookup = PolicyLookup(parse(CONFIG[-4:] + CONFIG[:-4]), global_last=False)
+    assert lookup.lookup('trust', 'untrust', '10.1.1.1', '192.0.2.1', 'tcp', 22).name.endswith('G1')
+
+
+def test_disabled_rules_and_fortinet_services():
+    logsys_data = {
+        'addresses': {'all': {'type': 'address', 'address': '0.0.0.0/0'}},
+        'services': {'DNS': {'protocol': 'tcp udp', 'tcp-portrange': '53', 'udp-portrange': '53:1024-65535'}},
+        'fw rules': {
+            '1': {'src_zone': ['port1'], 'dst_zone': ['port2'], 'src_IP': ['all'], 'dst_IP': ['all'],
+                  'services': ['DNS'], 'term_action': ['permit'], 'status': ['disable']},
+            '2': {'src_zone': ['port1'], 'dst_zone': ['port2'], 'src_IP': ['all'], 'dst_IP': ['all'],
+                  'services': ['DNS'], 'term_action': ['deny'], 'status': ['enable']},
+        },
+    }
+    lookup = PolicyLookup(logsys_data, global_last=False)
+    assert lookup.rule_count() == 1
+    assert lookup.lookup('port1', 'port2', '10.0.0.1', '10.0.0.2', 'udp', 53) == Match('2', 'deny')
+    assert lookup.lookup('port1', 'port2', '10.0.0.1', '10.0.0.2', 'udp', 1024) is None
+    with pytest.raises(ValueError):
+        lookup.lookup('port1', 'port2', '10.0.0.1', 'host', 'udp', 53)
+
+
+## Brute force: walk rules in order, global policies after zone policies;
+## FQDN may match any address
+def linear_lookup(logsys_data, src_zone, dst_zone, src_ip, dst_ip, protocol, port):
+    def addresses(names):
+        for name in names:
+            if name == 'any':
+                yield 0, 0xFFFFFFFF
+            elif name in logsys_data['address-groups']:
+                yield from addresses(logsys_data['address-groups'][name])
+            elif ipv4_range(logsys_data['addresses'][name]['address']):
+                yield ipv4_range(logsys_data['addresses'][name]['address'])
+            else:
+                yield None
+
+    def services(names):
+        for name in names:
+            service = logsys_data['services'].get(name)
+            if service:
+                yield service_interval(service['protocol'], service['destination-port'])
+            else:
+                yield service_interval(*{
+                    'any': ('any', None), 'junos-http': ('tcp', '80'), 'junos-https': ('tcp', '443'),
+                    'junos-ssh': ('tcp', '22'), 'junos-dns-udp': ('udp', '53'), 'junos-ntp': ('udp', '123'),
+                }[name])
+
+    ## True - matches, None - may match, False - does not
+    def matches(intervals, value):
+        intervals = list(intervals)
+        if any(interval and interval[0] <= value <= interval[1] for interval in intervals):
+            return True
+        return None if None in intervals else False
+
+    rules = sorted(logsys_data['fw rules'].items(), key=lambda item: item[0].startswith("['any']"))
+    unresolved = []
+    for name, rule in rules:
+        if {src_zone, 'any'} & set(rule['src_zone']) and {dst_zone, 'any'} & set(rule['dst_zone']):
+            results = [
+                matches(addresses(rule['src_IP']), src_ip), matches(addresses(rule['dst_IP']), dst_ip),
+                matches(services(rule['services']), (6 if protocol == 'tcp' else 17) << 16 | port),
+            ]
+            if all(result is True for result in results):
+                return Match(name, rule['term_action'][-1], tuple(unresolved))
+            if False not in results:
+                unresolved.append(name)
+    return Match(None, None, tuple(unresolved)) if unresolved else None
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_single_and_batch_equal_linear_scan(seed):
+    lines = list(generate_srx_config(
+        policies=300, addresses=40, address_sets=8, applications=8, seed=seed,
+    ))
+    lines += [
+        f'set security policies global policy G{i} {match}'
+        for i in range(5)
+        for match in (
+            'match source-address any', 'match destination-address ADDR-1', 'match application any', 'then permit',
+        )
+    ]
+    logsys_data = parse(lines)
+    rng = random.Random(seed)
+    networks = [ipv4_range(address['address']) for address in logsys_data['addresses'].values()]
+    networks = [network for network in networks if network]
+    flows = []
+    for _ in range(500):
+        src_zone, dst_zone = rng.choice(['trust', 'untrust', 'dmz', 'mgmt', 'vpn']), rng.choice(['untrust', 'vpn'])
+        src, dst = rng.choice(networks), rng.choice(networks)
+        protocol = rng.choice(['tcp', 'udp'])
+        flows.append((
+            src_zone, dst_zone, rng.randint(*src), rng.choice((dst[0], dst[1], dst[1] + 1)),
+            protocol, rng.choice((80, 443, 22, 53, 123, rng.randrange(1024, 65536))),
+        ))
+    lookup = PolicyLookup(logsys_data)
+    expected = [linear_lookup(logsys_data, *flow) for flow in flows]
+    assert [lookup.lookup(*flow) for flow in flows] == expected
+    assert lookup.lookup_batch(flows) == expected
+    sure = [match is not None and match.name is not None for match in expected]
+    assert any(sure) and not all(sure)
+
+
+## Deny with predefined application not in JUNOS_APPLICATIONS must not be
+## skipped: permit after it is not the sure answer
+def test_unresolved_deny_before_permit():
+    lookup = PolicyLookup(parse([
+        f'{POLICY} D1 match source-address any',
+        f'{POLICY} D1 match destination-address any',
+        f'{POLICY} D1 match application junos-ms-sql',
+        f'{POLICY} D1 then deny',
+        f'{POLICY} P1 match source-address any',
+        f'{POLICY} P1 match destination-address any',
+        f'{POLICY} P1 match application any',
+        f'{POLICY} P1 then permit',
+    ]))
+    assert lookup.unresolved == {'junos-ms-sql'}
+    expected = Match("['trust'];['untrust'];P1", 'permit', ("['trust'];['untrust'];D1",))
+    assert lookup.lookup('trust', 'untrust', '10.0.0.1', '10.0.0.2', 'tcp', 1433) == expected
+    assert lookup.lookup_batch([('trust', 'untrust', '10.0.0.1', '10.0.0.2', 'tcp', 1433)]) == [expected]
+    assert lookup.rules()[0]['unresolved'] == {'services': ['junos-ms-sql']}
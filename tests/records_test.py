@@ -0,0 +1,83 @@
+import json
+import pickle
+import pytest
+from data_processing.config_data import ConfigDataList
+from data_processing.data_writers import DataWriterJson
+from data_processing.parsers import ParserSrxSets, ParserSrxSetsParallel
+from data_processing.records import FwRule, Route, Service
+
+CONFIG = [
+    'set system host-name SRX-SAMPLE',
+    'set security address-book global address net1 10.1.1.0/24',
+    'set security address-book global address range1 10.1.1.1-10.1.1.9',
+    'set security address-book global address-set SET1 address net1',
+    'set security policies from-zone trust to-zone untrust policy P1 match source-address net1',
+    'set security policies from-zone trust to-zone untrust policy P1 match application MyApp',
+    'set security policies from-zone trust to-zone untrust policy P1 then permit',
+    'set security policies from-zone trust to-zone untrust policy P1 description web access',
+    'set applications application MyApp protocol tcp',
+    'set applications application MyApp destination-port 12345',
+    'set applications application MyApp inactivity-timeout 600',
+    'set applications application-set WEB application MyApp',
+    'set routing-options static route 0.0.0.0/0 next-hop 192.168.0.1',
+    'set routing-options static route 10.0.0.0/8 next-hop st0.1',
+    'set interfaces ge-0/0/2 unit 0 family inet address 203.0.113.1/24',
+    'set logical-systems LS1 security nat static rule-set RS1 from zone trust',
+    'set logical-systems LS1 security nat static rule-set RS1 rule R1 match source-address 10.0.0.1/32',
+    'set logical-systems LS1 security nat static rule-set RS1 rule R1 then static-nat 1.1.1.1',
+]
+
+
+def parse(parser_class, **kwargs):
+    parser = parser_class(ConfigDataList(CONFIG), **kwargs)
+    parser.run()
+    return parser.get_data()
+
+
+@pytest.mark.parametrize('parser_class', [ParserSrxSets, ParserSrxSetsParallel])
+def test_compact_same_as_dicts(parser_class):
+    hostname, fw_data = parse(parser_class, compact=True)
+    expected = parse(ParserSrxSets)
+    assert (hostname, fw_data) == expected
+
+    rule = fw_data['root']['fw rules']["['trust'];['untrust'];P1"]
+    assert isinstance(rule, FwRule)
+    assert rule['src_IP'] == ['net1']
+    assert rule['dst_IP'] == []
+    assert isinstance(fw_data['root']['services']['MyApp'], Service)
+    assert fw_data['root']['services']['MyApp']['inactivity-timeout'] == '600'
+    assert isinstance(fw_data['root']['routes']['static'][1], Route)
+    assert dict(fw_data['root']['routes']['static'][1]) == {
+        'dest IP': '10.0.0.0/8', 'next hop interface': 'st0.1'
+    }
+
+
+def test_compact_json_same_as_dicts(tmp_path):
+    writer = DataWriterJson()
+    writer.write(tmp_path / 'compact.json', parse(ParserSrxSets, compact=True)[1])
+    writer.write(tmp_path / 'dicts.json', parse(ParserSrxSets)[1])
+    with open(tmp_path / 'compact.json') as compact, open(tmp_path / 'dicts.json') as dicts:
+        assert json.load(compact) == json.load(dicts)
+
+
+def test_record_keys():
+    route = Route()
+    route['dest IP'] = '0.0.0.0/0'
+    assert 'next hop IP' not in route
+    with pytest.raises(KeyError):
+        route['next hop IP']
+    with pytest.raises(KeyError):
+        route['gateway'] = '1.1.1.1'
+    assert pickle.loads(pickle.dumps(route)) == route
+    assert len(FwRule()) == 11
+
+
+def test_record_get_does_not_create_lists():
+    rule = FwRule()
+    assert rule.get('src_IP') == []
+    assert rule.src_IP is None
+    assert rule.get('missing', 'default') == 'default'
+    service = Service()
+    service['inactivity-timeout'] = '600'
+    assert service.get('inactivity-timeout') == '600'
+    assert service.get('protocol') is None
@@ -0,0 +1,129 @@
+import pytest
+from benchmarks.srx_config_generator import generate_srx_config, to_hierarchical
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxHierarchical, ParserSrxSets
+from data_processing.references import Reference, ReferenceIndex
+
+POLICY = 'set security policies from-zone trust to-zone untrust policy'
+CONFIG = [
+    'set security address-book global address net1 10.1.1.0/24',
+    'set security address-book global address host2 10.1.1.5/32',
+    'set security address-book global address lonely 10.9.9.9/32',
+    'set security address-book global address-set inner address host2',
+    'set security address-book global address-set outer address inner',
+    'set security address-book global address-set outer address net1',
+    'set security address-book global address-set dead address lonely',
+    'set security address-book global address-set dead address net1',
+    'set security address-book global address-set deader address dead',
+    'set applications application tcp-8000 protocol tcp',
+    'set applications application tcp-8000 destination-port 8000',
+    'set applications application tcp-9000 protocol tcp',
+    'set applications application-set apps application tcp-8000',
+    'set applications application-set apps application junos-https',
+    f'{POLICY} P1 match source-address outer',
+    f'{POLICY} P1 match destination-address any',
+    f'{POLICY} P1 match application apps',
+    f'{POLICY} P1 then permit',
+    f'{POLICY} P2 match source-address host2',
+    f'{POLICY} P2 match destination-address net1',
+    f'{POLICY} P2 match application junos-https',
+    f'{POLICY} P2 then deny',
+    'set security policies global policy G1 match source-address net1',
+    'set security policies global policy G1 match destination-address any',
+    'set security policies global policy G1 match application any',
+    'set security policies global policy G1 match from-zone dmz',
+    'set security policies global policy G1 then permit',
+    'set security nat static rule-set RS1 from zone untrust',
+    'set security nat static rule-set RS1 rule R1 match source-address 10.1.1.5/32',
+    'set security nat static rule-set RS1 rule R1 then static-nat prefix 192.0.2.5/32',
+]
+P1 = Reference('fw rules', "['trust'];['untrust'];P1")
+P2 = Reference('fw rules', "['trust'];['untrust'];P2")
+G1 = Reference('fw rules', "['any'];['any'];G1")
+
+
+def parse(lines, parser_class=ParserSrxSets):
+    parser = parser_class(ConfigDataList(lines), references=ReferenceIndex())
+    parser.run()
+    return parser.get_data()[1], parser.get_references()
+
+
+def test_direct_and_transitive_references():
+    _, references = parse(CONFIG)
+    assert references.referrers('root', 'address', 'net1') == [
+        Reference('address-groups', 'outer'), Reference('address-groups', 'dead'), P2, G1,
+    ]
+    ## Through nested groups, nearest first:
+    assert references.blast_radius('root', 'address', 'host2') == [
+        Reference('address-groups', 'inner'), P2, Reference('address-groups', 'outer'), P1,
+    ]
+    assert references.blast_radius('root', 'service', 'tcp-8000') == [Reference('service-groups', 'apps'), P1]
+    assert references.referrers('root', 'service', 'junos-https') == [Reference('service-groups', 'apps'), P2]
+    ## Zones of policies and static NAT, global policy only by its match zone:
+    assert references.referrers('root', 'zone', 'untrust') == [P1, P2, Reference('NATs', 'R1')]
+    assert references.referrers('root', 'zone', 'dmz') == [G1]
+    assert references.referrers('root', 'zone', 'any') == []
+    assert references.blast_radius('root', 'address', 'missing') == []
+
+
+def test_unused_objects():
+    _, references = parse(CONFIG)
+    assert references.unused() == [Reference('address-groups', 'deader'), Reference('services', 'tcp-9000')]
+    ## net1 is used by rules, lonely only by unused group:
+    assert references.unused(transitive=True) == [
+        Reference('address-groups', 'deader'), Reference('services', 'tcp-9000'),
+        Reference('address-groups', 'dead'), Reference('addresses', 'lonely'),
+    ]
+    assert references.unused('LS1') == []
+    ## Object referenced before its definition:
+    _, references = parse(CONFIG[-16:] + CONFIG[:-16])
+    assert Reference('addresses', 'net1') not in references.unused(transitive=True)
+
+
+def test_merge_and_clear_logical_systems():
+    _, references = parse(CONFIG)
+    _, other = parse([f'set logical-systems LS1 {line[4:]}' for line in CONFIG])
+    references.merge(other)
+    assert references.logical_systems() == {'root', 'LS1'}
+    assert references.referrers('LS1', 'zone', 'untrust') == [P1, P2, Reference('NATs', 'R1')]
+    with pytest.raises(ValueError):
+        references.merge(other)
+    references.clear(['LS1'])
+    assert references.logical_systems() == {'root'}
+    assert references.unused('LS1') == []
+    assert references.referrers('root', 'zone', 'untrust') == [P1, P2, Reference('NATs', 'R1')]
+
+
+def test_hierarchical_config_and_no_index():
+    _, references = parse(to_hierarchical(CONFIG), ParserSrxHierarchical)
+    assert references.unused() == [Reference('address-groups', 'deader'), Reference('services', 'tcp-9000')]
+    parser = ParserSrxSets(ConfigDataList(CONFIG))
+    parser.run()
+    assert parser.get_references() is None
+
+
+## Index built while parsing against scan of all rules, groups and NATs of fw_data
+@pytest.mark.parametrize('seed', range(3))
+def test_index_equals_scan_of_fw_data(seed):
+    fw_data, references = parse(list(generate_srx_config(logical_systems=2, policies=200, seed=seed)))
+    for logsys, data in fw_data.items():
+        expected = {}
+        for rule_name, rule in data['fw rules'].items():
+            for key, kind in ReferenceIndex.RULE_KEYS.items():
+                for name in rule[key]:
+                    if not (kind == 'zone' and name == 'any'):
+                        expected.setdefault((kind, name), set()).add(Reference('fw rules', rule_name))
+        for section, kind in (('address-groups', 'address'), ('service-groups', 'service')):
+            for group, members in data[section].items():
+                for name in members:
+                    expected.setdefault((kind, name), set()).add(Reference(section, group))
+        for nat_name, nat in data['NATs']['static'].items():
+            expected.setdefault(('zone', nat['src zone']), set()).add(Reference('NATs', nat_name))
+
+        for (kind, name), referrers in expected.items():
+            assert set(references.referrers(logsys, kind, name)) == referrers
+        defined = [
+            Reference(section, name) for section, kind in ReferenceIndex.KINDS.items()
+            for name in data[section] if (kind, name) not in expected
+        ]
+        assert set(references.unused(logsys)) == set(defined)
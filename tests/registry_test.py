@@ -0,0 +1,72 @@
+import importlib.metadata
+import os
+import subprocess
+import sys
+import pytest
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets, parsers_factory
+from data_processing.registry import Registry, writers_factory
+from data_processing.data_writers import DataWriterJson, writers_factory as data_writers_factory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Plugin():
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+def test_lazy_target_and_defaults():
+    registry = Registry('parser', 'bricklayer.tests')
+    registry.register('plugin', f'{__name__}:Plugin', option=1)
+    assert registry.get('plugin') is Plugin
+    created = registry.create('plugin', 'conf', other=2)
+    assert created.args == ('conf',)
+    assert created.kwargs == {'option': 1, 'other': 2}
+    assert registry.create('plugin', option=3).kwargs == {'option': 3}
+
+
+def test_unknown_name(monkeypatch):
+    monkeypatch.setattr(importlib.metadata, 'entry_points', lambda group: [])
+    registry = Registry('writer', 'bricklayer.tests')
+    registry.register('json', dict)
+    with pytest.raises(ValueError, match="Unknown writer 'xml', available: json"):
+        registry.create('xml')
+
+
+def test_entry_points(monkeypatch):
+    entry_points = [
+        importlib.metadata.EntryPoint('plugin', f'{__name__}:Plugin', 'bricklayer.tests'),
+        importlib.metadata.EntryPoint('srx_set', f'{__name__}:Plugin', 'bricklayer.tests'),
+    ]
+    monkeypatch.setattr(importlib.metadata, 'entry_points', lambda group: entry_points)
+    registry = Registry('parser', 'bricklayer.tests')
+    registry.register('srx_set', ParserSrxSets)
+    assert registry.get('plugin') is Plugin
+    ## Built-in names are not replaced:
+    assert registry.get('srx_set') is ParserSrxSets
+    assert registry.names() == ['srx_set', 'plugin']
+
+
+def test_built_in_factories():
+    assert data_writers_factory is writers_factory
+    assert isinstance(writers_factory('json_compact'), DataWriterJson)
+    assert isinstance(parsers_factory('srx_set', ConfigDataList([])), ParserSrxSets)
+
+
+## New interpreter, modules of other tests are not loaded there
+def test_text_path_does_not_import_optional_modules(tmp_path):
+    conf_file = tmp_path / 'srx.txt'
+    conf_file.write_text('set system host-name SRX-1\n')
+    code = (
+        'import sys\n'
+        'from run import Generate\n'
+        'generate = Generate()\n'
+        f'hostname, fw_data = generate("txt", "srx_set", {{"conf_file": {str(conf_file)!r}}})\n'
+        f'generate.write_data_to_file(fw_data, {str(tmp_path / "out.json")!r}, "json")\n'
+        'assert hostname == "SRX-1"\n'
+        'print("loaded:", *(m for m in ("netmiko", "paramiko", "openpyxl", "pyarrow", "numpy") if m in sys.modules))\n'
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == 'loaded:'
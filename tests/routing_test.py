@@ -0,0 +1,106 @@
+import random
+import pytest
+from data_processing.config_data import ConfigDataList
+from data_processing.isip import int_to_ipv4
+from data_processing.parsers import ParserSrxSets
+from data_processing.routing import RouteEntry, RoutingTable, routing_tables
+
+CONFIG = [
+    'set interfaces ge-0/0/0 unit 0 family inet address 192.0.2.10/24',
+    'set routing-instances VR1 interface ge-0/0/1.5',
+    'set interfaces ge-0/0/1 unit 5 family inet address 198.51.100.1/30',
+    'set routing-options static route 0.0.0.0/0 next-hop 192.0.2.1',
+    'set routing-options static route 10.0.0.0/8 next-hop 192.0.2.2',
+    'set routing-options static route 10.0.0.0/8 next-hop 192.0.2.3',
+    'set routing-options static route 10.1.0.0/16 next-hop st0.1',
+    'set routing-options static route 192.0.2.0/24 next-hop 192.0.2.99',
+    'set routing-instances VR1 routing-options static route 10.0.0.0/8 next-hop 198.51.100.2',
+    'set logical-systems LS1 routing-options static route 0.0.0.0/0 next-hop 203.0.113.1',
+]
+
+
+def parse(lines, compact=False):
+    parser = ParserSrxSets(ConfigDataList(lines), compact=compact)
+    parser.run()
+    return parser.get_data()[1]
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_parser_keeps_routing_instances(compact):
+    fw_data = parse(CONFIG, compact=compact)
+    ## Routing instance line before address line of the same unit:
+    assert dict(fw_data['root']['interfaces']['ge-0/0/1']['5']) == {
+        'IP': '198.51.100.1/30', 'routing instance': 'VR1',
+    }
+    assert dict(fw_data['root']['interfaces']['ge-0/0/0']['0']) == {'IP': '192.0.2.10/24'}
+    routes = fw_data['root']['routes']['static']
+    assert 'routing instance' not in routes[0]
+    assert routes[-1]['routing instance'] == 'VR1'
+
+
+def test_longest_prefix_match_per_instance():
+    tables = routing_tables(parse(CONFIG))
+    assert sorted(tables) == [('LS1', 'master'), ('root', 'VR1'), ('root', 'master')]
+    master = tables[('root', 'master')]
+    assert master.lookup('10.1.2.3') == (RouteEntry('10.1.0.0/16', 'static', None, 'st0.1'),)
+    ## Equal cost routes are kept in config order:
+    assert [route.next_hop_ip for route in master.lookup('10.2.0.1')] == ['192.0.2.2', '192.0.2.3']
+    assert master.lookup('8.8.8.8')[0].next_hop_ip == '192.0.2.1'
+    ## Connected route wins over static route of the same prefix:
+    assert master.lookup('192.0.2.50') == (RouteEntry('192.0.2.0/24', 'direct', None, 'ge-0/0/0.0'),)
+    assert master.lookup('192.0.2.10') == (RouteEntry('192.0.2.10/32', 'local', None, 'ge-0/0/0.0'),)
+
+    vr1 = tables[('root', 'VR1')]
+    assert vr1.lookup(0x0A000001)[0].next_hop_ip == '198.51.100.2'
+    assert vr1.lookup('198.51.100.3')[0].type == 'direct'
+    assert vr1.lookup('8.8.8.8') == ()
+    assert tables[('LS1', 'master')].lookup('10.0.0.1')[0].next_hop_ip == '203.0.113.1'
+
+
+def test_fortigate_routes_to_address_objects():
+    fw_data = {'root': {
+        'addresses': {'lan': {'type': 'address', 'address': '10.10.0.0/16'}},
+        'interfaces': {'port1': {'0': {'IP': '172.16.0.1/24'}}},
+        'routes': {'static': [
+            {'dest IP': 'lan', 'next hop IP': '172.16.0.254', 'next hop interface': 'port1'},
+            {'dest IP': 'vpn-peers', 'next hop interface': 'tunnel1'},
+        ]},
+    }}
+    table = routing_tables(fw_data, interface_units=False)[('root', 'master')]
+    assert table.lookup('10.10.1.1') == (RouteEntry('10.10.0.0/16', 'static', '172.16.0.254', 'port1'),)
+    assert table.lookup('172.16.0.9')[0].next_hop_interface == 'port1'
+    assert table.skipped == [RouteEntry('vpn-peers', 'static', None, 'tunnel1')]
+    with pytest.raises(ValueError):
+        table.lookup('10.10.1.1/32')
+
+
+## Trie and flattened ranges against scan of all prefixes
+@pytest.mark.parametrize('seed', range(5))
+def test_single_and_batch_equal_linear_scan(seed):
+    pytest.importorskip('numpy')
+    rng = random.Random(seed)
+    table = RoutingTable()
+    prefixes = []
+    for _ in range(rng.randrange(1, 400)):
+        length = rng.choice((0, 1, 8, 15, 16, 23, 24, 31, 32))
+        network = (0x0A000000 | rng.getrandbits(24) >> rng.randrange(25)) & ~(0xFFFFFFFF >> length) & 0xFFFFFFFF
+        prefixes.append((network, length))
+        table.add(RouteEntry(f'{int_to_ipv4(network)}/{length}', 'static', None, None))
+    ips = [rng.choice((0, 0xFFFFFFFF, rng.getrandbits(32), 0x0A000000 | rng.getrandbits(rng.randrange(25))))
+           for _ in range(2000)]
+    ips += [network for network, _ in prefixes] + [network | 0xFFFFFFFF >> length for network, length in prefixes]
+
+    def linear(ip):
+        matching = [
+            (length, f'{int_to_ipv4(network)}/{length}') for network, length in prefixes
+            if (ip ^ network) >> (32 - length) == 0 or length == 0
+        ]
+        return max(matching)[1] if matching else None
+
+    def destination(routes):
+        return routes[0].destination if routes else None
+
+    expected = [linear(ip) for ip in ips]
+    assert [destination(table.lookup(ip)) for ip in ips] == expected
+    assert [destination(table.entry(entry)) for entry in table.lookup_batch(ips).tolist()] == expected
+    assert table.lookup_batch([int_to_ipv4(ip) for ip in ips[:50]]).tolist() == table.lookup_batch(ips[:50]).tolist()
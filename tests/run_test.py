@@ -0,0 +1,107 @@
+import json
+import os
+import sqlite3
+import run
+from benchmarks.srx_config_generator import generate_srx_config_lines
+from run import Generate, find_config_files, main, run_batch
+
+
+def write_corpus(path, files=3, lines=500):
+    os.makedirs(path / 'sub')
+    paths = []
+    for i in range(files):
+        conf_file = path / ('sub' if i % 2 else '') / f'srx-{i}.txt'
+        conf_file.write_text(
+            '\n'.join(generate_srx_config_lines(lines, seed=i)).replace('SRX-BENCH', f'SRX-{i}') + '\n'
+        )
+        paths.append(str(conf_file))
+    return paths
+
+
+def test_find_config_files(tmp_path):
+    paths = write_corpus(tmp_path)
+    (tmp_path / 'notes.md').write_text('')
+    assert find_config_files([str(tmp_path)], '*.txt') == [paths[0], paths[2], paths[1]]
+    assert find_config_files([str(tmp_path / '**' / '*.txt'), paths[1]]) == [paths[0], paths[2], paths[1]]
+    assert find_config_files([str(tmp_path / 'missing*')]) == []
+
+
+def test_batch_continues_past_failures(tmp_path, capsys):
+    write_corpus(tmp_path / 'configs')
+    ## Address-set nested in address-set is not supported by parser:
+    (tmp_path / 'configs' / 'broken.txt').write_text(
+        'set security address-book global address-set S1 address-set S2\n'
+    )
+    output = tmp_path / 'out'
+    code = main([str(tmp_path / 'configs'), '-o', str(output), '-w', '2', '--pattern', '*.txt'])
+
+    assert code == 1
+    assert sorted(os.listdir(output)) == ['srx-0.json', 'srx-1.json', 'srx-2.json']
+    with open(output / 'srx-1.json') as file:
+        assert 'fw rules' in json.load(file)['root']
+    printed = capsys.readouterr().out
+    assert '3 parsed, 1 failed' in printed
+    assert 'FAILED: ValueError' in printed
+
+
+## Worker which dies without result, as killed by out-of-memory killer
+def _killed_worker(*args):
+    os._exit(1)
+
+
+def test_batch_reports_files_of_broken_pool(tmp_path, monkeypatch):
+    paths = write_corpus(tmp_path)
+    monkeypatch.setattr(run, '_process_file', _killed_worker)
+    results = list(run_batch(paths, 'srx_set', str(tmp_path / 'out'), workers=2))
+    assert sorted(result.conf_file for result in results) == sorted(paths)
+    assert all('BrokenProcessPool' in result.error for result in results)
+
+
+def test_batch_in_process_same_names(tmp_path):
+    paths = write_corpus(tmp_path, files=2)
+    copy = tmp_path / 'sub' / 'srx-0.txt'
+    copy.write_text(open(paths[0]).read())
+    results = list(run_batch([paths[0], str(copy)], 'srx_set', str(tmp_path / 'out'), workers=1))
+    assert [r.error for r in results] == [None, None]
+    assert [os.path.basename(r.output) for r in results] == ['srx-0.json', 'srx-0-2.json']
+    assert results[0].hostname == 'SRX-0'
+
+
+def test_batch_to_sqlite(tmp_path):
+    paths = write_corpus(tmp_path)
+    database = tmp_path / 'out' / 'fleet.sqlite'
+    results = list(run_batch(paths, 'srx_set', str(database), 'sqlite', workers=2))
+    assert all(result.error is None and result.fw_data is None for result in results)
+    with sqlite3.connect(database) as connection:
+        hostnames = {row[0] for row in connection.execute('SELECT hostname FROM devices')}
+    assert hostnames == {'SRX-0', 'SRX-1', 'SRX-2'}
+
+
+def test_batch_unreadable_file_fails_and_device_without_hostname(tmp_path):
+    paths = write_corpus(tmp_path)
+    ## Directory cannot be read as config, it is not parsed as empty one:
+    (tmp_path / 'unreadable.txt').mkdir()
+    results = list(run_batch([str(tmp_path / 'unreadable.txt')], 'srx_set', str(tmp_path / 'out'), workers=1))
+    assert 'IsADirectoryError' in results[0].error
+
+    no_hostname = tmp_path / 'fw-no-name.txt'
+    no_hostname.write_text('set security address-book global address net1 10.1.1.0/24\n')
+    database = tmp_path / 'out' / 'fleet.sqlite'
+    results = list(run_batch([paths[0], str(no_hostname)], 'srx_set', str(database), 'sqlite', workers=1))
+    assert [result.error for result in results] == [None, None]
+    with sqlite3.connect(database) as connection:
+        hostnames = {row[0] for row in connection.execute('SELECT hostname FROM devices')}
+    assert hostnames == {'SRX-0', 'fw-no-name'}
+
+
+def test_generate_stats_of_all_parses(tmp_path):
+    paths = write_corpus(tmp_path, files=2, lines=100)
+    generate = Generate(stats=True)
+    lines = []
+    for path in paths:
+        generate('txt', 'srx_set', {'conf_file': path})
+        lines.append(generate.last_stats.lines)
+    assert lines == [len(open(path).readlines()) for path in paths]
+    assert generate.stats.lines == sum(lines)
+    generate.write_stats_report(tmp_path / 'stats.json')
+    assert json.loads((tmp_path / 'stats.json').read_text())['lines'] == sum(lines)
@@ -0,0 +1,120 @@
+import random
+import pytest
+from data_processing import shadowing
+from data_processing.config_data import ConfigDataList
+from data_processing.groups import IntervalSet
+from data_processing.parsers import ParserSrxSets
+from data_processing.shadowing import DIMENSIONS, Finding, analyze, analyze_rules, summarize
+
+POLICY = 'set security policies from-zone trust to-zone untrust policy'
+
+
+def policy(name, source, destination, application, action):
+    return [
+        f'{POLICY} {name} match source-address {source}',
+        f'{POLICY} {name} match destination-address {destination}',
+        f'{POLICY} {name} match application {application}',
+        f'{POLICY} {name} then {action}',
+    ]
+
+
+CONFIG = [
+    'set security address-book global address net1 10.1.1.0/24',
+    'set security address-book global address host2 10.1.1.5/32',
+    'set security address-book global address net3 10.1.0.0/16',
+    'set security address-book global address web www.example.com',
+    'set security address-book global address-set pair address host2',
+    'set security address-book global address-set pair address net1',
+    *policy('P1', 'net1', 'any', 'junos-https', 'permit'),
+    *policy('P2', 'host2', 'any', 'junos-https', 'permit'),
+    *policy('P3', 'pair', 'any', 'junos-https', 'deny'),
+    *policy('P4', 'net3', 'any', 'any', 'deny'),
+    *policy('P5', 'web', 'any', 'any', 'permit'),
+    'set security policies global policy G1 match source-address any',
+    'set security policies global policy G1 match destination-address any',
+    'set security policies global policy G1 match application junos-ssh',
+    'set security policies global policy G1 then permit',
+    'set security policies global policy G2 match source-address net1',
+    'set security policies global policy G2 match destination-address any',
+    'set security policies global policy G2 match application junos-ssh',
+    'set security policies global policy G2 then deny',
+]
+
+
+def parse(lines):
+    parser = ParserSrxSets(ConfigDataList(lines))
+    parser.run()
+    return parser.get_data()[1]['root']
+
+
+def test_shadowed_redundant_and_correlated():
+    findings = analyze(parse(CONFIG))
+    trust = [finding for finding in findings if finding.src_zone == 'trust']
+    assert trust == [
+        Finding('trust', 'untrust', 'redundant', "['trust'];['untrust'];P2", "['trust'];['untrust'];P1", False),
+        Finding('trust', 'untrust', 'shadowed', "['trust'];['untrust'];P3", "['trust'];['untrust'];P1", True),
+        ## P4 covers P1, which is not reported; global policies follow zone policies:
+        Finding('trust', 'untrust', 'correlated', "['any'];['any'];G1", "['trust'];['untrust'];P4", False),
+        Finding('trust', 'untrust', 'redundant', "['any'];['any'];G2", "['trust'];['untrust'];P4", False),
+    ]
+    ## FQDN matches nothing, P5 is left out; global policies compared only with each other:
+    assert [finding for finding in findings if finding.src_zone == 'any'] == [
+        Finding('any', 'any', 'shadowed', "['any'];['any'];G2", "['any'];['any'];G1", False),
+    ]
+    assert summarize(findings) == {
+        ('trust', 'untrust'): {'redundant': 2, 'shadowed': 1, 'correlated': 1},
+        ('any', 'any'): {'shadowed': 1},
+    }
+    assert not any(finding.type == 'correlated' for finding in analyze(parse(CONFIG), correlated=False))
+
+
+def test_global_rules_not_compared_outside_any_pair():
+    rules = [
+        {'name': name, 'action': action, 'global': True, 'sources': IntervalSet([(0, 10)]),
+         'destinations': IntervalSet([(0, 10)]), 'services': IntervalSet([(0, 10)])}
+        for name, action in (('G1', 'permit'), ('G2', 'deny'))
+    ]
+    assert analyze_rules(rules, compare_global=False) == []
+    assert analyze_rules(rules) == [('shadowed', rules[1], rules[0], True)]
+
+
+def random_intervals(rng):
+    intervals = []
+    for _ in range(rng.choice((1, 1, 1, 2, 3))):
+        low = rng.randrange(100)
+        intervals.append((low, min(low + rng.choice((0, 3, 10, 40, 100)), 99)))
+    return IntervalSet(intervals)
+
+
+## Vectorized analysis against check of every pair of rules on IntervalSets
+@pytest.mark.parametrize('seed', range(5))
+def test_analysis_equals_pairwise_check(seed, monkeypatch):
+    monkeypatch.setattr(shadowing, 'BLOCK_SIZE', 8)
+    monkeypatch.setattr(shadowing, 'WIDE_FACTOR', 2)
+    rng = random.Random(seed)
+    rules = [
+        {'name': f'R{n}', 'action': rng.choice(('permit', 'deny')), 'global': rng.random() < 0.2,
+         **{dimension: random_intervals(rng) for dimension in DIMENSIONS}}
+        for n in range(150)
+    ]
+    compare_global = seed % 2 == 0
+
+    def covers(rule, other):
+        return all(rule[d].covers(other[d]) for d in DIMENSIONS)
+
+    expected = []
+    for j, later in enumerate(rules):
+        earlier_rules = [
+            earlier for earlier in rules[:j] if compare_global or not (earlier['global'] and later['global'])
+        ]
+        cover = next((earlier for earlier in earlier_rules if covers(earlier, later)), None)
+        if cover:
+            finding_type = 'redundant' if cover['action'] == later['action'] else 'shadowed'
+            expected.append((finding_type, later, cover, covers(later, cover)))
+            continue
+        expected += [
+            ('correlated', later, earlier, False) for earlier in earlier_rules
+            if earlier['action'] != later['action'] and not covers(later, earlier)
+            and all(earlier[d].intersects(later[d]) for d in DIMENSIONS)
+        ]
+    assert analyze_rules(rules, compare_global=compare_global) == expected
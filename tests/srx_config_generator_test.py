@@ -0,0 +1,58 @@
+import json
+from benchmarks.srx_config_generator import generate_srx_config, generate_srx_config_lines
+from benchmarks.suite import DEFAULT_BASELINE, compare, main as suite_main
+from data_processing.config_data import ConfigDataList
+from data_processing.parsers import ParserSrxSets
+
+
+def test_generator_is_deterministic():
+    assert list(generate_srx_config_lines(2_000)) == list(generate_srx_config_lines(2_000))
+    assert list(generate_srx_config_lines(2_000, seed=1)) != list(generate_srx_config_lines(2_000))
+
+
+def test_generator_size():
+    lines = sum(1 for _ in generate_srx_config_lines(10_000, logical_systems=3))
+    assert 9_000 < lines < 11_000
+
+
+def test_generated_config_parses_to_given_counts():
+    lines = generate_srx_config(
+        logical_systems=2, policies=30, addresses=40, address_sets=5,
+        applications=6, routes=8, interfaces=4, static_nats=3,
+    )
+    parser = ParserSrxSets(ConfigDataList(lines))
+    parser.run()
+    hostname, fw_data = parser.get_data()
+
+    assert hostname == 'SRX-BENCH'
+    assert list(fw_data) == ['root', 'LS1', 'LS2']
+    for logsys_data in fw_data.values():
+        assert len(logsys_data['fw rules']) == 30
+        assert len(logsys_data['addresses']) == 40
+        assert len(logsys_data['address-groups']) == 5
+        assert len(logsys_data['services']) == 6
+        assert len(logsys_data['routes']['static']) == 8
+        assert len(logsys_data['interfaces']) == 4
+        assert len(logsys_data['NATs']['static']) == 3
+
+
+def test_compare_with_baseline():
+    baseline = {'results': {'a/10': {'seconds': 1.0}, 'b/10': {'seconds': 1.0}}}
+    report = {'results': {
+        'a/10': {'seconds': 1.1}, 'b/10': {'seconds': 1.5}, 'new/10': {'seconds': 9.0},
+    }}
+    assert compare(report, baseline, threshold=0.2) == [('b/10', 1.0, 1.5)]
+    assert compare(report, baseline, threshold=0.05) == [('a/10', 1.0, 1.1), ('b/10', 1.0, 1.5)]
+
+
+def test_compare_mode_fails_on_regression(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'results': {'a/10': {'seconds': 1.0}}}))
+    slower = tmp_path / 'slower.json'
+    slower.write_text(json.dumps({'results': {'a/10': {'seconds': 1.5}}}))
+    args = ['--compare', str(slower), '--baseline', str(baseline)]
+    assert suite_main(args) == 1
+    assert suite_main(args + ['--threshold', '0.6']) == 0
+    assert suite_main(['--compare', str(slower), '--baseline', str(tmp_path / 'missing.json')]) == 1
+    ## Committed baseline compares with itself:
+    assert suite_main(['--compare', DEFAULT_BASELINE]) == 0
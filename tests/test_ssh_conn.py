@@ -15,3 +15,70 @@ def test_configdata_ssh_dummy(mock_connect):
     assert any("hostname TEST" in l for l in lines)
     dummy_connection.send_command.assert_called_with("show full-configuration")
     dummy_connection.disconnect.assert_called_once()
+
+
+class FakeChannel():
+    def __init__(self, chunks, prompt='user@srx>'):
+        self.chunks = list(chunks)
+        self.prompt = prompt
+        self.written = []
+
+    def find_prompt(self):
+        return self.prompt
+
+    def write_channel(self, data):
+        self.written.append(data)
+
+    def read_channel(self):
+        return self.chunks.pop(0) if self.chunks else ''
+
+    def disconnect(self):
+        pass
+
+
+@patch("data_processing.config_data.ConnectHandler")
+def test_configdata_ssh_stream(mock_connect):
+    comm = 'show configuration | display set'
+    channel = FakeChannel([
+        f'{comm}\r\n',
+        'set system host-name SRX\r\nset security address-book global ',
+        '',
+        'address net1 10.1.1.0/24\r\n---(more 45%)---',
+        '\r                \rset routing-options static route 0.0.0.0/0 next-hop 1.1.1.1\r\n',
+        '\r\nuser@srx> ',
+    ])
+    mock_connect.return_value = channel
+
+    cd_ssh = ConfigDataSSH("1.2.3.4", "user", "pass", "juniper_junos", stream=True)
+    mock_connect.assert_not_called()
+    lines = list(cd_ssh.get())
+
+    assert lines == [
+        'set system host-name SRX',
+        'set security address-book global address net1 10.1.1.0/24',
+        ## Pager prompt erased with '\r', spaces and '\r':
+        'set routing-options static route 0.0.0.0/0 next-hop 1.1.1.1',
+        '',
+    ]
+    assert channel.written == [comm + '\n', ' ']
+
+
+@patch("data_processing.config_data.ConnectHandler")
+def test_configdata_ssh_stream_carriage_return(mock_connect):
+    comm = 'show configuration | display set'
+    channel = FakeChannel([
+        f'{comm}\r\n',
+        ## '\r\n' split between chunks, '\r' before newline changes nothing:
+        'set system host-name SRX\r',
+        '\nset security zones security-zone trust\r\r\n',
+        'garbage\rset system ',
+        'services ssh\r\n',
+        'user@srx> ',
+    ])
+    mock_connect.return_value = channel
+    lines = list(ConfigDataSSH("1.2.3.4", "user", "pass", "juniper_junos", stream=True).get())
+    assert lines == [
+        'set system host-name SRX',
+        'set security zones security-zone trust',
+        'set system services ssh',
+    ]